@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Générateurs de données synthétiques pour les benchmarks Secpilot
+
+Produit des logs de tests volumineux, des rapports SARIF de grande taille
+et de longues listes de prix, de façon déterministe (graine fixe).
+"""
+
+import random
+from typing import Dict, List
+
+
+DOMAINS = {
+    'ecommerce': ('test_pricing.py', 'TestCalculateDiscount', 'EC-001'),
+    'banking': ('test_transfer.py', 'TestTransferFunds', 'BK-001'),
+    'healthcare': ('test_dosage.py', 'TestCalculateDosage', 'HC-001'),
+}
+
+RULES = [
+    ("ecommerce-no-negative-price-python", "error", "ecommerce", "EC-001", "product['price'] = new_price"),
+    ("banking-missing-balance-check-python", "error", "banking", "BK-001", "from_account['balance'] -= amount"),
+    ("healthcare-missing-dosage-cap-python", "error", "healthcare", "HC-001", "return weight_kg * dose_per_kg"),
+    ("banking-keyerror-dict-access", "warning", "banking", "", "return amount * fees[account_type]"),
+    ("healthcare-division-by-zero", "warning", "healthcare", "", "return total_dose / frequency"),
+]
+
+
+def generate_test_log(size_bytes: int, failure_ratio: float = 0.05, seed: int = 0) -> str:
+    """Génère une sortie pytest d'environ `size_bytes` octets avec des échecs"""
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    index = 0
+    while size < size_bytes:
+        domain = rng.choice(list(DOMAINS))
+        test_file, test_class, rule = DOMAINS[domain]
+        test_id = f"tests/python/{test_file}::{test_class}::test_case_{index}"
+        if rng.random() < failure_ratio:
+            block = [
+                f"{test_id} FAILED",
+                f"    def test_case_{index}(self):",
+                f'        """RÈGLE MÉTIER {rule} ({domain})"""',
+                f">       assert result >= 0",
+                f"E       AssertionError: valeur inattendue {rng.randint(-1000, -1)}",
+                "",
+                f"src/python/{domain}/module.py:{rng.randint(1, 200)}: AssertionError",
+                "",
+            ]
+        else:
+            block = [f"{test_id} PASSED"]
+        for line in block:
+            lines.append(line)
+            size += len(line) + 1
+        index += 1
+    return '\n'.join(lines)
+
+
+def generate_sarif(count: int, seed: int = 0) -> Dict:
+    """Génère un rapport SARIF Semgrep de `count` violations"""
+    rng = random.Random(seed)
+    rules = [
+        {"id": rule_id, "properties": {"business_rule": business_rule, "domain": domain}}
+        for rule_id, _, domain, business_rule, _ in RULES
+    ]
+    results = []
+    for i in range(count):
+        rule_id, level, domain, _, snippet = RULES[rng.randrange(len(RULES))]
+        results.append({
+            "ruleId": rule_id,
+            "level": level,
+            "message": {"text": f"Violation {rule_id}"},
+            "locations": [{"physicalLocation": {
+                "artifactLocation": {"uri": f"src/python/{domain}/module_{i % 1000}.py"},
+                "region": {"startLine": rng.randint(1, 500), "snippet": {"text": snippet}},
+            }}],
+        })
+    return {
+        "version": "2.1.0",
+        "runs": [{"tool": {"driver": {"name": "Semgrep OSS", "rules": rules}}, "results": results}],
+    }
+
+
+def generate_price_list(count: int, seed: int = 0) -> List[Dict]:
+    """Génère `count` articles avec un prix"""
+    rng = random.Random(seed)
+    return [{'sku': f"SKU-{i:08d}", 'price': round(rng.uniform(0.5, 500.0), 2)} for i in range(count)]
+
+
+def generate_price_updates(count: int, negative_ratio: float = 0.001, seed: int = 1):
+    """Génère un flux de `count` mises à jour (SKU, prix en centimes), dont une part de prix négatifs"""
+    rng = random.Random(seed)
+    skus = [f"SKU-{rng.randrange(count):08d}" for _ in range(count)]
+    prices = [-rng.randint(1, 1000) if rng.random() < negative_ratio else rng.randint(50, 50000)
+              for _ in range(count)]
+    return skus, prices
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Regroupement des violations Semgrep pour la pipeline CI/CD Secpilot
+
+Regroupe les violations produites par parse_semgrep_findings.py par règle et
+par forme de snippet normalisée (identifiants et littéraux abstraits), afin
+qu'une seule suggestion LLM puisse être redistribuée à tous les membres
+d'un groupe au lieu d'une requête par violation.
+"""
+
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import keyword
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from parse_semgrep_findings import parse_sarif
+
+
+# Tokens d'un snippet : chaînes, nombres, identifiants, opérateurs
+TOKEN_RE = re.compile(
+    r"""(?P<str>'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*"|`(?:\\.|[^`\\])*`)"""
+    r"|(?P<num>\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b)"
+    r"|(?P<id>[A-Za-z_$][A-Za-z0-9_$]*)"
+    r"|(?P<op>[^\sA-Za-z0-9_$])"
+)
+
+# Mots-clés conservés tels quels (Python, JavaScript, Java)
+KEYWORDS = frozenset(keyword.kwlist) | frozenset([
+    'function', 'var', 'let', 'const', 'new', 'this', 'throw', 'typeof',
+    'null', 'undefined', 'true', 'false', 'public', 'private', 'protected',
+    'static', 'void', 'int', 'double', 'float', 'long', 'boolean', 'String',
+    'Math', 'self', 'max', 'min', 'len',
+])
+
+SEVERITY_ORDER = {"CRITIQUE": 0, "HAUTE": 1, "MOYENNE": 2}
+
+DEFAULT_EXEMPLARS = 3
+
+
+def normalize_snippet(snippet: str) -> str:
+    """Abstrait identifiants et littéraux d'un snippet pour en extraire la forme"""
+    tokens = []
+    for match in TOKEN_RE.finditer(snippet):
+        kind = match.lastgroup
+        value = match.group()
+        if kind == 'str':
+            tokens.append('STR')
+        elif kind == 'num':
+            tokens.append('NUM')
+        elif kind == 'id':
+            tokens.append(value if value in KEYWORDS else 'ID')
+        else:
+            tokens.append(value)
+    return ' '.join(tokens)
+
+
+def snippet_shape(snippet: str) -> str:
+    """Retourne le hash court de la forme normalisée d'un snippet"""
+    normalized = normalize_snippet(snippet)
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def _pick_exemplars(members: List[Dict], count: int) -> List[Dict]:
+    """Choisit des exemplaires représentatifs, en privilégiant des fichiers distincts"""
+    ordered = sorted(members, key=lambda f: (f.get("file", ""), f.get("line", 0)))
+    exemplars = []
+    seen_files = set()
+    for finding in ordered:
+        if len(exemplars) >= count:
+            break
+        if finding.get("file") not in seen_files:
+            seen_files.add(finding.get("file"))
+            exemplars.append(finding)
+    for finding in ordered:
+        if len(exemplars) >= count:
+            break
+        if finding not in exemplars:
+            exemplars.append(finding)
+    return exemplars
+
+
+def cluster_findings(findings: List[Dict], exemplars: int = DEFAULT_EXEMPLARS) -> Dict:
+    """Regroupe les violations par (rule_id, forme du snippet)"""
+
+    groups: Dict[tuple, List[Dict]] = {}
+    shapes: Dict[str, str] = {}  # Beaucoup de snippets identiques : mémoïsation
+
+    for finding in findings:
+        snippet = finding.get("snippet", "")
+        shape = shapes.get(snippet)
+        if shape is None:
+            shape = shapes[snippet] = snippet_shape(snippet)
+        groups.setdefault((finding.get("rule_id", "unknown"), shape), []).append(finding)
+
+    clusters = []
+    for (rule_id, shape), members in groups.items():
+        first = members[0]
+        clusters.append({
+            "cluster_id": f"{rule_id}:{shape}",
+            "rule_id": rule_id,
+            "shape": shape,
+            "size": len(members),
+            "severity": first.get("severity", "INCONNUE"),
+            "message": first.get("message", ""),
+            "metadata": first.get("metadata", {}),
+            "exemplars": _pick_exemplars(members, exemplars),
+            "members": [
+                {"file": f.get("file", ""), "line": f.get("line", 0)}
+                for f in members
+            ],
+        })
+
+    # Les groupes critiques et volumineux d'abord
+    clusters.sort(key=lambda c: (SEVERITY_ORDER.get(c["severity"], 99), -c["size"], c["cluster_id"]))
+
+    return {
+        "source": "semgrep-clusters",
+        "total_findings": len(findings),
+        "total_clusters": len(clusters),
+        "clusters": clusters,
+    }
+
+
+def fan_out(clusters: List[Dict], suggestions: Dict[str, str]) -> List[Dict]:
+    """Redistribue la suggestion de chaque groupe à tous ses membres"""
+    results = []
+    for cluster in clusters:
+        suggestion = suggestions.get(cluster["cluster_id"])
+        if suggestion is None:
+            continue
+        for member in cluster["members"]:
+            results.append({
+                "rule_id": cluster["rule_id"],
+                "file": member["file"],
+                "line": member["line"],
+                "cluster_id": cluster["cluster_id"],
+                "suggestion": suggestion,
+            })
+    return results
+
+
+def generate_synthetic_findings(count: int, seed: Optional[int] = 0) -> List[Dict]:
+    """Génère des violations synthétiques pour le benchmark"""
+    rng = random.Random(seed)
+    templates = [
+        ("ecommerce-no-negative-price-python", "CRITIQUE", "{a}['{k}'] = {b}"),
+        ("banking-missing-balance-check-python", "CRITIQUE", "{a}['{k}'] -= {b}"),
+        ("healthcare-missing-dosage-cap-python", "CRITIQUE", "return {a} * {b}"),
+        ("banking-keyerror-dict-access", "HAUTE", "return {b} * {a}['{k}']"),
+        ("banking-regex-missing-anchors", "HAUTE", "re.match(r'\\d{{{n}}}', str({a}))"),
+    ]
+    names = ['product', 'item', 'account', 'src', 'weight', 'dose', 'price', 'fees']
+    findings = []
+    for i in range(count):
+        rule_id, severity, template = templates[i % len(templates)]
+        snippet = template.format(
+            a=rng.choice(names), b=rng.choice(names), k=rng.choice(names), n=rng.randint(4, 12)
+        )
+        findings.append({
+            "rule_id": rule_id,
+            "severity": severity,
+            "message": f"Violation {rule_id}",
+            "file": f"src/python/module_{i % 997}.py",
+            "line": i % 500 + 1,
+            "snippet": snippet,
+            "metadata": {},
+        })
+    return findings
+
+
+def run_benchmark(count: int) -> Dict:
+    """Mesure le regroupement sur un rapport synthétique de `count` violations"""
+    findings = generate_synthetic_findings(count)
+    start = time.perf_counter()
+    result = cluster_findings(findings)
+    elapsed = time.perf_counter() - start
+    return {
+        "findings": count,
+        "clusters": result["total_clusters"],
+        "reduction": round(count / max(result["total_clusters"], 1), 1),
+        "seconds": round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Regroupe les violations Semgrep pour limiter les appels LLM'
+    )
+    parser.add_argument(
+        'input',
+        nargs='?',
+        help='Fichier SARIF ou JSON produit par parse_semgrep_findings.py'
+    )
+    parser.add_argument(
+        'output',
+        nargs='?',
+        default='semgrep-clusters.json',
+        help='Fichier de sortie (défaut: semgrep-clusters.json)'
+    )
+    parser.add_argument(
+        '--exemplars',
+        type=int,
+        default=DEFAULT_EXEMPLARS,
+        help=f'Nombre d\'exemplaires par groupe (défaut: {DEFAULT_EXEMPLARS})'
+    )
+    parser.add_argument(
+        '--benchmark',
+        type=int,
+        metavar='N',
+        help='Mesure le regroupement sur N violations synthétiques'
+    )
+
+    args = parser.parse_args()
+
+    if args.benchmark:
+        stats = run_benchmark(args.benchmark)
+        print(f"{stats['findings']} violation(s) → {stats['clusters']} groupe(s) "
+              f"(x{stats['reduction']}) en {stats['seconds']}s")
+        return
+
+    if not args.input:
+        parser.error("le fichier d'entrée est requis")
+
+    input_path = Path(args.input)
+    if input_path.suffix == '.sarif':
+        data = parse_sarif(str(input_path))
+    else:
+        data = json.loads(input_path.read_text(encoding='utf-8'))
+
+    result = cluster_findings(data.get("findings", []), exemplars=args.exemplars)
+
+    Path(args.output).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print(f"Semgrep : {result['total_findings']} violation(s) → {result['total_clusters']} groupe(s)")
+    print(f"Résultats écrits dans : {args.output}")
+
+
+if __name__ == '__main__':
+    main()
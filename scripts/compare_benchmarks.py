@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Comparaison des résultats de benchmarks avec une baseline
+
+Échoue (code 1) si un benchmark régresse au-delà du seuil configuré.
+Usage : compare_benchmarks.py <baseline.json> <results.json> [--threshold 0.2] [--update]
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """Compare deux résultats ; retourne (régressions, lignes du rapport)"""
+    regressions = []
+    report = []
+    base = baseline.get("benchmarks", {})
+
+    for name, result in sorted(current.get("benchmarks", {}).items()):
+        if name not in base:
+            report.append(f"  {name} : {result['seconds']:.4f}s (nouveau)")
+            continue
+        before = base[name]["seconds"]
+        after = result["seconds"]
+        ratio = after / before if before else 1.0
+        line = f"  {name} : {before:.4f}s → {after:.4f}s ({(ratio - 1) * 100:+.1f}%)"
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            line += " RÉGRESSION"
+        report.append(line)
+
+    return regressions, report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare des résultats de benchmarks avec une baseline'
+    )
+    parser.add_argument('baseline', help='Fichier JSON de baseline')
+    parser.add_argument('results', help='Fichier JSON des résultats courants')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.2,
+        help='Régression tolérée, en fraction (défaut: 0.2 soit +20%%)'
+    )
+    parser.add_argument(
+        '--update',
+        action='store_true',
+        help='Remplace la baseline par les résultats courants'
+    )
+
+    args = parser.parse_args()
+
+    current = json.loads(Path(args.results).read_text(encoding='utf-8'))
+    baseline_path = Path(args.baseline)
+
+    if args.update or not baseline_path.exists():
+        baseline_path.write_text(json.dumps(current, indent=2), encoding='utf-8')
+        print(f"Baseline écrite dans : {args.baseline}")
+        return
+
+    baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+    regressions, report = compare(baseline, current, args.threshold)
+
+    print(f"Benchmarks (seuil +{args.threshold * 100:.0f}%) :")
+    print('\n'.join(report))
+
+    if regressions:
+        print(f"{len(regressions)} régression(s) : {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Index de recherche sur les documents de contexte métier
+
+Découpe les documents contexts/*.md (et contexts/<domaine>/*.md) en sections
+par titre Markdown, les indexe localement (BM25, sans réseau) et persiste
+l'index sur disque. Seuls les fichiers modifiés sont réindexés. Au moment de
+construire le prompt, on récupère les sections les plus pertinentes pour les
+tests échoués, les messages d'erreur et les identifiants de règles (BK-001...).
+
+    context_index.py build contexts [--index .context-index.json]
+    context_index.py query contexts "BK-001 solde insuffisant" [--domain banking]
+"""
+
+import re
+import json
+import math
+import argparse
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+INDEX_VERSION = 1
+
+DEFAULT_INDEX = '.context-index.json'
+
+# Paramètres BM25 usuels
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+
+# Identifiants de règles (ec-001) conservés entiers, sinon mots alphanumériques
+TOKEN_RE = re.compile(r'[a-z]{2}-\d{3}|[a-z0-9]+')
+
+RULE_ID_RE = re.compile(r'\b[A-Z]{2}-\d{3}\b')
+
+STOPWORDS = frozenset("""
+    a au aux avec ce ces dans de des du en est et il la le les leur mais ne ni nous
+    ou par pas pour qu que qui sa se ses son sur un une vous etre doit doivent
+    an and are as at be by for from in is it of on or that the this to with
+    test tests py
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Découpe un texte en termes normalisés (minuscules, sans accents)"""
+    folded = unicodedata.normalize('NFKD', text.lower())
+    folded = ''.join(c for c in folded if not unicodedata.combining(c))
+    return [t for t in TOKEN_RE.findall(folded.replace('_', ' ')) if t not in STOPWORDS and len(t) > 1]
+
+
+def split_sections(text: str) -> List[Dict]:
+    """Découpe un document Markdown en sections (titre hiérarchique + contenu)"""
+    sections = []
+    path: List[str] = []
+    current_title = ''
+    lines: List[str] = []
+
+    def flush():
+        body = '\n'.join(lines).strip()
+        if body:
+            sections.append({'title': current_title, 'text': body})
+
+    for line in text.split('\n'):
+        match = HEADING_RE.match(line)
+        if match:
+            flush()
+            lines = []
+            level = len(match.group(1))
+            path = path[:level - 1] + [''] * max(0, level - 1 - len(path)) + [match.group(2)]
+            current_title = ' > '.join(p for p in path if p)
+        else:
+            lines.append(line)
+    flush()
+    return sections
+
+
+def _domain_for(path: Path, contexts_dir: Path) -> str:
+    """contexts/<domaine>.md ou contexts/<domaine>/<document>.md"""
+    relative = path.relative_to(contexts_dir)
+    return relative.parts[0] if len(relative.parts) > 1 else path.stem
+
+
+class ContextIndex:
+    """Index BM25 des sections de contexte, persisté et mis à jour de façon incrémentale"""
+
+    def __init__(self, index_path: Optional[Path] = None):
+        self.index_path = index_path
+        self.files: Dict[str, Dict] = {}
+        self.sections: Dict[str, Dict] = {}
+        self._postings: Optional[Dict[str, List]] = None
+        self._average_length = 1.0
+        if index_path and index_path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.index_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if data.get('version') == INDEX_VERSION:
+            self.files = data['files']
+            self.sections = data['sections']
+
+    def save(self) -> None:
+        if not self.index_path:
+            return
+        tmp = self.index_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({
+            'version': INDEX_VERSION,
+            'files': self.files,
+            'sections': self.sections,
+        }, ensure_ascii=False), encoding='utf-8')
+        tmp.replace(self.index_path)
+
+    def update(self, contexts_dir: Path) -> int:
+        """Réindexe les fichiers nouveaux ou modifiés ; retourne leur nombre"""
+        current = {}
+        if contexts_dir.exists():
+            for path in sorted(contexts_dir.rglob('*.md')):
+                stat = path.stat()
+                current[str(path)] = (path, [stat.st_mtime_ns, stat.st_size])
+
+        changed = 0
+        removed = 0
+        for name in list(self.files):
+            if name not in current or self.files[name]['signature'] != current[name][1]:
+                for section_id in self.files.pop(name)['sections']:
+                    self.sections.pop(section_id, None)
+                removed += 1
+
+        for name, (path, signature) in current.items():
+            if name in self.files:
+                continue
+            changed += 1
+            domain = _domain_for(path, contexts_dir)
+            ids = []
+            for position, section in enumerate(split_sections(path.read_text(encoding='utf-8'))):
+                section_id = f"{name}#{position}"
+                terms: Dict[str, int] = {}
+                for term in tokenize(section['title'] + '\n' + section['text']):
+                    terms[term] = terms.get(term, 0) + 1
+                self.sections[section_id] = {
+                    'domain': domain,
+                    'title': section['title'],
+                    'text': section['text'],
+                    'length': sum(terms.values()),
+                    'terms': terms,
+                }
+                ids.append(section_id)
+            self.files[name] = {'signature': signature, 'sections': ids}
+
+        if changed or removed:
+            self._postings = None
+            self.save()
+        return changed
+
+    def _build_postings(self) -> Dict[str, List]:
+        postings: Dict[str, List] = {}
+        for section_id, section in self.sections.items():
+            for term, count in section['terms'].items():
+                postings.setdefault(term, []).append((section_id, count))
+        if self.sections:
+            self._average_length = sum(s['length'] for s in self.sections.values()) / len(self.sections) or 1.0
+        return postings
+
+    def search(self, query: str, domain: Optional[str] = None, k: int = 3) -> List[Dict]:
+        """Retourne les k sections les plus pertinentes (score BM25)"""
+        if self._postings is None:
+            self._postings = self._build_postings()
+        if not self.sections:
+            return []
+
+        total = len(self.sections)
+        average = self._average_length
+        scores: Dict[str, float] = {}
+
+        # Un terme répété dans la requête pèse davantage
+        for term, weight in Counter(tokenize(query)).items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for section_id, count in postings:
+                section = self.sections[section_id]
+                if domain and section['domain'] != domain:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * section['length'] / average)
+                score = weight * idf * count * (BM25_K1 + 1) / (count + norm)
+                scores[section_id] = scores.get(section_id, 0.0) + score
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [{'id': sid, 'score': round(score, 4), **{
+            key: self.sections[sid][key] for key in ('domain', 'title', 'text')
+        }} for sid, score in ranked]
+
+    def context_for(self, domain: str, query: str, k: int = 3, budget: int = 2000) -> str:
+        """Assemble les sections pertinentes d'un domaine dans la limite de `budget` caractères"""
+        return _assemble(self.search(query, domain=domain, k=k), budget)
+
+    def leading_context(self, domain: str, budget: int = 2000) -> str:
+        """Premières sections des documents d'un domaine, dans l'ordre des documents
+
+        Repli quand aucune section ne correspond à la requête.
+        """
+        sections = (
+            self.sections[section_id]
+            for name in sorted(self.files)
+            for section_id in self.files[name]['sections']
+            if self.sections[section_id]['domain'] == domain
+        )
+        return _assemble(sections, budget)
+
+
+def _assemble(sections: Iterable[Dict], budget: int) -> str:
+    """Concatène des sections (titre et texte) dans la limite de `budget` caractères"""
+    parts = []
+    size = 0
+    for section in sections:
+        block = f"### {section['title']}\n{section['text']}"
+        if parts and size + len(block) > budget:
+            break
+        parts.append(block)
+        size += len(block) + 2
+    return '\n\n'.join(parts)
+
+
+def build_query(test_failure: Dict, extra: Iterable[str] = ()) -> str:
+    """Construit la requête à partir des tests échoués, des erreurs et des règles citées"""
+    texts = list(test_failure.get('failed_tests', [])) + list(test_failure.get('error_messages', []))
+    texts.extend(extra)
+    rule_ids = RULE_ID_RE.findall(test_failure.get('raw_output', ''))
+    # Les identifiants de règles sont répétés pour peser davantage
+    return '\n'.join(texts + sorted(set(rule_ids)) * 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Index de recherche sur les contextes métier')
+    parser.add_argument('command', choices=['build', 'query'])
+    parser.add_argument('contexts_dir', help='Répertoire des documents de contexte')
+    parser.add_argument('query', nargs='?', default='', help='Texte recherché (commande query)')
+    parser.add_argument('--index', default=DEFAULT_INDEX, help=f'Fichier d\'index (défaut: {DEFAULT_INDEX})')
+    parser.add_argument('--domain', help='Restreint la recherche à un domaine')
+    parser.add_argument('-k', type=int, default=3, help='Nombre de sections retournées (défaut: 3)')
+
+    args = parser.parse_args()
+
+    index = ContextIndex(Path(args.index))
+    changed = index.update(Path(args.contexts_dir))
+
+    if args.command == 'build':
+        print(f"Index : {len(index.sections)} section(s), {changed} fichier(s) réindexé(s)")
+        print(f"Index écrit dans : {args.index}")
+        return
+
+    if not args.query:
+        parser.error("la commande query attend un texte")
+    for section in index.search(args.query, domain=args.domain, k=args.k):
+        print(f"{section['score']:.3f}  [{section['domain']}] {section['title']}")
+
+
+if __name__ == '__main__':
+    main()
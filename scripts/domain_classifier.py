@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Classification des sorties de tests par domaine métier
+
+Le registre des domaines est dérivé du répertoire contexts/ (contexts/<domaine>.md
+ou contexts/<domaine>/), complété par des alias : noms de modules (transfer,
+dosage, pricing...) et préfixes de règles (EC-, BK-, HC-). Tous les termes sont
+compilés en une seule expression factorisée en arbre de préfixes (trie), ce qui
+évite d'essayer chaque terme à chaque position : la sortie, mise en minuscules
+une seule fois, est parcourue en un passage et le nombre d'occurrences par
+domaine sert au classement.
+
+    domain_classifier.py artifacts/test-results-python/test-output.txt [--contexts-dir contexts]
+"""
+
+import re
+import json
+import argparse
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+# Alias par défaut des domaines du projet ; complétés par --domain-aliases
+DEFAULT_ALIASES: Dict[str, List[str]] = {
+    'ecommerce': ['pricing', 'discount', 'EC-'],
+    'banking': ['transfer', 'BK-'],
+    'healthcare': ['dosage', 'HC-'],
+}
+
+
+# Alias désignant un préfixe de règle métier (« EC- », « BK- »)
+RULE_PREFIX_RE = re.compile(r'^[a-z]+-$')
+
+
+def discover_domains(contexts_dir: Path) -> List[str]:
+    """Domaines décrits dans contexts/ : contexts/<domaine>.md ou contexts/<domaine>/"""
+    domains = set()
+    if contexts_dir.exists():
+        for path in contexts_dir.iterdir():
+            if path.is_dir():
+                domains.add(path.name)
+            elif path.suffix == '.md':
+                domains.add(path.stem)
+    return sorted(domains)
+
+
+def load_aliases(path: Optional[Path] = None) -> Dict[str, List[str]]:
+    """Alias par défaut, complétés par un fichier JSON {"domaine": ["alias", ...]}"""
+    aliases = {domain: list(terms) for domain, terms in DEFAULT_ALIASES.items()}
+    if path:
+        for domain, terms in json.loads(path.read_text(encoding='utf-8')).items():
+            aliases.setdefault(domain, []).extend(terms)
+    return aliases
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Alternance des termes factorisée par préfixes communs"""
+    root: Dict[str, Dict] = {}
+    for term in terms:
+        node = root
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _emit(root)
+
+
+def _emit(node: Dict[str, Dict]) -> str:
+    branches = [re.escape(char) + _emit(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    if '' in node:
+        # Un terme se termine ici : la suite est facultative et gloutonne (plus long terme)
+        return f"(?:{body})?"
+    return body
+
+
+class DomainClassifier:
+    """Compte les occurrences de chaque domaine en un seul parcours du texte"""
+
+    def __init__(self, domains: Iterable[str], aliases: Optional[Dict[str, List[str]]] = None):
+        aliases = DEFAULT_ALIASES if aliases is None else aliases
+        # Les domaines sans contexte mais dotés d'alias restent reconnus
+        self.domains = sorted(set(domains) | set(aliases))
+
+        # Terme (en minuscules) → domaine ; un terme partagé revient au premier domaine
+        self.owners: Dict[str, str] = {}
+        for domain in self.domains:
+            for term in (domain, *aliases.get(domain, [])):
+                self.owners.setdefault(term.lower(), domain)
+        self.pattern = re.compile(_trie_pattern(self.owners)) if self.owners else None
+
+        # Identifiants de règles métier : préfixes des alias (« BK- ») suivis de trois chiffres
+        prefixes = sorted(term for term in self.owners if RULE_PREFIX_RE.match(term))
+        self.rule_pattern = re.compile(
+            r'(?<![a-z0-9])' + _trie_pattern(prefixes) + r'\d{3}\b', re.IGNORECASE
+        ) if prefixes else None
+
+    def count(self, text: str) -> Counter:
+        """Nombre d'occurrences par domaine"""
+        hits: Counter = Counter()
+        if self.pattern is None:
+            return hits
+        text = text.lower()
+        for match in self.pattern.finditer(text):
+            term = match.group()
+            if term.endswith('-'):
+                # Un préfixe de règle (« BK- ») n'est reconnu qu'en début de mot et suivi d'un numéro
+                start, end = match.span()
+                if not text[end:end + 1].isdigit() or (start and text[start - 1].isalnum()):
+                    continue
+            hits[self.owners[term]] += 1
+        return hits
+
+    def cites_rule(self, text: str) -> bool:
+        """Vrai si le texte cite une règle métier d'un domaine connu (ex. BK-001)"""
+        return bool(self.rule_pattern and self.rule_pattern.search(text))
+
+    def rank(self, text: str) -> List[str]:
+        """Domaines présents dans le texte, du plus au moins cité"""
+        return ranked(self.count(text))
+
+
+def ranked(hits: Counter) -> List[str]:
+    """Domaines triés par nombre d'occurrences décroissant, puis par nom"""
+    return [domain for domain, _ in sorted(hits.items(), key=lambda item: (-item[1], item[0]))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Classe une sortie de tests par domaine métier')
+    parser.add_argument('test_output', help='Fichier de sortie des tests')
+    parser.add_argument('--contexts-dir', default='contexts', help='Répertoire des contextes (défaut: contexts)')
+    parser.add_argument('--domain-aliases', help='Fichier JSON d\'alias supplémentaires par domaine')
+
+    args = parser.parse_args()
+
+    classifier = DomainClassifier(
+        discover_domains(Path(args.contexts_dir)),
+        load_aliases(Path(args.domain_aliases) if args.domain_aliases else None)
+    )
+    hits = classifier.count(Path(args.test_output).read_text(encoding='utf-8'))
+    for domain in ranked(hits):
+        print(f"{hits[domain]:>8}  {domain}")
+
+
+if __name__ == '__main__':
+    main()
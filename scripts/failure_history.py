@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Historique des signatures d'échecs de tests
+
+La plupart des builds en échec reproduisent un échec déjà vu. Chaque échec est
+réduit à une signature normalisée : identifiant du test, type d'exception et
+frames de la traceback, sans numéros de ligne ni adresses mémoire. L'historique
+(SQLite, clés primaires indexées : recherches en temps constant quelle que soit
+sa taille) conserve pour chaque signature le hash du code source analysé, et
+pour chaque job la suggestion produite. Un échec qui disparaît sans
+modification du code est marqué instable (flaky), jusqu'à ce qu'il réapparaisse
+sur un code source modifié.
+
+    failure_history.py stats [--history .failure-history.db]
+"""
+
+import re
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+DEFAULT_HISTORY = '.failure-history.db'
+
+# Frames de traceback : Python, pytest (forme courte), Node.js, Java
+FRAME_RES = [
+    re.compile(r'File "([^"]+)", line \d+, in (\S+)'),
+    re.compile(r'^([\w./\\-]+\.py):\d+:(?: in (\S+))?'),
+    re.compile(r'\bat (?:([\w$.<>\[\] ]+?) \()?([^\s()]+\.(?:js|ts|mjs|cjs)):\d+(?::\d+)?\)?'),
+    re.compile(r'\bat ([\w$.<>]+)\(([\w$]+\.java)(?::\d+)?\)'),
+]
+
+EXCEPTION_RE = re.compile(r'\b((?:[a-z_][\w]*\.)*[A-Z]\w*(?:Error|Exception|Failure|Failed))\b')
+
+ADDRESS_RE = re.compile(r'0x[0-9a-fA-F]+')
+
+FAILED_LINE_RE = re.compile(r'^\s*(?:FAILED|FAIL:|✗|✕)\s*(\S.*?)(?:\s+-\s+(.*))?$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    signature TEXT PRIMARY KEY,
+    test_id TEXT NOT NULL,
+    exception TEXT NOT NULL,
+    language TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    occurrences INTEGER NOT NULL DEFAULT 1,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    flaky INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS signatures_test_id ON signatures (test_id);
+CREATE TABLE IF NOT EXISTS suggestions (
+    job_key TEXT PRIMARY KEY,
+    suggestion TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    created REAL NOT NULL,
+    reused INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def source_hash(source_code: str) -> str:
+    return hashlib.sha256(source_code.encode('utf-8')).hexdigest()
+
+
+def normalize_frames(traceback: str) -> List[str]:
+    """Frames (fichier et fonction) d'une traceback, sans numéros de ligne ni adresses"""
+    frames = []
+    for line in ADDRESS_RE.sub('', traceback).split('\n'):
+        line = line.strip()
+        for frame_re in FRAME_RES:
+            match = frame_re.search(line)
+            if match:
+                frames.append(':'.join(part for part in match.groups() if part))
+                break
+    # Une récursion ou une frame répétée ne change pas la signature
+    return [frame for position, frame in enumerate(frames) if position == 0 or frames[position - 1] != frame]
+
+
+def exception_type(text: str) -> str:
+    match = EXCEPTION_RE.search(text)
+    return match.group(1).rsplit('.', 1)[-1] if match else ''
+
+
+def failure_signature(test_id: str, exception: str, frames: List[str]) -> str:
+    return hashlib.sha256('\n'.join([test_id, exception, *frames]).encode('utf-8')).hexdigest()
+
+
+def extract_failures(test_failure: Dict) -> List[Dict]:
+    """Échecs individuels d'une sortie de tests, avec leur signature
+
+    Utilise les échecs structurés des rapports JUnit s'ils sont présents,
+    sinon les lignes FAILED de la sortie texte (sans traceback associée).
+    """
+    failures = []
+    if 'failures' in test_failure:
+        raw = [(f['test_id'], f['message'] + '\n' + f['traceback'], f['traceback'])
+               for f in test_failure['failures']]
+    else:
+        raw = []
+        for line in test_failure.get('failed_tests', []):
+            match = FAILED_LINE_RE.match(line)
+            if match:
+                raw.append((match.group(1), match.group(2) or '', ''))
+
+    for test_id, text, traceback in raw:
+        exception = exception_type(text)
+        frames = normalize_frames(traceback)
+        failures.append({
+            'test_id': test_id,
+            'exception': exception,
+            'frames': frames,
+            'signature': failure_signature(test_id, exception, frames),
+        })
+    return failures
+
+
+def job_key(language: str, domain: str, failures: List[Dict]) -> str:
+    """Clé d'un job : même langage, même domaine, même ensemble de signatures"""
+    signatures = sorted({f['signature'] for f in failures})
+    return hashlib.sha256('\n'.join([language, domain, *signatures]).encode('utf-8')).hexdigest()
+
+
+class FailureHistory:
+    """Historique SQLite des signatures d'échecs et des suggestions associées"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock, self.db:
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def suggestion(self, key: str) -> Optional[Dict]:
+        """Suggestion enregistrée pour un job, ou None"""
+        with self.lock:
+            row = self.db.execute('SELECT * FROM suggestions WHERE job_key = ?', (key,)).fetchone()
+        return dict(row) if row else None
+
+    def flaky(self, signatures: Iterable[str]) -> bool:
+        """Vrai si toutes les signatures sont connues et marquées instables"""
+        signatures = list(set(signatures))
+        if not signatures:
+            return False
+        with self.lock:
+            count = self.db.execute(
+                f"SELECT COUNT(*) FROM signatures WHERE flaky = 1 AND signature IN ({','.join('?' * len(signatures))})",
+                signatures
+            ).fetchone()[0]
+        return count == len(signatures)
+
+    def record_failures(self, failures: List[Dict], language: str, domain: str, source: str) -> None:
+        """Enregistre (ou compte une nouvelle occurrence de) chaque signature
+
+        Une signature revue après une modification du code source n'est plus
+        considérée instable : l'échec peut désormais venir du nouveau code.
+        """
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executemany(
+                """INSERT INTO signatures (signature, test_id, exception, language, domain, source_hash,
+                                           first_seen, last_seen)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (signature) DO UPDATE SET
+                       occurrences = occurrences + 1,
+                       last_seen = excluded.last_seen,
+                       flaky = CASE WHEN excluded.source_hash != source_hash THEN 0 ELSE flaky END,
+                       source_hash = excluded.source_hash""",
+                [(f['signature'], f['test_id'], f['exception'], language, domain, source, now, now)
+                 for f in failures]
+            )
+
+    def record_suggestion(self, key: str, suggestion: str, source: str) -> None:
+        with self.lock, self.db:
+            self.db.execute(
+                """INSERT INTO suggestions (job_key, suggestion, source_hash, created) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (job_key) DO UPDATE SET
+                       suggestion = excluded.suggestion,
+                       source_hash = excluded.source_hash,
+                       created = excluded.created""",
+                (key, suggestion, source, time.time())
+            )
+
+    def mark_reused(self, key: str) -> None:
+        with self.lock, self.db:
+            self.db.execute('UPDATE suggestions SET reused = reused + 1 WHERE job_key = ?', (key,))
+
+    def failing_signatures(self, test_ids: Iterable[str]) -> List[Dict]:
+        """Signatures non instables déjà enregistrées pour ces tests (recherche par index)"""
+        rows = []
+        test_ids = list(test_ids)
+        with self.lock:
+            # Requêtes par lots : SQLite limite le nombre de paramètres
+            for start in range(0, len(test_ids), 500):
+                batch = test_ids[start:start + 500]
+                rows.extend(dict(row) for row in self.db.execute(
+                    f"SELECT signature, test_id, language, domain, source_hash FROM signatures "
+                    f"WHERE flaky = 0 AND test_id IN ({','.join('?' * len(batch))})",
+                    batch
+                ))
+        return rows
+
+    def mark_flaky(self, signatures: Iterable[str]) -> None:
+        with self.lock, self.db:
+            self.db.executemany('UPDATE signatures SET flaky = 1 WHERE signature = ?',
+                                [(signature,) for signature in signatures])
+
+    def stats(self) -> Dict:
+        with self.lock:
+            row = self.db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(occurrences), 0), COALESCE(SUM(flaky), 0) FROM signatures'
+            ).fetchone()
+            suggestions = self.db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(reused), 0) FROM suggestions'
+            ).fetchone()
+        return {
+            'signatures': row[0],
+            'occurrences': row[1],
+            'flaky': row[2],
+            'suggestions': suggestions[0],
+            'reused': suggestions[1],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Historique des signatures d\'échecs de tests')
+    parser.add_argument('command', choices=['stats'])
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help=f'Base d\'historique (défaut: {DEFAULT_HISTORY})')
+
+    args = parser.parse_args()
+
+    history = FailureHistory(Path(args.history))
+    stats = history.stats()
+    history.close()
+    print(f"Signatures : {stats['signatures']} ({stats['occurrences']} occurrence(s), {stats['flaky']} instable(s))")
+    print(f"Suggestions : {stats['suggestions']} enregistrée(s), {stats['reused']} réutilisation(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Vérificateur rapide des règles métier Python de .semgrep.yml
+
+Évalue en mémoire, avec le module `ast`, les règles métier Python
+(EC-001, BK-001, HC-001) sur src/python/** : un seul parsing par fichier,
+fichiers répartis sur un pool de processus. Produit le même format de
+rapport que parse_semgrep_findings.py, pour un contrôle pre-commit ou CI
+rapide sans démarrer le moteur Semgrep.
+"""
+
+import os
+import ast
+import sys
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from parse_semgrep_findings import SEVERITY_MAP, summarize_findings
+
+
+# Métadonnées reprises de .semgrep.yml (id, niveau SARIF, message, metadata)
+RULES = {
+    "ecommerce-no-negative-price-python": {
+        "level": "error",
+        "message": (
+            "[EC-001] RÈGLE MÉTIER : set_product_price() ne valide pas que le prix est "
+            "non-négatif. Les prix e-commerce ne doivent JAMAIS être négatifs. "
+            "Correction : ajouter `if new_price < 0: raise ValueError(\"Price cannot be negative\")`"
+        ),
+        "metadata": {"business_rule": "EC-001", "domain": "ecommerce", "category": "business-logic"},
+    },
+    "ecommerce-discount-can-return-negative": {
+        "level": "error",
+        "message": (
+            "[EC-001] RÈGLE MÉTIER : calculate_discount() peut retourner un prix négatif "
+            "si la remise dépasse 100%. Correction : utiliser "
+            "`return max(0, original_price - discounted_amount)`"
+        ),
+        "metadata": {"business_rule": "EC-001", "domain": "ecommerce", "category": "business-logic"},
+    },
+    "banking-missing-balance-check-python": {
+        "level": "error",
+        "message": (
+            "[BK-001] RÈGLE MÉTIER : transfer_funds() débite le compte sans vérifier "
+            "le solde disponible. Correction : ajouter "
+            "`if from_account['balance'] < amount: raise ValueError(\"Insufficient balance\")`"
+        ),
+        "metadata": {"business_rule": "BK-001", "domain": "banking", "category": "business-logic"},
+    },
+    "healthcare-missing-dosage-cap-python": {
+        "level": "error",
+        "message": (
+            "[HC-001] RÈGLE MÉTIER CRITIQUE : calculate_dosage() ne plafonne pas la dose "
+            "calculée à la limite maximale sûre. Un patient de 150kg recevrait 4500mg "
+            "de paracétamol au lieu de 4000mg max. "
+            "Correction : `return min(calculated_dose, MAX_DOSES.get(medication, calculated_dose))`"
+        ),
+        "metadata": {"business_rule": "HC-001", "domain": "healthcare", "category": "business-logic"},
+    },
+}
+
+# Sous ce nombre de fichiers, le démarrage du pool coûte plus qu'il ne rapporte
+PARALLEL_THRESHOLD = 16
+
+
+def _is_name(node: ast.AST, name: str) -> bool:
+    return isinstance(node, ast.Name) and node.id == name
+
+
+def _is_zero(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant) and node.value == 0 and not isinstance(node.value, bool)
+
+
+def _params(func: ast.FunctionDef) -> List[str]:
+    return [arg.arg for arg in func.args.args]
+
+
+def _compares(func: ast.FunctionDef, left: Callable, ops: tuple, right: Callable) -> bool:
+    """Vrai si la fonction contient un `if <left> <op> <right>:`"""
+    for node in ast.walk(func):
+        if isinstance(node, ast.If) and isinstance(node.test, ast.Compare):
+            test = node.test
+            if (len(test.ops) == 1 and isinstance(test.ops[0], ops)
+                    and left(test.left) and right(test.comparators[0])):
+                return True
+    return False
+
+
+def _returns(func: ast.FunctionDef, predicate: Callable) -> bool:
+    """Vrai si la fonction contient un `return` dont la valeur vérifie le prédicat"""
+    return any(
+        isinstance(node, ast.Return) and node.value is not None and predicate(node.value)
+        for node in ast.walk(func)
+    )
+
+
+def _check_set_product_price(func: ast.FunctionDef) -> bool:
+    """EC-001 : $PRODUCT[$KEY] = $PRICE sans `if $PRICE < 0` ni `if $PRICE >= 0`"""
+    params = _params(func)
+    if len(params) != 2:
+        return False
+    product, price = params
+    assigns = any(
+        isinstance(node, ast.Assign) and _is_name(node.value, price) and any(
+            isinstance(t, ast.Subscript) and _is_name(t.value, product) for t in node.targets
+        )
+        for node in ast.walk(func)
+    )
+    guarded = _compares(func, lambda n: _is_name(n, price), (ast.Lt, ast.GtE), _is_zero)
+    return assigns and not guarded
+
+
+def _check_calculate_discount(func: ast.FunctionDef) -> bool:
+    """EC-001 : return $PRICE - $X sans return max(0, $PRICE - $X)"""
+    params = _params(func)
+    if len(params) != 2:
+        return False
+    price = params[0]
+
+    def is_sub(node):
+        return isinstance(node, ast.BinOp) and isinstance(node.op, ast.Sub) and _is_name(node.left, price)
+
+    def is_capped(node):
+        return (isinstance(node, ast.Call) and _is_name(node.func, 'max') and len(node.args) == 2
+                and _is_zero(node.args[0]) and is_sub(node.args[1]))
+
+    return _returns(func, is_sub) and not _returns(func, is_capped)
+
+
+def _check_transfer_funds(func: ast.FunctionDef) -> bool:
+    """BK-001 : $FROM[$KEY] -= $AMOUNT sans `if $FROM[$KEY] < $AMOUNT` ni `>=`"""
+    params = _params(func)
+    if len(params) != 3:
+        return False
+    source, _, amount = params
+    debits = any(
+        isinstance(node, ast.AugAssign) and isinstance(node.op, ast.Sub)
+        and isinstance(node.target, ast.Subscript) and _is_name(node.target.value, source)
+        and _is_name(node.value, amount)
+        for node in ast.walk(func)
+    )
+    guarded = _compares(
+        func,
+        lambda n: isinstance(n, ast.Subscript) and _is_name(n.value, source),
+        (ast.Lt, ast.GtE),
+        lambda n: _is_name(n, amount)
+    )
+    return debits and not guarded
+
+
+def _check_calculate_dosage(func: ast.FunctionDef) -> bool:
+    """HC-001 : return $WEIGHT * $DOSE_PER_KG sans return min($WEIGHT * $DOSE_PER_KG, ...)"""
+    params = _params(func)
+    if len(params) != 3:
+        return False
+    weight, dose, _ = params
+
+    def is_product(node):
+        return (isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mult)
+                and _is_name(node.left, weight) and _is_name(node.right, dose))
+
+    def is_capped(node):
+        return (isinstance(node, ast.Call) and _is_name(node.func, 'min')
+                and node.args and is_product(node.args[0]))
+
+    return _returns(func, is_product) and not _returns(func, is_capped)
+
+
+# Nom de fonction → (règle, vérification)
+CHECKS = {
+    "set_product_price": ("ecommerce-no-negative-price-python", _check_set_product_price),
+    "calculate_discount": ("ecommerce-discount-can-return-negative", _check_calculate_discount),
+    "transfer_funds": ("banking-missing-balance-check-python", _check_transfer_funds),
+    "calculate_dosage": ("healthcare-missing-dosage-cap-python", _check_calculate_dosage),
+}
+
+
+def check_file(path: str) -> List[Dict]:
+    """Évalue les règles sur un fichier (un seul parsing)"""
+    try:
+        source = Path(path).read_text(encoding='utf-8')
+        tree = ast.parse(source, filename=path)
+    except (OSError, SyntaxError, UnicodeDecodeError) as e:
+        print(f"Fichier ignoré {path} : {e}", file=sys.stderr)
+        return []
+
+    findings = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.FunctionDef) or node.name not in CHECKS:
+            continue
+        rule_id, check = CHECKS[node.name]
+        if not check(node):
+            continue
+        rule = RULES[rule_id]
+        findings.append({
+            "rule_id": rule_id,
+            "severity": SEVERITY_MAP.get(rule["level"], "INCONNUE"),
+            "message": rule["message"],
+            "file": Path(path).as_posix(),
+            "line": node.lineno,
+            "snippet": ast.get_source_segment(source, node) or "",
+            "metadata": dict(rule["metadata"]),
+        })
+    return findings
+
+
+def collect_files(paths: Iterable[str]) -> List[str]:
+    """Liste les fichiers Python sous les chemins donnés"""
+    files = set()
+    for p in paths:
+        path = Path(p)
+        if path.is_dir():
+            files.update(str(f) for f in path.rglob('*.py'))
+        elif path.suffix == '.py' and path.exists():
+            files.add(str(path))
+    return sorted(files)
+
+
+def check_paths(paths: Iterable[str], workers: Optional[int] = None) -> dict:
+    """Évalue les règles sur tous les fichiers, en parallèle si le volume le justifie"""
+    files = collect_files(paths)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(files) < PARALLEL_THRESHOLD:
+        per_file = [check_file(f) for f in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            per_file = list(pool.map(check_file, files, chunksize=max(1, len(files) // (workers * 4))))
+
+    findings = [f for file_findings in per_file for f in file_findings]
+    findings.sort(key=lambda f: (f["file"], f["line"], f["rule_id"]))
+    return summarize_findings(findings)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Vérification rapide des règles métier Python de .semgrep.yml'
+    )
+    parser.add_argument(
+        'paths',
+        nargs='*',
+        default=['src/python'],
+        help='Fichiers ou répertoires à analyser (défaut: src/python)'
+    )
+    parser.add_argument(
+        '--output',
+        help='Fichier JSON de sortie (même format que parse_semgrep_findings.py)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Nombre de processus (défaut: nombre de CPU)'
+    )
+    parser.add_argument(
+        '--fail-on-findings',
+        action='store_true',
+        help='Code de sortie 1 si des violations sont détectées'
+    )
+
+    args = parser.parse_args()
+
+    data = check_paths(args.paths, workers=args.workers)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print(f"Règles métier : {data['total_findings']} violation(s) détectée(s)")
+    for finding in data["findings"]:
+        print(f"  {finding['file']}:{finding['line']} [{finding['metadata']['business_rule']}] "
+              f"{finding['rule_id']}")
+
+    if args.fail_on_findings and data["total_findings"]:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Scan Semgrep incrémental pour la pipeline CI/CD Secpilot
+
+N'exécute Semgrep que sur les fichiers modifiés par rapport à une référence
+git (et sur les fichiers absents du cache), recharge les résultats des autres
+fichiers depuis un cache indexé par hash du contenu et hash du fichier de
+règles, puis écrit un SARIF fusionné lisible par parse_semgrep_findings.py.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+# Extensions couvertes par les règles de .semgrep.yml
+SCANNED_EXTENSIONS = ('.py', '.js', '.java')
+
+# Nombre maximal de fichiers par invocation de Semgrep
+SCAN_CHUNK_SIZE = 500
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+
+def file_hash(path: Path) -> str:
+    """Calcule le hash SHA-256 du contenu d'un fichier"""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def changed_files(base_ref: str) -> Optional[Set[str]]:
+    """Liste les fichiers modifiés depuis base_ref (None si la référence est inconnue)
+
+    git diff donne des chemins relatifs à la racine du dépôt : ils sont
+    convertis en chemins relatifs au répertoire courant, comme ceux de
+    target_files, pour que le script fonctionne depuis un sous-répertoire.
+    """
+    try:
+        toplevel = subprocess.run(
+            ['git', 'rev-parse', '--show-toplevel'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        output = subprocess.run(
+            ['git', 'diff', '--name-only', '--diff-filter=ACMR', base_ref],
+            capture_output=True, text=True, check=True
+        ).stdout
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        print(f"git diff impossible contre {base_ref} : {e}", file=sys.stderr)
+        return None
+    return {
+        os.path.relpath(os.path.join(toplevel, line.strip()))
+        for line in output.splitlines() if line.strip()
+    }
+
+
+def target_files(targets: List[str]) -> List[str]:
+    """Liste les fichiers suivis par git couverts par les règles (chemins relatifs au répertoire courant)"""
+    output = subprocess.run(
+        ['git', 'ls-files', '--', *targets],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return sorted(
+        line.strip() for line in output.splitlines()
+        if line.strip().endswith(SCANNED_EXTENSIONS) and Path(line.strip()).is_file()
+    )
+
+
+def run_semgrep(files: List[str], rules_path: str, semgrep: str = 'semgrep') -> Dict:
+    """Exécute Semgrep sur une liste de fichiers et retourne le SARIF fusionné"""
+    rules: Dict[str, Dict] = {}
+    results: List[Dict] = []
+
+    for start in range(0, len(files), SCAN_CHUNK_SIZE):
+        chunk = files[start:start + SCAN_CHUNK_SIZE]
+        with tempfile.TemporaryDirectory() as tmp:
+            sarif_path = Path(tmp) / 'chunk.sarif'
+            subprocess.run(
+                [semgrep, 'scan', '--config', rules_path, '--sarif',
+                 '--output', str(sarif_path), '--metrics', 'off', *chunk],
+                check=False
+            )
+            if not sarif_path.exists():
+                raise RuntimeError("Semgrep n'a produit aucun fichier SARIF")
+            sarif = json.loads(sarif_path.read_text(encoding='utf-8'))
+
+        for run in sarif.get("runs", []):
+            for rule in run.get("tool", {}).get("driver", {}).get("rules", []):
+                rules[rule["id"]] = rule
+            results.extend(run.get("results", []))
+
+    return build_sarif(list(rules.values()), results)
+
+
+def build_sarif(rules: List[Dict], results: List[Dict]) -> Dict:
+    """Construit un document SARIF à un seul run"""
+    return {
+        "$schema": SARIF_SCHEMA,
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {"driver": {"name": "Semgrep OSS", "rules": rules}},
+            "results": results,
+        }],
+    }
+
+
+def _result_uri(result: Dict) -> str:
+    """Retourne le chemin du fichier concerné par un résultat SARIF"""
+    locations = result.get("locations") or [{}]
+    uri = locations[0].get("physicalLocation", {}).get("artifactLocation", {}).get("uri", "")
+    return uri[2:] if uri.startswith('./') else uri
+
+
+def _set_result_uri(result: Dict, uri: str) -> Dict:
+    """Retourne une copie du résultat pointant vers `uri`"""
+    result = json.loads(json.dumps(result))
+    for location in result.get("locations", []):
+        location.setdefault("physicalLocation", {}).setdefault("artifactLocation", {})["uri"] = uri
+    return result
+
+
+class ResultCache:
+    """Cache des résultats Semgrep par fichier, indexé par hash du contenu et des règles"""
+
+    def __init__(self, cache_dir: Path, rules_hash: str):
+        self.root = cache_dir / rules_hash
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _entry(self, content_hash: str) -> Path:
+        return self.root / content_hash[:2] / f"{content_hash}.json"
+
+    def get(self, content_hash: str) -> Optional[List[Dict]]:
+        entry = self._entry(content_hash)
+        if not entry.exists():
+            return None
+        try:
+            return json.loads(entry.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, content_hash: str, results: List[Dict]) -> None:
+        entry = self._entry(content_hash)
+        entry.parent.mkdir(exist_ok=True)
+        tmp = entry.with_suffix('.tmp')
+        tmp.write_text(json.dumps(results), encoding='utf-8')
+        tmp.replace(entry)
+
+    def get_rules(self) -> Dict[str, Dict]:
+        rules_file = self.root / 'rules.json'
+        if rules_file.exists():
+            return json.loads(rules_file.read_text(encoding='utf-8'))
+        return {}
+
+    def put_rules(self, rules: Dict[str, Dict]) -> None:
+        (self.root / 'rules.json').write_text(json.dumps(rules), encoding='utf-8')
+
+
+def incremental_scan(
+    files: List[str],
+    changed: Optional[Set[str]],
+    rules_path: str,
+    cache_dir: Path,
+    scanner: Callable[[List[str], str], Dict] = run_semgrep
+) -> Dict:
+    """Scanne les fichiers modifiés ou absents du cache et fusionne avec le cache"""
+
+    rules_hash = file_hash(Path(rules_path))
+    cache = ResultCache(cache_dir, rules_hash)
+    rules = cache.get_rules()
+
+    hashes = {f: file_hash(Path(f)) for f in files}
+    per_file: Dict[str, List[Dict]] = {}
+    to_scan = []
+
+    for f in files:
+        cached = None if changed is None or f in changed else cache.get(hashes[f])
+        if cached is None:
+            to_scan.append(f)
+        else:
+            per_file[f] = [_set_result_uri(r, f) for r in cached]
+
+    if to_scan:
+        sarif = scanner(to_scan, rules_path)
+        scanned: Dict[str, List[Dict]] = {f: [] for f in to_scan}
+        for run in sarif.get("runs", []):
+            for rule in run.get("tool", {}).get("driver", {}).get("rules", []):
+                rules[rule["id"]] = rule
+            for result in run.get("results", []):
+                scanned.setdefault(_result_uri(result), []).append(result)
+        for f, results in scanned.items():
+            if f in hashes:
+                cache.put(hashes[f], results)
+            per_file[f] = results
+        cache.put_rules(rules)
+
+    results = [r for f in sorted(per_file) for r in per_file[f]]
+    merged = build_sarif(list(rules.values()), results)
+    merged["runs"][0]["properties"] = {
+        "scanned_files": len(to_scan),
+        "cached_files": len(files) - len(to_scan),
+    }
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Scan Semgrep incrémental limité aux fichiers modifiés'
+    )
+    parser.add_argument(
+        '--base-ref',
+        default=os.environ.get('SEMGREP_BASE_REF', 'origin/main'),
+        help='Référence git de comparaison (défaut: origin/main)'
+    )
+    parser.add_argument(
+        '--rules',
+        default='.semgrep.yml',
+        help='Fichier de règles Semgrep (défaut: .semgrep.yml)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=os.environ.get('SEMGREP_CACHE_DIR', '.semgrep-cache'),
+        help='Répertoire du cache des résultats (défaut: .semgrep-cache)'
+    )
+    parser.add_argument(
+        '--output',
+        default='semgrep.sarif',
+        help='Fichier SARIF fusionné (défaut: semgrep.sarif)'
+    )
+    parser.add_argument(
+        '--semgrep',
+        default='semgrep',
+        help='Exécutable Semgrep (défaut: semgrep)'
+    )
+    parser.add_argument(
+        'targets',
+        nargs='*',
+        default=['src'],
+        help='Chemins à analyser (défaut: src)'
+    )
+
+    args = parser.parse_args()
+
+    try:
+        files = target_files(args.targets)
+        changed = changed_files(args.base_ref)
+        sarif = incremental_scan(
+            files,
+            changed,
+            args.rules,
+            Path(args.cache_dir),
+            scanner=lambda fs, rules: run_semgrep(fs, rules, args.semgrep)
+        )
+    except Exception as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        sys.exit(1)
+
+    Path(args.output).write_text(json.dumps(sarif, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    stats = sarif["runs"][0]["properties"]
+    print(f"Semgrep : {stats['scanned_files']} fichier(s) scanné(s), "
+          f"{stats['cached_files']} depuis le cache")
+    print(f"SARIF écrit dans : {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Lecture des rapports de tests JUnit XML (pytest, Jest, Maven Surefire)
+
+Parcourt les rapports en streaming avec iterparse en libérant chaque
+<testcase> après traitement, pour une mémoire constante quelle que soit la
+taille du rapport. Produit la même structure que
+LLMFixSuggester.parse_test_output, avec des identifiants de tests, messages
+et tracebacks exacts au lieu d'heuristiques sur le texte.
+"""
+
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List
+
+
+SUITE_TAGS = ('testsuites', 'testsuite')
+
+FAILURE_TAGS = ('failure', 'error')
+
+# Mêmes limites que l'analyse du texte brut
+MAX_FAILED_TESTS = 20
+MAX_ERRORS = 10
+
+# Nombre d'échecs reportés dans la sortie brute reconstituée
+MAX_RAW_FAILURES = 200
+
+# Identifiants de tests réussis conservés (détection des échecs instables) ;
+# les suivants sont seulement comptés
+MAX_PASSED_TESTS = 10000
+
+
+def is_junit_report(path: Path) -> bool:
+    """Vrai si l'élément racine du fichier est <testsuites> ou <testsuite>"""
+    # Fichier ouvert ici : l'itérateur abandonné après le premier élément ne garde
+    # pas de descripteur ouvert jusqu'au passage du ramasse-miettes
+    try:
+        with open(path, 'rb') as source:
+            for _, elem in ET.iterparse(source, events=('start',)):
+                return _local(elem.tag) in SUITE_TAGS
+    except (ET.ParseError, OSError):
+        return False
+    return False
+
+
+def find_junit_reports(folder: Path) -> List[Path]:
+    """Liste les rapports JUnit XML d'un dossier d'artefacts"""
+    return [path for path in sorted(folder.rglob('*.xml')) if is_junit_report(path)]
+
+
+def _local(tag: str) -> str:
+    """Retire un éventuel espace de noms XML"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _test_id(testcase: ET.Element, suite: str) -> str:
+    """Identifiant stable d'un test : <classname ou suite>::<name>"""
+    classname = testcase.get('classname') or suite
+    name = testcase.get('name', '')
+    return f"{classname}::{name}" if classname else name
+
+
+def iter_testcases(path: Path):
+    """Produit (test_id, statut, message, traceback) pour chaque <testcase>
+
+    Le statut vaut 'passed', 'failed', 'error' ou 'skipped'.
+    """
+    stack: List[ET.Element] = []
+    suites: List[str] = []
+
+    with open(path, 'rb') as source:
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            tag = _local(elem.tag)
+
+            if event == 'start':
+                stack.append(elem)
+                if tag == 'testsuite':
+                    suites.append(elem.get('name', ''))
+                continue
+
+            stack.pop()
+            if tag == 'testsuite':
+                suites.pop()
+            if tag != 'testcase':
+                continue
+
+            status, message, traceback = 'passed', '', ''
+            for child in elem:
+                child_tag = _local(child.tag)
+                if child_tag in FAILURE_TAGS:
+                    status = 'failed' if child_tag == 'failure' else 'error'
+                    message = child.get('message', '') or ''
+                    traceback = (child.text or '').strip()
+                    break
+                if child_tag == 'skipped':
+                    status = 'skipped'
+
+            yield _test_id(elem, suites[-1] if suites else ''), status, message, traceback
+
+            # Libère le testcase traité : la mémoire reste constante
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+
+def parse_junit_reports(paths: List[Path]) -> Dict:
+    """Agrège des rapports JUnit XML au format de parse_test_output
+
+    Lève ET.ParseError si un rapport est tronqué ou mal formé.
+    """
+    failed_tests: List[str] = []
+    passed_tests: List[str] = []
+    errors: List[str] = []
+    raw: List[str] = []
+    structured: List[Dict] = []
+    failures = 0
+    passed = 0
+
+    for path in paths:
+        for test_id, status, message, traceback in iter_testcases(path):
+            if status == 'passed':
+                passed += 1
+                if passed <= MAX_PASSED_TESTS:
+                    passed_tests.append(test_id)
+                continue
+            if status == 'skipped':
+                continue
+
+            failures += 1
+            if len(failed_tests) < MAX_FAILED_TESTS:
+                failed_tests.append(f"FAILED {test_id} - {message}".rstrip(' -'))
+            if len(errors) < MAX_ERRORS:
+                errors.append('\n'.join(part for part in (test_id, message, traceback) if part))
+            if failures <= MAX_RAW_FAILURES:
+                raw.append(f"FAILED {test_id}\n{message}\n{traceback}".strip())
+                structured.append({'test_id': test_id, 'message': message, 'traceback': traceback})
+
+    return {
+        'raw_output': '\n\n'.join(raw),
+        'failed_tests': failed_tests,
+        'error_messages': errors,
+        'passed_tests': passed_tests,
+        'total_passed': passed,
+        'failures': structured,
+        'total_failures': failures,
+        'source': 'junit',
+    }
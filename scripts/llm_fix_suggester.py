@@ -7,13 +7,28 @@ Supporte Ollama (local), Anthropic et OpenAI.
 """
 
 import os
+import re
 import sys
 import json
+import time
+import fnmatch
+import hashlib
 import argparse
+import threading
+from collections import deque
+from concurrent.futures import Future, FIRST_COMPLETED, wait
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional
+from xml.etree.ElementTree import ParseError
 from abc import ABC, abstractmethod
 
+import pipeline_metrics
+from context_index import ContextIndex, build_query
+from domain_classifier import DomainClassifier, discover_domains, load_aliases
+from failure_history import FailureHistory, extract_failures, job_key, source_hash
+from junit_reports import find_junit_reports, parse_junit_reports
+from llm_scheduler import LLMScheduler, RateLimiter, PRIORITY_CRITICAL, PRIORITY_NORMAL, estimate_tokens
+
 # Import conditionnel des clients LLM
 try:
     import requests
@@ -22,6 +37,29 @@ except ImportError:
     HAS_REQUESTS = False
 
 
+class CacheablePrompt(str):
+    """Prompt découpé en un préfixe stable et un suffixe variable
+
+    Se comporte comme la chaîne complète (préfixe + suffixe) ; les providers
+    capables de mettre en cache un préfixe utilisent `prefix` et `suffix`.
+    Le préfixe doit rester identique octet pour octet d'un job à l'autre
+    pour que le cache du provider soit réutilisé.
+    """
+
+    def __new__(cls, prefix: str, suffix: str):
+        prompt = super().__new__(cls, prefix + suffix)
+        prompt.prefix = prefix
+        prompt.suffix = suffix
+        return prompt
+
+
+def report_usage(input_tokens: int = 0, cached_tokens: int = 0, cache_write_tokens: int = 0) -> None:
+    """Reporte dans les métriques les tokens d'entrée et de cache annoncés par l'API"""
+    pipeline_metrics.add('provider.input_tokens', input_tokens or 0)
+    pipeline_metrics.add('provider.cached_tokens', cached_tokens or 0)
+    pipeline_metrics.add('provider.cache_write_tokens', cache_write_tokens or 0)
+
+
 class LLMProvider(ABC):
     """Interface abstraite pour les providers LLM"""
 
@@ -34,29 +72,44 @@ class LLMProvider(ABC):
 class OllamaProvider(LLMProvider):
     """Provider pour Ollama (modèles locaux)"""
 
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama2"):
+    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama2", keep_alive: str = "30m"):
         self.base_url = base_url.rstrip('/')
         self.model = model
+        # Le modèle reste chargé entre les jobs : le runner réutilise alors le
+        # cache KV du préfixe commun au lieu de le réévaluer
+        self.keep_alive = keep_alive
+        # Session réutilisée : les connexions HTTP restent ouvertes entre les appels
+        self.session = requests.Session() if HAS_REQUESTS else None
 
     def generate(self, prompt: str) -> str:
         if not HAS_REQUESTS:
             raise ImportError("Le package 'requests' est requis pour Ollama")
 
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/generate",
             json={
                 "model": self.model,
-                "prompt": prompt,
-                "stream": False
+                "prompt": str(prompt),
+                "stream": False,
+                "keep_alive": self.keep_alive
             },
             timeout=120
         )
         response.raise_for_status()
-        return response.json().get("response", "")
+        data = response.json()
+        # Ollama n'annonce pas de tokens en cache : prompt_eval_count ne compte
+        # que les tokens réellement évalués et baisse quand le préfixe est réutilisé
+        if data.get("prompt_eval_count") is not None:
+            report_usage(input_tokens=data["prompt_eval_count"])
+        return data.get("response", "")
 
 
 class AnthropicProvider(LLMProvider):
-    """Provider pour Anthropic API"""
+    """Provider pour Anthropic API
+
+    Un préfixe plus court que la taille minimale du cache de prompt
+    (1024 tokens, 2048 pour les modèles Haiku) n'est pas mis en cache par l'API.
+    """
 
     def __init__(self, api_key: str, model: str = None):
         try:
@@ -66,12 +119,36 @@ class AnthropicProvider(LLMProvider):
         except ImportError:
             raise ImportError("Le package 'anthropic' est requis pour ce provider")
 
+    @property
+    def min_cacheable_tokens(self) -> int:
+        return 2048 if 'haiku' in self.model else ANTHROPIC_MIN_CACHEABLE_TOKENS
+
     def generate(self, prompt: str) -> str:
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=4096,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        prefix = getattr(prompt, 'prefix', '')
+        if prefix:
+            if estimate_tokens(prefix) < self.min_cacheable_tokens:
+                pipeline_metrics.add('provider.prefix_below_cache_minimum')
+            # Préfixe stable en prompt système, marqué pour le cache de prompt
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=4096,
+                system=[{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}],
+                messages=[{"role": "user", "content": prompt.suffix}]
+            )
+        else:
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=4096,
+                messages=[{"role": "user", "content": str(prompt)}]
+            )
+
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            report_usage(
+                input_tokens=getattr(usage, 'input_tokens', 0),
+                cached_tokens=getattr(usage, 'cache_read_input_tokens', 0),
+                cache_write_tokens=getattr(usage, 'cache_creation_input_tokens', 0)
+            )
         return response.content[0].text
 
 
@@ -87,18 +164,42 @@ class OpenAIProvider(LLMProvider):
             raise ImportError("Le package 'openai' est requis pour ce provider")
 
     def generate(self, prompt: str) -> str:
+        # Le cache de prompt OpenAI est automatique sur les préfixes communs
         response = self.client.chat.completions.create(
             model=self.model,
             max_tokens=4096,
-            messages=[{"role": "user", "content": prompt}]
+            messages=[{"role": "user", "content": str(prompt)}]
         )
+
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            details = getattr(usage, 'prompt_tokens_details', None)
+            report_usage(
+                input_tokens=getattr(usage, 'prompt_tokens', 0),
+                cached_tokens=getattr(details, 'cached_tokens', 0) if details is not None else 0
+            )
         return response.choices[0].message.content
 
 
 class MockProvider(LLMProvider):
-    """Provider de test qui retourne une réponse statique"""
+    """Provider de test qui retourne une réponse statique
+
+    Simule le cache de prompt : un préfixe déjà vu (même empreinte) est
+    compté en tokens servis depuis le cache.
+    """
+
+    def __init__(self):
+        self.seen_prefixes = set()
 
     def generate(self, prompt: str) -> str:
+        prefix = getattr(prompt, 'prefix', '')
+        if prefix:
+            digest = hashlib.sha256(prefix.encode('utf-8')).hexdigest()
+            if digest in self.seen_prefixes:
+                report_usage(input_tokens=estimate_tokens(prompt.suffix), cached_tokens=estimate_tokens(prefix))
+            else:
+                self.seen_prefixes.add(digest)
+                report_usage(input_tokens=estimate_tokens(prompt), cache_write_tokens=estimate_tokens(prefix))
         return """## Analyse des échecs de tests
 
 ### Cause racine
@@ -111,15 +212,137 @@ Veuillez corriger les bugs identifiés dans les logs de tests.
 """
 
 
+class LatencyHistogram:
+    """Latences récentes d'un provider (fenêtre glissante) pour estimer un percentile"""
+
+    def __init__(self, window: int = 200, min_samples: int = 10):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Retourne le percentile p (0-1), ou None si l'échantillon est trop petit"""
+        with self.lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class HedgedProvider(LLMProvider):
+    """Provider composite : chaîne de repli avec requêtes couvertes (hedging)
+
+    Le provider principal est interrogé seul ; s'il n'a pas répondu avant son
+    p95 de latence observé, le suivant est lancé en parallèle et la première
+    réponse valide l'emporte. Une erreur déclenche immédiatement le repli.
+    Les appels perdants ne peuvent pas être interrompus : ils se terminent
+    dans des threads démons, que la fin du processus n'attend pas.
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        names: Optional[List[str]] = None,
+        hedge_percentile: float = 0.95,
+        initial_deadline: float = 30.0,
+        min_deadline: float = 1.0,
+        max_deadline: float = 120.0
+    ):
+        if not providers:
+            raise ValueError("Au moins un provider est requis")
+        self.providers = providers
+        self.names = names or [type(p).__name__ for p in providers]
+        self.hedge_percentile = hedge_percentile
+        self.initial_deadline = initial_deadline
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.histograms = {name: LatencyHistogram() for name in self.names}
+
+    def deadline(self, index: int) -> float:
+        """Délai d'attente avant de lancer le provider suivant"""
+        observed = self.histograms[self.names[index]].percentile(self.hedge_percentile)
+        if observed is None:
+            return self.initial_deadline
+        return min(self.max_deadline, max(self.min_deadline, observed))
+
+    def _launch(self, index: int, prompt: str):
+        histogram = self.histograms[self.names[index]]
+        start = time.monotonic()
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def call():
+            try:
+                response = self.providers[index].generate(prompt)
+            except Exception as e:
+                future.set_exception(e)
+                return
+            histogram.record(time.monotonic() - start)
+            future.set_result(response)
+
+        # Pas de ThreadPoolExecutor : ses threads sont attendus à la sortie de l'interpréteur
+        threading.Thread(target=call, daemon=True).start()
+        return future
+
+    def generate(self, prompt: str) -> str:
+        pending = {self._launch(0, prompt): 0}
+        launched = 0
+        errors = []
+
+        while pending:
+            is_last = launched == len(self.providers) - 1
+            done, _ = wait(
+                pending,
+                timeout=None if is_last else self.deadline(launched),
+                return_when=FIRST_COMPLETED
+            )
+
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    errors.append(f"{self.names[index]} : {e}")
+                    continue
+                if response:
+                    return response
+                errors.append(f"{self.names[index]} : réponse vide")
+
+            # Délai dépassé ou échec : on lance le provider suivant
+            if not is_last and (not done or not pending):
+                launched += 1
+                pending[self._launch(launched, prompt)] = launched
+
+        raise RuntimeError("Aucun provider n'a répondu : " + " ; ".join(errors))
+
+
 def get_provider(provider_name: str) -> LLMProvider:
-    """Factory pour créer le provider LLM approprié"""
+    """Factory pour créer le provider LLM approprié
+
+    Une liste séparée par des virgules (ex. `ollama,anthropic,mock`) crée une
+    chaîne de repli avec requêtes couvertes (HedgedProvider), dont chaque
+    provider a ses propres limites de débit et réessais sur 429 (RateLimiter).
+    """
 
     provider_name = provider_name.lower()
 
+    if ',' in provider_name:
+        names = [name.strip() for name in provider_name.split(',') if name.strip()]
+        return HedgedProvider(
+            [RateLimiter.from_env(get_provider(name)) for name in names],
+            names=names,
+            initial_deadline=float(os.environ.get('LLM_HEDGE_DEADLINE', '30'))
+        )
+
     if provider_name == "ollama":
         base_url = os.environ.get("OLLAMA_URL", "http://localhost:11434")
         model = os.environ.get("OLLAMA_MODEL", "llama2")
-        return OllamaProvider(base_url=base_url, model=model)
+        keep_alive = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+        return OllamaProvider(base_url=base_url, model=model, keep_alive=keep_alive)
 
     elif provider_name == "anthropic":
         api_key = os.environ.get("LLM_API_KEY") or os.environ.get("ANTHROPIC_API_KEY")
@@ -140,11 +363,65 @@ def get_provider(provider_name: str) -> LLMProvider:
         raise ValueError(f"Provider inconnu : {provider_name}")
 
 
+# Extension des fichiers source de chaque langage
+SOURCE_EXTENSIONS = {
+    'python': '.py',
+    'javascript': '.js',
+    'java': '.java'
+}
+
+# Taille minimale d'un préfixe mis en cache par l'API Anthropic (Sonnet, Opus)
+ANTHROPIC_MIN_CACHEABLE_TOKENS = 1024
+
+# Instructions communes à tous les prompts : début du préfixe mis en cache
+PROMPT_INSTRUCTIONS = """Tu es un assistant de revue de code aidant à corriger des bugs dans une pipeline CI/CD.
+
+## Tâche
+Analyse les échecs de tests décrits ci-dessous et fournis :
+
+1. **Analyse de la cause racine** : Identifie pourquoi chaque test échoue
+2. **Classification du bug** : Est-ce un bug classique (syntaxe, logique, erreur courante) ou contextuel (nécessite la connaissance du domaine métier) ?
+3. **Correction suggérée** : Fournis le code corrigé avec explications
+4. **Conseils de prévention** : Comment éviter ce type de bug à l'avenir
+
+Formate ta réponse en Markdown avec des sections claires et des blocs de code.
+"""
+
+# Marqueurs d'un échec de règle métier dans la sortie des tests, en plus des
+# identifiants de règles des domaines connus (DomainClassifier.cites_rule)
+BUSINESS_RULE_RE = re.compile(r'RÈGLE MÉTIER|business_rule')
+
+
+def domain_source_files(src_dir: Path, paths: Iterable[Path], language: str, domain: str) -> List[Path]:
+    """Fichiers source d'un domaine, triés : sous un répertoire <domaine> ou nommés d'après le domaine"""
+    extension = SOURCE_EXTENSIONS.get(language, '')
+    files = []
+    for path in paths:
+        if not path.name.endswith(extension) or not path.is_file():
+            continue
+        directories = path.relative_to(src_dir).parts[:-1]
+        if domain in directories or fnmatch.fnmatchcase(path.name, f'*{domain}*'):
+            files.append(path)
+    return sorted(files)
+
+
 class LLMFixSuggester:
     """Analyse les échecs de tests et génère des suggestions de correction"""
 
-    def __init__(self, provider: LLMProvider):
+    def __init__(
+        self,
+        provider: LLMProvider,
+        scheduler: Optional[LLMScheduler] = None,
+        context_index: Optional[ContextIndex] = None,
+        domain_aliases: Optional[Dict[str, List[str]]] = None,
+        history: Optional[FailureHistory] = None
+    ):
         self.provider = provider
+        self.scheduler = scheduler
+        self.context_index = context_index
+        self.domain_aliases = domain_aliases
+        self.history = history
+        self.classifier: Optional[DomainClassifier] = None
 
     def load_context(self, contexts_dir: Path) -> Dict[str, str]:
         """Charge tous les documents de contexte métier"""
@@ -155,21 +432,28 @@ class LLMFixSuggester:
                 contexts[domain] = context_file.read_text(encoding='utf-8')
         return contexts
 
+    def source_files(self, src_dir: Path, language: str, domain: str) -> List[Path]:
+        """Fichiers source du domaine pour ce langage (src/<langage>/.../<domaine>/...)"""
+        return domain_source_files(src_dir, src_dir.rglob('*'), language, domain)
+
+    def read_source(self, path: Path) -> str:
+        return path.read_text(encoding='utf-8')
+
     def load_source_code(self, src_dir: Path, language: str, domain: str) -> str:
-        """Charge le code source pertinent pour l'analyse"""
-        extensions = {
-            'python': '.py',
-            'javascript': '.js',
-            'java': '.java'
-        }
-        ext = extensions.get(language, '')
+        """Charge le code source pertinent pour l'analyse
 
-        for src_file in src_dir.rglob(f'*{domain}*{ext}'):
+        Tous les fichiers du domaine, dans l'ordre de leur chemin : leur hash
+        change dès qu'un fichier du domaine est modifié, ajouté ou supprimé.
+        """
+        sources = []
+        for src_file in self.source_files(src_dir, language, domain):
             try:
-                return src_file.read_text(encoding='utf-8')
+                content = self.read_source(src_file)
             except Exception:
                 continue
-        return ""
+            if content.strip():
+                sources.append(content)
+        return '\n\n'.join(sources)
 
     def parse_test_output(self, test_output: str) -> Dict:
         """Parse la sortie des tests pour extraire les informations d'échec"""
@@ -217,12 +501,30 @@ class LLMFixSuggester:
         language: str
     ) -> str:
         """Génère une suggestion de correction avec le LLM"""
+        prompt = self.build_prompt(test_failure, source_code, context, language)
+        return self.provider.generate(prompt)
 
-        prompt = f"""Tu es un assistant de revue de code aidant à corriger des bugs dans une pipeline CI/CD.
-
+    def build_prompt(
+        self,
+        test_failure: Dict,
+        source_code: str,
+        context: str,
+        language: str,
+        stable_context: bool = True
+    ) -> CacheablePrompt:
+        """Construit le prompt d'analyse d'un échec de tests
+
+        Le préfixe (instructions, puis contexte métier s'il est le même pour
+        tous les jobs du domaine) précède les parties variables : code source
+        et sortie des tests. Un contexte extrait de l'index dépend de l'échec
+        (`stable_context=False`) et passe dans le suffixe.
+        """
+
+        context_block = f"""
 ## Contexte métier
 {context[:2000]}
-
+"""
+        variable = f"""
 ## Code source ({language})
 ```{language}
 {source_code[:3000]}
@@ -235,78 +537,294 @@ class LLMFixSuggester:
 
 ## Tests échoués
 {chr(10).join(test_failure['failed_tests'][:10])}
+"""
+        if stable_context:
+            return CacheablePrompt(PROMPT_INSTRUCTIONS + context_block, variable)
+        return CacheablePrompt(PROMPT_INSTRUCTIONS, context_block + variable)
 
-## Tâche
-Analyse les échecs de tests et fournis :
+    def process_artifacts(
+        self,
+        artifacts_dir: Path,
+        contexts_dir: Path,
+        src_dir: Path,
+        on_job: Optional[Callable[[Dict], None]] = None
+    ) -> str:
+        """Traite tous les artefacts de test et génère les suggestions
 
-1. **Analyse de la cause racine** : Identifie pourquoi chaque test échoue
-2. **Classification du bug** : Est-ce un bug classique (syntaxe, logique, erreur courante) ou contextuel (nécessite la connaissance du domaine métier) ?
-3. **Correction suggérée** : Fournis le code corrigé avec explications
-4. **Conseils de prévention** : Comment éviter ce type de bug à l'avenir
+        `on_job(job)` est appelé dès qu'un job est terminé (voir run_jobs).
+        """
 
-Formate ta réponse en Markdown avec des sections claires et des blocs de code.
-"""
+        with pipeline_metrics.span('process_artifacts'):
+            contexts = self.prepare_contexts(contexts_dir)
 
-        return self.provider.generate(prompt)
+            entries = self.collect_jobs(artifacts_dir, contexts, src_dir)
+            self.run_jobs([job for entry in entries for job in entry['jobs']], on_job=on_job)
 
-    def process_artifacts(
+            with pipeline_metrics.span('render_suggestions'):
+                return self.render_suggestions(entries)
+
+    def prepare_contexts(self, contexts_dir: Path) -> Dict[str, str]:
+        """Charge les contextes, ou met à jour l'index de recherche s'il est configuré"""
+
+        self.classifier = DomainClassifier(discover_domains(contexts_dir), self.domain_aliases)
+
+        if self.context_index:
+            with pipeline_metrics.span('context_index.update') as span:
+                span.set(reindexed=self.context_index.update(contexts_dir))
+            return {}
+
+        with pipeline_metrics.span('load_context') as span:
+            contexts = self.load_context(contexts_dir)
+            span.set(documents=len(contexts))
+        return contexts
+
+    def domain_context(self, domain: str, contexts: Dict[str, str], test_failure: Dict) -> str:
+        """Contexte métier du prompt : sections pertinentes de l'index, sinon le document du domaine"""
+
+        if self.context_index:
+            with pipeline_metrics.span('context_index.search', domain=domain):
+                retrieved = self.context_index.context_for(domain, build_query(test_failure))
+            # Aucune section pertinente : début des documents du domaine, comme sans index
+            retrieved = retrieved or self.context_index.leading_context(domain)
+            if retrieved:
+                return retrieved
+        return contexts.get(domain, "Aucun contexte disponible")
+
+    def collect_jobs(
         self,
         artifacts_dir: Path,
-        contexts_dir: Path,
+        contexts: Dict[str, str],
         src_dir: Path
-    ) -> str:
-        """Traite tous les artefacts de test et génère les suggestions"""
+    ) -> List[Dict]:
+        """Parcourt les artefacts et prépare, par langage, les analyses LLM à effectuer"""
 
-        contexts = self.load_context(contexts_dir)
-        suggestions = ["# Suggestions de correction LLM\n"]
-        suggestions.append("Généré par la pipeline CI/CD Secpilot\n\n")
+        entries = []
 
         # Parcourt les résultats de tests de chaque langage
-        for artifact_folder in artifacts_dir.iterdir():
+        for artifact_folder in sorted(artifacts_dir.iterdir()):
             if not artifact_folder.is_dir():
                 continue
+            entry = self.collect_artifact(artifact_folder, contexts, src_dir)
+            if entry is not None:
+                entries.append(entry)
 
-            language = self._detect_language(artifact_folder.name)
-            if not language:
-                continue
+        return entries
 
-            test_output_file = artifact_folder / 'test-output.txt'
-            if not test_output_file.exists():
-                continue
+    def collect_artifact(
+        self,
+        artifact_folder: Path,
+        contexts: Dict[str, str],
+        src_dir: Path
+    ) -> Optional[Dict]:
+        """Prépare les analyses LLM d'un dossier d'artefact ; None s'il ne contient pas de résultats"""
 
-            suggestions.append(f"## Échecs de tests {language.title()}\n\n")
+        language = self._detect_language(artifact_folder.name)
+        if not language:
+            return None
 
+        entry = {'artifact': artifact_folder.name, 'language': language, 'notice': None, 'jobs': []}
+
+        try:
+            test_failure = self.load_test_failure(artifact_folder, language)
+        except Exception as e:
+            entry['notice'] = f"Erreur de lecture du fichier : {e}\n\n"
+            return entry
+
+        if test_failure is None:
+            return None
+
+        test_output = test_failure['raw_output']
+
+        if self.history and test_failure.get('passed_tests'):
+            self.detect_flaky(test_failure['passed_tests'], src_dir)
+
+        if not test_failure['failed_tests']:
+            entry['notice'] = "Aucun échec détecté.\n\n"
+            return entry
+
+        # Domaines cités dans la sortie (noms, alias, préfixes de règles), du plus cité au moins cité
+        classifier = self.classifier or DomainClassifier(contexts, self.domain_aliases)
+
+        # Les échecs de règles métier passent en premier
+        business_rule = BUSINESS_RULE_RE.search(test_output) or classifier.cites_rule(test_output)
+        priority = PRIORITY_CRITICAL if business_rule else PRIORITY_NORMAL
+        with pipeline_metrics.span('classify_domains', language=language) as span:
+            domains = classifier.rank(test_output)
+            span.set(domains=len(domains))
+
+        for domain in domains:
+            with pipeline_metrics.span('load_source_code', language=language, domain=domain):
+                source_code = self.load_source_code(src_dir, language, domain)
+            entry['jobs'].append({
+                'domain': domain,
+                'language': language,
+                'priority': priority,
+                'test_failure': test_failure,
+                'source_code': source_code,
+                'context': self.domain_context(domain, contexts, test_failure),
+                # Les sections extraites de l'index varient d'un échec à l'autre
+                'stable_context': self.context_index is None,
+            })
+
+        return entry
+
+    def load_test_failure(self, artifact_folder: Path, language: str) -> Optional[Dict]:
+        """Lit les résultats de tests d'un artefact
+
+        Les rapports JUnit XML sont préférés ; test-output.txt n'est analysé
+        qu'en leur absence, ou si un rapport est tronqué ou mal formé. Retourne
+        None si l'artefact ne contient ni l'un ni l'autre.
+        """
+        test_output_file = artifact_folder / 'test-output.txt'
+        reports = find_junit_reports(artifact_folder)
+        if reports:
             try:
-                test_output = test_output_file.read_text(encoding='utf-8')
-            except Exception as e:
-                suggestions.append(f"Erreur de lecture du fichier : {e}\n\n")
+                with pipeline_metrics.span('parse_junit_reports', language=language, files=len(reports)):
+                    return parse_junit_reports(reports)
+            except ParseError:
+                if not test_output_file.exists():
+                    raise
+                pipeline_metrics.add('junit.parse_error')
+
+        if not test_output_file.exists():
+            return None
+
+        test_output = test_output_file.read_text(encoding='utf-8')
+        with pipeline_metrics.span('parse_test_output', language=language, bytes=len(test_output)):
+            return self.parse_test_output(test_output)
+
+    def detect_flaky(self, passed_tests: List[str], src_dir: Path) -> None:
+        """Marque instables les échecs connus de tests désormais réussis sans modification du code"""
+        with pipeline_metrics.span('failure_history.passes', tests=len(passed_tests)) as span:
+            hashes: Dict[tuple, str] = {}
+            flaky = []
+            for row in self.history.failing_signatures(passed_tests):
+                key = (row['language'], row['domain'])
+                if key not in hashes:
+                    hashes[key] = source_hash(self.load_source_code(src_dir, row['language'], row['domain']))
+                if hashes[key] == row['source_hash']:
+                    flaky.append(row['signature'])
+            self.history.mark_flaky(flaky)
+            span.set(flaky=len(flaky))
+
+    def apply_history(self, jobs: List[Dict], on_job: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Complète les jobs dont la signature d'échec est connue ; retourne ceux à analyser
+
+        Un échec instable n'est pas analysé ; un ensemble de signatures déjà
+        analysé sur le même code source reprend la suggestion enregistrée.
+        """
+        pending = []
+        for job in jobs:
+            failures = extract_failures(job['test_failure'])
+            if not failures:
+                pending.append(job)
                 continue
 
-            test_failure = self.parse_test_output(test_output)
+            job['history_key'] = job_key(job['language'], job['domain'], failures)
+            job['source_hash'] = source_hash(job['source_code'])
+            self.history.record_failures(failures, job['language'], job['domain'], job['source_hash'])
+
+            if self.history.flaky(f['signature'] for f in failures):
+                job['history'] = 'flaky'
+                job['suggestion'] = ("*Échec instable : il a déjà disparu sans modification du code, "
+                                     "analyse LLM ignorée.*")
+            else:
+                previous = self.history.suggestion(job['history_key'])
+                if previous is None or previous['source_hash'] != job['source_hash']:
+                    pending.append(job)
+                    continue
+                self.history.mark_reused(job['history_key'])
+                job['history'] = 'reused'
+                job['suggestion'] = ("*Signature d'échec déjà analysée : suggestion reprise de "
+                                     "l'historique.*\n\n" + previous['suggestion'])
+
+            pipeline_metrics.add(f"history.{job['history']}")
+            if on_job:
+                on_job(job)
+
+        pipeline_metrics.add('history.new', len(pending))
+        return pending
+
+    def run_jobs(self, jobs: List[Dict], on_job: Optional[Callable[[Dict], None]] = None) -> None:
+        """Exécute les analyses LLM et stocke la suggestion ou l'erreur dans chaque job
+
+        `on_job(job)` est appelé dès qu'un job est terminé. Avec un historique,
+        seuls les jobs dont la signature d'échec est nouvelle sont envoyés au LLM.
+        """
+
+        if self.history:
+            with pipeline_metrics.span('failure_history.lookup', jobs=len(jobs)) as span:
+                jobs = self.apply_history(jobs, on_job)
+                span.set(pending=len(jobs))
+
+        def store(index, outcome):
+            job = jobs[index]
+            if isinstance(outcome, Exception):
+                job['error'] = outcome
+            else:
+                job['suggestion'] = outcome
+                if self.history and 'history_key' in job:
+                    self.history.record_suggestion(job['history_key'], outcome, job['source_hash'])
+            if on_job:
+                on_job(job)
+
+        with pipeline_metrics.span('build_prompt', jobs=len(jobs)):
+            prompts = [
+                self.build_prompt(
+                    job['test_failure'], job['source_code'], job['context'], job['language'],
+                    stable_context=job.get('stable_context', True)
+                )
+                for job in jobs
+            ]
+
+        if self.scheduler:
+            self.scheduler.run(list(zip((job['priority'] for job in jobs), prompts)), on_result=store)
+        else:
+            for index, prompt in enumerate(prompts):
+                try:
+                    with pipeline_metrics.span(
+                        'provider.generate',
+                        provider=type(self.provider).__name__,
+                        prompt_chars=len(prompt),
+                        estimated_tokens=estimate_tokens(prompt)
+                    ) as span:
+                        response = self.provider.generate(prompt)
+                        span.set(response_chars=len(response), retries=0)
+                    pipeline_metrics.add('provider.prompt_chars', len(prompt))
+                    pipeline_metrics.add('provider.estimated_tokens', estimate_tokens(prompt))
+                    pipeline_metrics.add('provider.response_chars', len(response))
+                    store(index, response)
+                except Exception as e:
+                    store(index, e)
+
+    @staticmethod
+    def render_suggestions(entries: List[Dict]) -> str:
+        """Assemble le rapport Markdown à partir des analyses effectuées
+
+        Quand les artefacts viennent de plusieurs producteurs (file de travail
+        partagée), le producteur est indiqué dans le titre de chaque artefact.
+        """
+
+        suggestions = ["# Suggestions de correction LLM\n"]
+        suggestions.append("Généré par la pipeline CI/CD Secpilot\n\n")
+        several_producers = len({entry.get('producer') for entry in entries}) > 1
+
+        for entry in entries:
+            origin = f" ({entry['producer']})" if several_producers else ""
+            suggestions.append(f"## Échecs de tests {entry['language'].title()}{origin}\n\n")
 
-            if not test_failure['failed_tests']:
-                suggestions.append("Aucun échec détecté.\n\n")
+            if entry['notice']:
+                suggestions.append(entry['notice'])
                 continue
 
-            # Détermine le domaine à partir des noms de fichiers de test
-            for domain in ['ecommerce', 'banking', 'healthcare']:
-                if domain in test_output.lower():
-                    source_code = self.load_source_code(src_dir, language, domain)
-                    context = contexts.get(domain, "Aucun contexte disponible")
-
-                    try:
-                        fix = self.generate_fix_suggestion(
-                            test_failure,
-                            source_code,
-                            context,
-                            language
-                        )
-
-                        suggestions.append(f"### Domaine {domain.title()}\n\n")
-                        suggestions.append(fix)
-                        suggestions.append("\n\n---\n\n")
-                    except Exception as e:
-                        suggestions.append(f"Erreur de génération LLM : {e}\n\n")
+            for job in entry['jobs']:
+                if 'error' in job:
+                    suggestions.append(f"Erreur de génération LLM : {job['error']}\n\n")
+                    continue
+
+                suggestions.append(f"### Domaine {job['domain'].title()}\n\n")
+                suggestions.append(job['suggestion'])
+                suggestions.append("\n\n---\n\n")
 
         return ''.join(suggestions)
 
@@ -322,52 +840,106 @@ Formate ta réponse en Markdown avec des sections claires et des blocs de code.
         return None
 
 
-def main():
+def build_arg_parser(require_paths: bool = True) -> argparse.ArgumentParser:
+    """Construit le parser des arguments de la ligne de commande
+
+    `require_paths=False` rend les répertoires et le fichier de sortie
+    facultatifs, pour les commandes qui n'en utilisent qu'une partie.
+    """
     parser = argparse.ArgumentParser(
         description='Génère des suggestions de correction LLM pour les échecs de tests'
     )
     parser.add_argument(
         '--artifacts-dir',
-        required=True,
+        required=require_paths,
         help='Répertoire contenant les artefacts de test'
     )
     parser.add_argument(
         '--contexts-dir',
-        required=True,
+        required=require_paths,
         help='Répertoire contenant les documents de contexte'
     )
     parser.add_argument(
         '--src-dir',
-        required=True,
+        required=require_paths,
         help='Répertoire contenant le code source'
     )
     parser.add_argument(
         '--output-file',
-        required=True,
+        required=require_paths,
         help='Fichier de sortie pour les suggestions'
     )
+    parser.add_argument(
+        '--context-index',
+        default=os.environ.get('CONTEXT_INDEX'),
+        help='Index de recherche des contextes (créé ou mis à jour si besoin) ; '
+             'sans index, le document complet du domaine est utilisé'
+    )
+    parser.add_argument(
+        '--domain-aliases',
+        default=os.environ.get('DOMAIN_ALIASES'),
+        help='Fichier JSON d\'alias supplémentaires par domaine ({"banking": ["virement", "BK-"]})'
+    )
+    parser.add_argument(
+        '--history',
+        default=os.environ.get('FAILURE_HISTORY'),
+        help='Historique SQLite des signatures d\'échecs : les échecs déjà analysés '
+             'ou instables ne sont pas renvoyés au LLM'
+    )
+    parser.add_argument(
+        '--metrics-out',
+        action='append',
+        default=[],
+        help='Fichier de métriques par phase (.prom → Prometheus, sinon JSON) ; répétable'
+    )
     parser.add_argument(
         '--provider',
         default=os.environ.get('LLM_PROVIDER', 'mock'),
-        choices=['ollama', 'anthropic', 'openai', 'mock'],
-        help='Provider LLM à utiliser (défaut: mock)'
+        help='Provider LLM à utiliser : ollama, anthropic, openai, mock, '
+             'ou une chaîne de repli comme ollama,anthropic,mock (défaut: mock)'
+    )
+    return parser
+
+
+def build_suggester(args: argparse.Namespace) -> LLMFixSuggester:
+    """Construit le suggester (provider, planificateur, index, alias, historique) décrit par les arguments"""
+    provider = get_provider(args.provider)
+    return LLMFixSuggester(
+        provider,
+        scheduler=LLMScheduler.from_env(provider),
+        context_index=ContextIndex(Path(args.context_index)) if args.context_index else None,
+        domain_aliases=load_aliases(Path(args.domain_aliases) if args.domain_aliases else None),
+        history=FailureHistory(Path(args.history)) if args.history else None
     )
 
-    args = parser.parse_args()
 
-    try:
-        provider = get_provider(args.provider)
-        suggester = LLMFixSuggester(provider)
+def run(args: argparse.Namespace) -> None:
+    """Exécute une analyse complète à partir des arguments de la ligne de commande"""
 
-        suggestions = suggester.process_artifacts(
-            Path(args.artifacts_dir),
-            Path(args.contexts_dir),
-            Path(args.src_dir)
-        )
+    if args.metrics_out:
+        pipeline_metrics.enable()
 
-        Path(args.output_file).write_text(suggestions, encoding='utf-8')
-        print(f"Suggestions écrites dans {args.output_file}")
+    suggester = build_suggester(args)
 
+    suggestions = suggester.process_artifacts(
+        Path(args.artifacts_dir),
+        Path(args.contexts_dir),
+        Path(args.src_dir)
+    )
+
+    Path(args.output_file).write_text(suggestions, encoding='utf-8')
+    print(f"Suggestions écrites dans {args.output_file}")
+
+    if args.metrics_out:
+        pipeline_metrics.registry().write(args.metrics_out)
+        print(f"Métriques écrites dans {', '.join(args.metrics_out)}")
+
+
+def main():
+    args = build_arg_parser().parse_args()
+
+    try:
+        run(args)
     except Exception as e:
         print(f"Erreur : {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Ordonnanceur des appels LLM pour la pipeline CI/CD Secpilot
+
+Limite le débit des appels par provider et par modèle (seaux à jetons sur
+les requêtes et les tokens par minute), réessaie les erreurs 429 avec un
+backoff exponentiel aléatoire qui respecte Retry-After, et traite les
+requêtes par ordre de priorité (règles métier d'abord).
+"""
+
+import os
+import time
+import heapq
+import random
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import pipeline_metrics
+
+# Priorités : plus petit = traité en premier
+PRIORITY_CRITICAL = 0
+PRIORITY_NORMAL = 10
+
+# Codes HTTP signalant une surcharge temporaire
+RETRYABLE_STATUS = {429, 503, 529}
+
+# Estimation grossière : ~4 caractères par token
+CHARS_PER_TOKEN = 4
+
+
+class RateLimitError(Exception):
+    """Erreur de limitation de débit (429), avec délai Retry-After optionnel"""
+
+    status_code = 429
+
+    def __init__(self, message: str = "Rate limit exceeded", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(text: str) -> int:
+    """Estime le nombre de tokens d'un texte"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def rate_limit_retry_after(exc: Exception) -> Tuple[bool, Optional[float]]:
+    """Indique si l'erreur est une limitation de débit et extrait Retry-After"""
+    if isinstance(exc, RateLimitError):
+        return True, exc.retry_after
+
+    # anthropic/openai exposent status_code, requests l'expose sur la réponse
+    response = getattr(exc, 'response', None)
+    status = getattr(exc, 'status_code', None) or getattr(response, 'status_code', None)
+    if status not in RETRYABLE_STATUS:
+        return False, None
+
+    headers = getattr(response, 'headers', None) or {}
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    try:
+        return True, float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return True, None
+
+
+class TokenBucket:
+    """Seau à jetons thread-safe, rechargé en continu à `rate_per_minute`"""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1) -> None:
+        """Bloque jusqu'à ce que `amount` jetons soient disponibles, puis les consomme"""
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            self.sleep(wait)
+
+    def consume(self, amount: float) -> None:
+        """Consomme des jetons a posteriori (le solde peut devenir négatif)"""
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+
+
+# Seaux partagés par (provider, modèle, type de limite) au sein du processus
+_BUCKETS: Dict[Tuple[str, str, str], TokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def get_bucket(key: Tuple[str, str, str], rate_per_minute: float, **kwargs) -> TokenBucket:
+    """Retourne le seau partagé pour une clé, en le créant si besoin"""
+    with _BUCKETS_LOCK:
+        if key not in _BUCKETS:
+            _BUCKETS[key] = TokenBucket(rate_per_minute, **kwargs)
+        return _BUCKETS[key]
+
+
+class RateLimiter:
+    """Appels à un provider dans ses limites de débit, avec réessais sur 429
+
+    Les seaux sont partagés par (provider, modèle) au sein du processus.
+    """
+
+    def __init__(
+        self,
+        provider,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.provider = provider
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.retries = 0
+
+        key = (type(provider).__name__, str(getattr(provider, 'model', '')))
+        self.request_bucket = (
+            get_bucket(key + ('requests',), requests_per_minute, clock=clock, sleep=sleep)
+            if requests_per_minute else None
+        )
+        self.token_bucket = (
+            get_bucket(key + ('tokens',), tokens_per_minute, clock=clock, sleep=sleep)
+            if tokens_per_minute else None
+        )
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Délai avant la prochaine tentative (backoff exponentiel avec gigue)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = random.uniform(ceiling / 2, ceiling)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def generate(self, prompt: str) -> str:
+        """Appelle le provider en respectant les limites, avec réessais sur 429"""
+        prompt_tokens = estimate_tokens(prompt)
+
+        with pipeline_metrics.span(
+            'provider.generate',
+            provider=type(self.provider).__name__,
+            prompt_chars=len(prompt),
+            estimated_tokens=prompt_tokens
+        ) as span:
+            for attempt in range(self.max_retries + 1):
+                if self.request_bucket:
+                    self.request_bucket.acquire(1)
+                if self.token_bucket:
+                    self.token_bucket.acquire(prompt_tokens)
+
+                try:
+                    response = self.provider.generate(prompt)
+                except Exception as e:
+                    limited, retry_after = rate_limit_retry_after(e)
+                    if not limited or attempt == self.max_retries:
+                        span.set(retries=attempt)
+                        raise
+                    self.retries += 1
+                    pipeline_metrics.add('provider.retries')
+                    self.sleep(self._backoff(attempt, retry_after))
+                    continue
+
+                if self.token_bucket:
+                    self.token_bucket.consume(estimate_tokens(response))
+                span.set(response_chars=len(response), retries=attempt)
+                pipeline_metrics.add('provider.prompt_chars', len(prompt))
+                pipeline_metrics.add('provider.estimated_tokens', prompt_tokens)
+                pipeline_metrics.add('provider.response_chars', len(response))
+                return response
+
+        raise RuntimeError("Nombre maximal de tentatives atteint")  # pragma: no cover
+
+    @classmethod
+    def from_env(cls, provider) -> 'RateLimiter':
+        """Limiteur configuré par LLM_RPM, LLM_TPM et LLM_MAX_RETRIES"""
+        return cls(provider, **limits_from_env())
+
+
+def limits_from_env() -> Dict:
+    """Limites de débit et réessais lus dans LLM_RPM, LLM_TPM et LLM_MAX_RETRIES"""
+    def number(name: str) -> Optional[float]:
+        value = os.environ.get(name)
+        return float(value) if value else None
+
+    return {
+        'requests_per_minute': number('LLM_RPM'),
+        'tokens_per_minute': number('LLM_TPM'),
+        'max_retries': int(os.environ.get('LLM_MAX_RETRIES', '5')),
+    }
+
+
+def rate_limiters(provider) -> List[RateLimiter]:
+    """Limiteurs déjà appliqués à un provider ou à chacun des providers d'une chaîne"""
+    if isinstance(provider, RateLimiter):
+        return [provider]
+    children = getattr(provider, 'providers', None) or []
+    limiters = [child for child in children if isinstance(child, RateLimiter)]
+    return limiters if limiters and len(limiters) == len(children) else []
+
+
+class LLMScheduler:
+    """Exécute les appels à un provider en respectant ses limites de débit
+
+    Un provider déjà limité (RateLimiter, ou chaîne de repli dont chaque
+    provider est un RateLimiter, comme celle de get_provider) est utilisé tel
+    quel : chaque provider de la chaîne garde ses seaux par modèle, et un 429
+    est réessayé avant de passer au suivant. Sinon, le provider est enveloppé
+    dans un RateLimiter propre à l'ordonnanceur ; il n'est jamais modifié.
+    """
+
+    def __init__(
+        self,
+        provider,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        concurrency: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.provider = provider
+        self.concurrency = max(1, concurrency)
+
+        self.limiters = rate_limiters(provider)
+        if self.limiters:
+            self.target = provider
+        else:
+            self.target = RateLimiter(
+                provider,
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute,
+                max_retries=max_retries,
+                base_delay=base_delay,
+                max_delay=max_delay,
+                clock=clock,
+                sleep=sleep
+            )
+            self.limiters = [self.target]
+
+    @property
+    def retries(self) -> int:
+        return sum(limiter.retries for limiter in self.limiters)
+
+    @classmethod
+    def from_env(cls, provider) -> 'LLMScheduler':
+        """Crée un ordonnanceur configuré par LLM_RPM, LLM_TPM, LLM_MAX_RETRIES et LLM_CONCURRENCY"""
+        return cls(provider, concurrency=int(os.environ.get('LLM_CONCURRENCY', '1')), **limits_from_env())
+
+    def generate(self, prompt: str) -> str:
+        """Appelle le provider (ou la chaîne) en respectant les limites, avec réessais sur 429"""
+        return self.target.generate(prompt)
+
+    def run(
+        self,
+        jobs: List[Tuple[int, str]],
+        on_result: Optional[Callable[[int, Union[str, Exception]], None]] = None
+    ) -> List[Union[str, Exception]]:
+        """Exécute des prompts (priorité, prompt) par ordre de priorité
+
+        Retourne, dans l'ordre des jobs, la réponse ou l'exception levée.
+        `on_result(index, résultat)` est appelé dès qu'un job se termine.
+        """
+        results: List[Union[str, Exception]] = [None] * len(jobs)
+        heap = [(priority, index, prompt) for index, (priority, prompt) in enumerate(jobs)]
+        heapq.heapify(heap)
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                with lock:
+                    if not heap:
+                        return
+                    _, index, prompt = heapq.heappop(heap)
+                try:
+                    results[index] = self.generate(prompt)
+                except Exception as e:
+                    results[index] = e
+                if on_result:
+                    on_result(index, results[index])
+
+        threads = [threading.Thread(target=worker, daemon=True)
+                   for _ in range(min(self.concurrency, len(jobs)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
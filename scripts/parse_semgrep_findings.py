@@ -6,10 +6,22 @@ Lit le fichier SARIF généré par Semgrep et produit un JSON
 structuré utilisable par le script LLM fix suggester.
 """
 
+import re
 import json
 import sys
+import argparse
 from pathlib import Path
 
+import pipeline_metrics
+
+SEVERITY_MAP = {"error": "CRITIQUE", "warning": "HAUTE", "note": "MOYENNE"}
+
+# La sortie SARIF de Semgrep ne reprend pas le bloc metadata des règles : la règle
+# métier est lue dans le message ([EC-001] ...), le domaine dans l'id (<domaine>-...)
+BUSINESS_RULE_RE = re.compile(r'^\s*\[([A-Z]{2}-\d{3})\]')
+RULE_DOMAIN_RE = re.compile(r'^([a-z]+)-')
+GENERIC_RULE_PREFIXES = {"general"}
+
 
 def parse_sarif(sarif_path: str) -> dict:
     """Extrait les violations depuis un fichier SARIF Semgrep"""
@@ -19,8 +31,20 @@ def parse_sarif(sarif_path: str) -> dict:
         print(f"Fichier SARIF non trouvé : {sarif_path}", file=sys.stderr)
         return {"source": "semgrep", "total_findings": 0, "findings": []}
 
-    with open(sarif_file, encoding="utf-8") as f:
-        sarif = json.load(f)
+    with pipeline_metrics.span('sarif.load', bytes=sarif_file.stat().st_size):
+        with open(sarif_file, encoding="utf-8") as f:
+            sarif = json.load(f)
+
+    with pipeline_metrics.span('sarif.extract') as span:
+        findings = _extract_findings(sarif)
+        span.set(findings=len(findings))
+
+    with pipeline_metrics.span('sarif.summarize'):
+        return summarize_findings(findings)
+
+
+def _extract_findings(sarif: dict) -> list:
+    """Extrait les violations de tous les runs d'un document SARIF"""
 
     findings = []
 
@@ -44,23 +68,25 @@ def parse_sarif(sarif_path: str) -> dict:
                     "snippet": loc.get("region", {}).get("snippet", {}).get("text", ""),
                 }
 
-            # Extraire la sévérité
-            level = result.get("level", "warning")
-            severity_map = {"error": "CRITIQUE", "warning": "HAUTE", "note": "MOYENNE"}
-            severity = severity_map.get(level, "INCONNUE")
+            # Extraire la sévérité (Semgrep la place dans la configuration de la règle)
+            level = (result.get("level")
+                     or rule_info.get("defaultConfiguration", {}).get("level")
+                     or "warning")
+            severity = SEVERITY_MAP.get(level, "INCONNUE")
 
             # Extraire les métadonnées métier
+            message = result.get("message", {}).get("text", "")
             properties = rule_info.get("properties", {})
             metadata = {
-                "business_rule": properties.get("business_rule", ""),
-                "domain": properties.get("domain", ""),
+                "business_rule": properties.get("business_rule") or _business_rule(message),
+                "domain": properties.get("domain") or _rule_domain(rule_id),
                 "category": properties.get("category", ""),
             }
 
             finding = {
                 "rule_id": rule_id,
                 "severity": severity,
-                "message": result.get("message", {}).get("text", ""),
+                "message": message,
                 "file": location.get("file", ""),
                 "line": location.get("line", 0),
                 "snippet": location.get("snippet", ""),
@@ -68,6 +94,22 @@ def parse_sarif(sarif_path: str) -> dict:
             }
             findings.append(finding)
 
+    return findings
+
+
+def _business_rule(message: str) -> str:
+    match = BUSINESS_RULE_RE.match(message)
+    return match.group(1) if match else ""
+
+
+def _rule_domain(rule_id: str) -> str:
+    match = RULE_DOMAIN_RE.match(rule_id)
+    return match.group(1) if match and match.group(1) not in GENERIC_RULE_PREFIXES else ""
+
+
+def summarize_findings(findings: list) -> dict:
+    """Construit le rapport JSON (totaux par sévérité et par domaine) des violations"""
+
     # Regrouper par sévérité
     by_severity = {
         "CRITIQUE": [f for f in findings if f["severity"] == "CRITIQUE"],
@@ -93,12 +135,24 @@ def parse_sarif(sarif_path: str) -> dict:
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: parse_semgrep_findings.py <semgrep.sarif> [output.json]")
-        sys.exit(1)
-
-    sarif_path = sys.argv[1]
-    output_path = sys.argv[2] if len(sys.argv) > 2 else "semgrep-findings.json"
+    parser = argparse.ArgumentParser(
+        usage="parse_semgrep_findings.py <semgrep.sarif> [output.json] [--metrics-out FICHIER]"
+    )
+    parser.add_argument('sarif_path')
+    parser.add_argument('output_path', nargs='?', default="semgrep-findings.json")
+    parser.add_argument(
+        '--metrics-out',
+        action='append',
+        default=[],
+        help='Fichier de métriques par phase (.prom → Prometheus, sinon JSON) ; répétable'
+    )
+    args = parser.parse_args()
+
+    sarif_path = args.sarif_path
+    output_path = args.output_path
+
+    if args.metrics_out:
+        pipeline_metrics.enable()
 
     data = parse_sarif(sarif_path)
 
@@ -114,6 +168,9 @@ def main():
 
     print(f"Résultats écrits dans : {output_path}")
 
+    if args.metrics_out:
+        pipeline_metrics.registry().write(args.metrics_out)
+
 
 if __name__ == "__main__":
     main()
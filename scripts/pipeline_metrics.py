@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Instrumentation de la pipeline CI/CD Secpilot
+
+Mesure la durée de chaque phase (spans) et agrège des compteurs (taille des
+prompts, tokens estimés, réessais...). Désactivée par défaut : span() retourne
+alors un objet partagé sans effet, pour un coût quasi nul. Export JSON ou
+au format texte Prometheus (extension .prom).
+"""
+
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+
+class _NoopSpan:
+    """Span sans effet utilisé quand l'instrumentation est désactivée"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Mesure la durée d'un bloc et ses attributs"""
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, attrs: Dict):
+        self.registry = registry
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.registry.record(self.name, self.start, duration, self.attrs)
+        return False
+
+    def set(self, **attrs) -> None:
+        """Ajoute des attributs au span (taille de réponse, réessais...)"""
+        self.attrs.update(attrs)
+
+
+class MetricsRegistry:
+    """Collecte les spans et compteurs d'une exécution"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.spans: List[Dict] = []
+        self.summary: Dict[str, Dict] = {}
+        self.counters: Dict[str, float] = {}
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def record(self, name: str, start: float, duration: float, attrs: Dict) -> None:
+        with self.lock:
+            self.spans.append({
+                "name": name,
+                "start": round(start - self.origin, 6),
+                "seconds": round(duration, 6),
+                **attrs,
+            })
+            stats = self.summary.setdefault(name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            stats["count"] += 1
+            stats["total_seconds"] += duration
+            stats["max_seconds"] = max(stats["max_seconds"], duration)
+
+    def add(self, name: str, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_json(self) -> Dict:
+        with self.lock:
+            return {
+                "summary": {
+                    name: {**stats, "total_seconds": round(stats["total_seconds"], 6),
+                           "max_seconds": round(stats["max_seconds"], 6)}
+                    for name, stats in self.summary.items()
+                },
+                "counters": dict(self.counters),
+                "spans": list(self.spans),
+            }
+
+    def to_prometheus(self, prefix: str = 'secpilot') -> str:
+        lines = [
+            f"# HELP {prefix}_phase_seconds Durée des phases de la pipeline",
+            f"# TYPE {prefix}_phase_seconds summary",
+        ]
+        with self.lock:
+            for name, stats in sorted(self.summary.items()):
+                label = name.replace('"', '')
+                lines.append(f'{prefix}_phase_seconds_sum{{phase="{label}"}} {stats["total_seconds"]:.6f}')
+                lines.append(f'{prefix}_phase_seconds_count{{phase="{label}"}} {stats["count"]}')
+            for name, value in sorted(self.counters.items()):
+                metric = f"{prefix}_{name.replace('.', '_')}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, paths: Iterable[str]) -> None:
+        """Écrit les métriques ; le format suit l'extension (.prom → Prometheus, sinon JSON)"""
+        for path in paths:
+            target = Path(path)
+            if target.suffix == '.prom':
+                target.write_text(self.to_prometheus(), encoding='utf-8')
+            else:
+                target.write_text(json.dumps(self.to_json(), indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+# Registre global du processus, désactivé par défaut
+_REGISTRY = MetricsRegistry()
+
+
+def enable() -> MetricsRegistry:
+    """Active l'instrumentation (nouveau registre vide)"""
+    global _REGISTRY
+    _REGISTRY = MetricsRegistry(enabled=True)
+    return _REGISTRY
+
+
+def disable() -> None:
+    """Désactive l'instrumentation"""
+    global _REGISTRY
+    _REGISTRY = MetricsRegistry()
+
+
+def registry() -> MetricsRegistry:
+    return _REGISTRY
+
+
+def span(name: str, **attrs):
+    """Ouvre un span sur le registre global"""
+    return _REGISTRY.span(name, **attrs)
+
+
+def add(name: str, value: float = 1) -> None:
+    """Incrémente un compteur du registre global"""
+    _REGISTRY.add(name, value)
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Orchestrateur local de la pipeline Secpilot
+
+Modélise les étapes (tests par langage, analyse Semgrep, analyses LLM) comme
+un graphe de dépendances dont les arêtes sont en flux : chaque élément produit
+par une étape est transmis immédiatement aux étapes suivantes. L'analyse LLM
+d'une suite de tests en échec démarre donc pendant que les autres suites
+s'exécutent encore, et la durée totale tend vers celle du plus long chemin
+plutôt que vers la somme des étapes. Chaque étape a son propre nombre de
+workers ; un rapport combiné est produit à la fin.
+
+    pipeline_runner.py --artifacts-dir artifacts --contexts-dir contexts --src-dir src \\
+        --output-file suggestions.md [--sarif semgrep.sarif] [--no-run-tests]
+"""
+
+import sys
+import time
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pipeline_metrics
+from cluster_findings import cluster_findings
+from llm_fix_suggester import LLMFixSuggester, build_arg_parser, build_suggester
+from llm_scheduler import PRIORITY_CRITICAL, PRIORITY_NORMAL
+from parse_semgrep_findings import parse_sarif
+
+
+# Commandes des suites de tests ; {output} est le dossier d'artefact du langage
+TEST_COMMANDS = {
+    'python': [sys.executable, '-m', 'pytest', 'tests/python/', '-c', 'config/pytest.ini',
+               '--junitxml={output}/junit.xml'],
+    'javascript': ['npm', 'test', '--', '--ci'],
+    'java': ['mvn', '-q', '-f', 'config/pom.xml', 'test'],
+}
+
+LANGUAGE_EXTENSIONS = {'.py': 'python', '.js': 'javascript', '.java': 'java'}
+
+# Nombre de groupes de violations Semgrep décrits dans un prompt
+MAX_CLUSTERS_PER_PROMPT = 10
+
+
+class Stage:
+    """Étape du graphe : `func(élément)` produit zéro, un ou plusieurs éléments"""
+
+    def __init__(self, name: str, func: Callable, inputs: Iterable[str] = (),
+                 workers: int = 1, items: Optional[Iterable] = None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.workers = max(1, workers)
+        # Une étape source (sans entrée) traite la liste d'éléments fournie
+        self.items = list(items) if items is not None else [None]
+
+
+class PipelineRunner:
+    """Exécute un graphe d'étapes en flux, avec un parallélisme borné par étape"""
+
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.in_flight = 0
+
+    def add_stage(self, name: str, func: Callable, inputs: Iterable[str] = (),
+                  workers: int = 1, items: Optional[Iterable] = None) -> Stage:
+        if name in self.stages:
+            raise ValueError(f"Étape déjà définie : {name}")
+        stage = self.stages[name] = Stage(name, func, inputs, workers, items)
+        return stage
+
+    def _check_graph(self) -> None:
+        """Vérifie que les entrées existent et que le graphe est acyclique"""
+        for stage in self.stages.values():
+            for name in stage.inputs:
+                if name not in self.stages:
+                    raise ValueError(f"Étape inconnue en entrée de {stage.name} : {name}")
+
+        visiting, done = set(), set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle dans le graphe des étapes autour de {name}")
+            visiting.add(name)
+            for upstream in self.stages[name].inputs:
+                visit(upstream)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def run(self) -> Dict:
+        """Exécute le graphe jusqu'à épuisement ; retourne sorties, erreurs et durées par étape"""
+        self._check_graph()
+
+        self.downstream = {name: [] for name in self.stages}
+        for stage in self.stages.values():
+            for name in stage.inputs:
+                self.downstream[name].append(stage)
+
+        self.outputs = {name: [] for name in self.stages}
+        self.errors = {name: [] for name in self.stages}
+        self.timings = {name: {'tasks': 0, 'busy': 0.0, 'first_start': None, 'last_end': None}
+                        for name in self.stages}
+        self.executors = {
+            name: ThreadPoolExecutor(max_workers=stage.workers, thread_name_prefix=f'stage-{name}')
+            for name, stage in self.stages.items()
+        }
+        self.origin = time.monotonic()
+
+        try:
+            for stage in self.stages.values():
+                if not stage.inputs:
+                    for item in stage.items:
+                        self._submit(stage, item)
+
+            with self.idle:
+                while self.in_flight:
+                    self.idle.wait()
+        finally:
+            for executor in self.executors.values():
+                executor.shutdown(wait=True)
+
+        return {
+            'seconds': round(time.monotonic() - self.origin, 3),
+            'outputs': self.outputs,
+            'errors': self.errors,
+            'timings': self.timings,
+        }
+
+    def _submit(self, stage: Stage, item) -> None:
+        with self.lock:
+            self.in_flight += 1
+        self.executors[stage.name].submit(self._task, stage, item)
+
+    def _task(self, stage: Stage, item) -> None:
+        start = time.monotonic()
+        try:
+            with pipeline_metrics.span(f'stage.{stage.name}'):
+                for output in stage.func(item) or ():
+                    self._emit(stage, output)
+        except Exception as e:
+            with self.lock:
+                self.errors[stage.name].append({'item': item, 'error': e})
+        finally:
+            end = time.monotonic()
+            with self.lock:
+                timing = self.timings[stage.name]
+                timing['tasks'] += 1
+                timing['busy'] += end - start
+                offset = start - self.origin
+                if timing['first_start'] is None or offset < timing['first_start']:
+                    timing['first_start'] = offset
+                timing['last_end'] = max(timing['last_end'] or 0.0, end - self.origin)
+                self.in_flight -= 1
+                if not self.in_flight:
+                    self.idle.notify_all()
+
+    def _emit(self, stage: Stage, output) -> None:
+        """Enregistre un élément produit et le transmet immédiatement aux étapes suivantes"""
+        with self.lock:
+            self.outputs[stage.name].append(output)
+        for consumer in self.downstream[stage.name]:
+            self._submit(consumer, output)
+
+
+def run_test_suite(language: str, artifacts_dir: Path) -> Iterable[Path]:
+    """Exécute la suite de tests d'un langage ; produit son dossier d'artefact si elle échoue"""
+    output = artifacts_dir / f'test-results-{language}'
+    output.mkdir(parents=True, exist_ok=True)
+    command = [part.format(output=output) for part in TEST_COMMANDS[language]]
+    with open(output / 'test-output.txt', 'w', encoding='utf-8') as log:
+        returncode = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT).returncode
+    if returncode != 0:
+        yield output
+
+
+def findings_by_domain(sarif_path: Path) -> Iterable[Dict]:
+    """Regroupe les violations d'un rapport SARIF par domaine et langage (un élément par paire)"""
+    findings = parse_sarif(str(sarif_path))['findings']
+    groups: Dict[Tuple[str, str], List[Dict]] = {}
+    for finding in findings:
+        domain = finding['metadata'].get('domain') or 'general'
+        language = LANGUAGE_EXTENSIONS.get(Path(finding['file']).suffix, 'python')
+        groups.setdefault((domain, language), []).append(finding)
+    for domain, language in sorted(groups):
+        yield {'domain': domain, 'language': language,
+               'clusters': cluster_findings(groups[(domain, language)])['clusters']}
+
+
+def clusters_as_failure(clusters: List[Dict]) -> Dict:
+    """Présente des groupes de violations Semgrep au format d'un échec de tests"""
+    blocks = []
+    for cluster in clusters[:MAX_CLUSTERS_PER_PROMPT]:
+        locations = ', '.join(f"{m['file']}:{m['line']}" for m in cluster['members'][:5])
+        snippets = '\n'.join(f"    {e.get('snippet', '')}" for e in cluster['exemplars'])
+        blocks.append(f"[{cluster['rule_id']}] {cluster['message']}\n{locations}\n{snippets}")
+    return {
+        'raw_output': '\n\n'.join(blocks),
+        'failed_tests': [f"SEMGREP {c['rule_id']} ({c['size']} occurrence(s))"
+                         for c in clusters[:MAX_CLUSTERS_PER_PROMPT]],
+        # Messages des règles : requête de l'index de contexte
+        'error_messages': [c['message'] for c in clusters[:MAX_CLUSTERS_PER_PROMPT]],
+    }
+
+
+class SecpilotPipeline:
+    """Graphe par défaut : tests → analyse LLM, Semgrep → analyse LLM, puis rapport combiné"""
+
+    def __init__(self, suggester: LLMFixSuggester, artifacts_dir: Path, contexts_dir: Path,
+                 src_dir: Path, languages: List[str], run_tests: bool = True,
+                 sarif: Optional[Path] = None, test_workers: int = 3, llm_workers: int = 2):
+        self.suggester = suggester
+        self.artifacts_dir = artifacts_dir
+        self.src_dir = src_dir
+        self.contexts = suggester.prepare_contexts(contexts_dir)
+
+        self.runner = PipelineRunner()
+        if run_tests:
+            self.runner.add_stage('tests', lambda language: run_test_suite(language, artifacts_dir),
+                                  workers=test_workers, items=languages)
+        else:
+            # Résultats déjà présents : chaque dossier d'artefact est transmis tel quel
+            folders = sorted(p for p in artifacts_dir.iterdir() if p.is_dir()) if artifacts_dir.exists() else []
+            self.runner.add_stage('tests', lambda folder: [folder], items=folders)
+        self.runner.add_stage('analyze-tests', self.analyze_artifact, inputs=['tests'], workers=llm_workers)
+
+        if sarif:
+            # Tous les groupes en un seul élément : l'analyse les soumet ensemble à
+            # l'ordonnanceur, qui traite les règles critiques en premier
+            self.runner.add_stage('semgrep', lambda path: [list(findings_by_domain(path))], items=[sarif])
+            self.runner.add_stage('analyze-semgrep', self.analyze_findings, inputs=['semgrep'], workers=llm_workers)
+
+    def analyze_artifact(self, artifact_folder: Path) -> Iterable[Dict]:
+        entry = self.suggester.collect_artifact(artifact_folder, self.contexts, self.src_dir)
+        if entry is not None:
+            self.suggester.run_jobs(entry['jobs'])
+            yield entry
+
+    def analyze_findings(self, groups: List[Dict]) -> Iterable[Dict]:
+        """Un job par paire (domaine, langage), tous soumis ensemble à l'ordonnanceur"""
+        jobs = []
+        for group in groups:
+            clusters = group['clusters']
+            critical = any(c['severity'] == 'CRITIQUE' for c in clusters)
+            failure = clusters_as_failure(clusters)
+            jobs.append({
+                'domain': group['domain'],
+                'language': group['language'],
+                'priority': PRIORITY_CRITICAL if critical else PRIORITY_NORMAL,
+                'test_failure': failure,
+                'source_code': self.suggester.load_source_code(self.src_dir, group['language'], group['domain']),
+                'context': self.suggester.domain_context(group['domain'], self.contexts, failure),
+                'stable_context': self.suggester.context_index is None,
+            })
+        self.suggester.run_jobs(jobs)
+        for group, job in zip(groups, jobs):
+            yield dict(group, job=job)
+
+    def run(self) -> Dict:
+        result = self.runner.run()
+        result['report'] = self.render(result)
+        return result
+
+    def render(self, result: Dict) -> str:
+        """Rapport combiné, dans un ordre déterministe quel que soit l'ordre d'achèvement"""
+        entries = sorted(result['outputs']['analyze-tests'], key=lambda e: e['artifact'])
+        report = [self.suggester.render_suggestions(entries)]
+
+        groups = sorted(result['outputs'].get('analyze-semgrep', []), key=lambda g: (g['domain'], g['language']))
+        if groups:
+            report.append("## Violations Semgrep\n\n")
+        for group in groups:
+            findings = sum(c['size'] for c in group['clusters'])
+            report.append(f"### Domaine {group['domain'].title()} ({group['language'].title()}, "
+                          f"{findings} violation(s), {len(group['clusters'])} groupe(s))\n\n")
+            job = group['job']
+            if 'error' in job:
+                report.append(f"Erreur de génération LLM : {job['error']}\n\n")
+                continue
+            report.append(job['suggestion'])
+            report.append("\n\n---\n\n")
+
+        failures = [(name, failure) for name, items in sorted(result['errors'].items()) for failure in items]
+        if failures:
+            report.append("## Erreurs de la pipeline\n\n")
+            for name, failure in failures:
+                report.append(f"- `{name}` ({failure['item']}) : {failure['error']}\n")
+
+        return ''.join(report)
+
+
+def main():
+    parser = build_arg_parser()
+    parser.description = 'Orchestre tests, analyse Semgrep et suggestions LLM en flux'
+    parser.add_argument(
+        '--languages',
+        default='python,javascript,java',
+        help='Suites de tests à exécuter (défaut: python,javascript,java)'
+    )
+    parser.add_argument(
+        '--no-run-tests',
+        action='store_true',
+        help='Utilise les résultats déjà présents dans --artifacts-dir au lieu de lancer les tests'
+    )
+    parser.add_argument('--sarif', help='Rapport SARIF Semgrep à analyser en parallèle des tests')
+    parser.add_argument('--test-workers', type=int, default=3, help='Suites exécutées simultanément (défaut: 3)')
+    parser.add_argument('--llm-workers', type=int, default=2, help='Analyses LLM simultanées par étape (défaut: 2)')
+
+    args = parser.parse_args()
+
+    if args.metrics_out:
+        pipeline_metrics.enable()
+
+    try:
+        pipeline = SecpilotPipeline(
+            build_suggester(args),
+            Path(args.artifacts_dir),
+            Path(args.contexts_dir),
+            Path(args.src_dir),
+            languages=[l.strip() for l in args.languages.split(',') if l.strip()],
+            run_tests=not args.no_run_tests,
+            sarif=Path(args.sarif) if args.sarif else None,
+            test_workers=args.test_workers,
+            llm_workers=args.llm_workers
+        )
+        result = pipeline.run()
+    except Exception as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        sys.exit(1)
+
+    Path(args.output_file).write_text(result['report'], encoding='utf-8')
+    for name, timing in result['timings'].items():
+        if timing['tasks']:
+            print(f"{name:<16} {timing['tasks']:>3} tâche(s)  "
+                  f"{timing['first_start']:.2f}s → {timing['last_end']:.2f}s")
+    print(f"Durée totale : {result['seconds']:.2f}s")
+    print(f"Suggestions écrites dans {args.output_file}")
+
+    if args.metrics_out:
+        pipeline_metrics.registry().write(args.metrics_out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Mode démon du LLM Fix Suggester
+
+Garde en mémoire, d'un job à l'autre, les providers (clients SDK et pools
+HTTP), les documents de contexte et l'index des fichiers source, et écoute
+sur un socket Unix local. Les fichiers modifiés (mtime, inode, taille) sont
+rechargés automatiquement.
+
+    suggester_daemon.py serve [--socket CHEMIN]
+    suggester_daemon.py submit [--socket CHEMIN] <mêmes arguments que llm_fix_suggester.py>
+
+Le client affiche les suggestions au fur et à mesure et écrit le rapport ;
+si le démon est injoignable, l'analyse est exécutée localement.
+"""
+
+import os
+import sys
+import json
+import stat
+import socket
+import fnmatch
+import tempfile
+import argparse
+import threading
+import socketserver
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pipeline_metrics
+from context_index import ContextIndex
+from domain_classifier import load_aliases
+from failure_history import FailureHistory
+from llm_fix_suggester import LLMFixSuggester, build_arg_parser, domain_source_files, get_provider, run
+from llm_scheduler import LLMScheduler
+
+
+# Socket par défaut : dans un répertoire privé à l'utilisateur ($XDG_RUNTIME_DIR,
+# sinon <tmp>/secpilot-<uid>, mode 0700), jamais directement dans /tmp
+SOCKET_NAME = 'secpilot-suggester.sock'
+
+
+def private_runtime_dir() -> Path:
+    """Répertoire réservé à l'utilisateur courant pour le socket du démon"""
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime:
+        return Path(runtime)
+    directory = Path(tempfile.gettempdir()) / f'secpilot-{os.getuid()}'
+    directory.mkdir(mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"{directory} n'est pas un répertoire privé à l'utilisateur courant")
+    return directory
+
+
+def default_socket() -> str:
+    return os.environ.get('SECPILOT_SOCKET') or str(private_runtime_dir() / SOCKET_NAME)
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    """Supprime le socket d'un démon précédent ; refuse de supprimer tout autre fichier"""
+    try:
+        info = os.lstat(socket_path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise RuntimeError(f"{socket_path} existe et n'est pas un socket du démon : suppression refusée")
+    os.unlink(socket_path)
+
+
+def file_signature(path: Path) -> Tuple[int, int, int]:
+    """Signature (mtime, inode, taille) utilisée pour détecter les modifications"""
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_ino, stat.st_size
+
+
+class FileCache:
+    """Contenu de fichiers texte, rechargé quand leur signature change"""
+
+    def __init__(self):
+        self.entries: Dict[Path, Tuple[Tuple[int, int, int], str]] = {}
+        self.lock = threading.Lock()
+
+    def read(self, path: Path) -> str:
+        signature = file_signature(path)
+        with self.lock:
+            cached = self.entries.get(path)
+            if cached and cached[0] == signature:
+                return cached[1]
+        content = path.read_text(encoding='utf-8')
+        with self.lock:
+            self.entries[path] = (signature, content)
+        return content
+
+
+class SourceIndex:
+    """Liste des fichiers d'une arborescence, reconstruite quand un répertoire change"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.directories: Dict[Path, Tuple[int, int, int]] = {}
+        self.files: List[Path] = []
+
+    def _is_stale(self) -> bool:
+        if not self.directories:
+            return True
+        try:
+            return any(file_signature(d) != sig for d, sig in self.directories.items())
+        except FileNotFoundError:
+            return True
+
+    def refresh(self) -> None:
+        """Reconstruit l'index si un répertoire a été modifié (ajout, suppression, renommage)"""
+        if not self._is_stale():
+            return
+        directories = {}
+        files = []
+        for current, dirnames, filenames in os.walk(self.root):
+            dirnames.sort()
+            current_path = Path(current)
+            directories[current_path] = file_signature(current_path)
+            files.extend(current_path / name for name in sorted(filenames))
+        self.directories = directories
+        self.files = files
+
+    def match(self, pattern: str) -> List[Path]:
+        self.refresh()
+        return [f for f in self.files if fnmatch.fnmatchcase(f.name, pattern)]
+
+
+class CachedLLMFixSuggester(LLMFixSuggester):
+    """Suggester dont les lectures de contextes et de sources passent par des caches"""
+
+    def __init__(self, provider, scheduler=None, context_index: Optional[ContextIndex] = None,
+                 file_cache: Optional[FileCache] = None,
+                 source_indexes: Optional[Dict[Path, SourceIndex]] = None,
+                 domain_aliases: Optional[Dict[str, List[str]]] = None,
+                 history: Optional[FailureHistory] = None):
+        super().__init__(provider, scheduler=scheduler, context_index=context_index,
+                         domain_aliases=domain_aliases, history=history)
+        self.file_cache = file_cache or FileCache()
+        self.source_indexes = source_indexes if source_indexes is not None else {}
+
+    def load_context(self, contexts_dir: Path) -> Dict[str, str]:
+        contexts = {}
+        if contexts_dir.exists():
+            for context_file in sorted(contexts_dir.glob('*.md')):
+                contexts[context_file.stem] = self.file_cache.read(context_file)
+        return contexts
+
+    def source_files(self, src_dir: Path, language: str, domain: str) -> List[Path]:
+        src_dir = src_dir.resolve()
+        index = self.source_indexes.get(src_dir)
+        if index is None:
+            index = self.source_indexes[src_dir] = SourceIndex(src_dir)
+        index.refresh()
+        return domain_source_files(src_dir, index.files, language, domain)
+
+    def read_source(self, path: Path) -> str:
+        return self.file_cache.read(path)
+
+
+class SuggesterDaemon:
+    """État chaud partagé entre les jobs : providers, caches de fichiers et index"""
+
+    def __init__(self):
+        self.providers: Dict[str, Tuple[object, LLMScheduler]] = {}
+        self.file_cache = FileCache()
+        self.source_indexes: Dict[Path, SourceIndex] = {}
+        self.context_indexes: Dict[str, ContextIndex] = {}
+        self.histories: Dict[str, FailureHistory] = {}
+        # Les jobs sont traités un par un : le registre de métriques est global
+        self.job_lock = threading.Lock()
+
+    def suggester(self, provider_name: str, context_index: Optional[str] = None,
+                  domain_aliases: Optional[str] = None, history: Optional[str] = None) -> CachedLLMFixSuggester:
+        if provider_name not in self.providers:
+            provider = get_provider(provider_name)
+            self.providers[provider_name] = (provider, LLMScheduler.from_env(provider))
+        provider, scheduler = self.providers[provider_name]
+        if context_index and context_index not in self.context_indexes:
+            self.context_indexes[context_index] = ContextIndex(Path(context_index))
+        if history and history not in self.histories:
+            self.histories[history] = FailureHistory(Path(history))
+        return CachedLLMFixSuggester(
+            provider,
+            scheduler=scheduler,
+            context_index=self.context_indexes.get(context_index),
+            file_cache=self.file_cache,
+            source_indexes=self.source_indexes,
+            domain_aliases=load_aliases(Path(domain_aliases) if domain_aliases else None),
+            history=self.histories.get(history)
+        )
+
+    def handle(self, request: Dict, send) -> None:
+        """Exécute un job et envoie les événements au client"""
+        with self.job_lock:
+            metrics_out = request.get('metrics_out') or []
+            if metrics_out:
+                pipeline_metrics.enable()
+            try:
+                suggester = self.suggester(
+                    request['provider'], request.get('context_index'), request.get('domain_aliases'),
+                    request.get('history')
+                )
+
+                def on_job(job):
+                    send({
+                        "event": "job",
+                        "language": job['language'],
+                        "domain": job['domain'],
+                        "suggestion": job.get('suggestion'),
+                        "error": str(job['error']) if 'error' in job else None,
+                    })
+
+                report = suggester.process_artifacts(
+                    Path(request['artifacts_dir']), Path(request['contexts_dir']), Path(request['src_dir']),
+                    on_job=on_job
+                )
+                if metrics_out:
+                    pipeline_metrics.registry().write(metrics_out)
+                send({"event": "done", "report": report})
+            finally:
+                if metrics_out:
+                    pipeline_metrics.disable()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        def send(event):
+            self.wfile.write((json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+        try:
+            request = json.loads(self.rfile.readline().decode('utf-8'))
+            self.server.daemon_state.handle(request, send)
+        except Exception as e:
+            send({"event": "error", "message": str(e)})
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: str) -> None:
+    """Démarre le démon sur un socket Unix
+
+    Le socket est créé sous umask 0o077 (accessible au seul propriétaire dès
+    sa création), après l'initialisation de l'état du démon.
+    """
+    remove_stale_socket(socket_path)
+    server = _UnixServer(socket_path, _RequestHandler, bind_and_activate=False)
+    server.daemon_state = SuggesterDaemon()
+    previous_umask = os.umask(0o077)
+    try:
+        server.server_bind()
+        server.server_activate()
+    except BaseException:
+        server.server_close()
+        raise
+    finally:
+        os.umask(previous_umask)
+
+    with server:
+        print(f"Démon Secpilot à l'écoute sur {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+
+def submit(socket_path: str, args: argparse.Namespace, stream=sys.stdout) -> str:
+    """Soumet un job au démon et retourne le rapport Markdown"""
+    request = {
+        "artifacts_dir": str(Path(args.artifacts_dir).resolve()),
+        "contexts_dir": str(Path(args.contexts_dir).resolve()),
+        "src_dir": str(Path(args.src_dir).resolve()),
+        "provider": args.provider,
+        "context_index": str(Path(args.context_index).resolve()) if args.context_index else None,
+        "domain_aliases": str(Path(args.domain_aliases).resolve()) if args.domain_aliases else None,
+        "history": str(Path(args.history).resolve()) if args.history else None,
+        "metrics_out": [str(Path(p).resolve()) for p in args.metrics_out],
+    }
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        for line in client.makefile('r', encoding='utf-8'):
+            event = json.loads(line)
+            if event["event"] == "job":
+                status = "erreur" if event["error"] else "ok"
+                print(f"[{event['language']}/{event['domain']}] {status}", file=stream)
+            elif event["event"] == "done":
+                return event["report"]
+            elif event["event"] == "error":
+                raise RuntimeError(event["message"])
+
+    raise RuntimeError("Connexion fermée par le démon avant la fin du job")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mode démon du LLM Fix Suggester')
+    parser.add_argument('command', choices=['serve', 'submit'])
+    parser.add_argument(
+        '--socket',
+        help=f'Socket Unix du démon (défaut: $SECPILOT_SOCKET, sinon $XDG_RUNTIME_DIR/{SOCKET_NAME} '
+             f'ou <tmp>/secpilot-<uid>/{SOCKET_NAME})'
+    )
+
+    args, remaining = parser.parse_known_args()
+    args.socket = args.socket or default_socket()
+
+    if args.command == 'serve':
+        serve(args.socket)
+        return
+
+    job_args = build_arg_parser().parse_args(remaining)
+
+    try:
+        try:
+            report = submit(args.socket, job_args)
+        except (FileNotFoundError, ConnectionRefusedError):
+            print(f"Démon injoignable sur {args.socket}, exécution locale", file=sys.stderr)
+            run(job_args)
+            return
+
+        Path(job_args.output_file).write_text(report, encoding='utf-8')
+        print(f"Suggestions écrites dans {job_args.output_file}")
+
+    except Exception as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+File de travail partagée des analyses LLM
+
+Répartit les analyses d'un build matriciel entre plusieurs processus ou
+runners, sans broker externe : la file est une base SQLite (locale, ou sur un
+volume partagé qui respecte les verrous POSIX). Chaque job correspond à un
+triplet (artefact, langage, domaine).
+
+- enqueue : lit les artefacts et ajoute leurs jobs (plusieurs producteurs
+  possibles, un même artefact d'un même producteur n'est ajouté qu'une fois ;
+  le producteur est `--artifact-prefix`, par défaut l'hôte et le chemin
+  résolu des artefacts) ;
+- work : réclame des jobs sous bail, prolongé par un heartbeat tant que
+  l'analyse tourne ; le bail d'un worker arrêté expire et le job est repris ;
+- reduce : assemble le rapport Markdown, dans l'ordre des producteurs, des
+  artefacts puis des domaines, quel que soit le worker qui a traité chaque job.
+
+    work_queue.py enqueue --queue CHEMIN [--artifact-prefix NOM] <mêmes arguments que llm_fix_suggester.py>
+    work_queue.py work --queue CHEMIN [--lease S] [--batch N] <...>
+    work_queue.py reduce --queue CHEMIN --output-file llm-suggestions.md
+    work_queue.py status --queue CHEMIN
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pipeline_metrics
+from llm_fix_suggester import LLMFixSuggester, build_arg_parser, build_suggester
+
+
+DEFAULT_QUEUE = '.work-queue.db'
+DEFAULT_LEASE = 120.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_INTERVAL = 0.2
+
+# Arguments de llm_fix_suggester.py utilisés par chaque commande
+REQUIRED_OPTIONS = {
+    'enqueue': ('--artifacts-dir', '--contexts-dir', '--src-dir'),
+    'reduce': ('--output-file',),
+}
+
+# Champs d'un job nécessaires pour construire son prompt sur un autre runner
+PAYLOAD_KEYS = ('test_failure', 'source_code', 'context', 'stable_context')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    producer TEXT NOT NULL,
+    artifact TEXT NOT NULL,
+    language TEXT NOT NULL,
+    notice TEXT,
+    PRIMARY KEY (producer, artifact)
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    producer TEXT NOT NULL,
+    artifact TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    suggestion TEXT,
+    error TEXT,
+    UNIQUE (producer, artifact, position)
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, producer, artifact, position);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def default_producer(artifacts_dir: Path) -> str:
+    return f"{socket.gethostname()}:{artifacts_dir.resolve()}"
+
+
+class WorkQueue:
+    """File de jobs SQLite avec baux ; utilisable par plusieurs processus"""
+
+    def __init__(self, path: Path, lease: float = DEFAULT_LEASE, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        # Transactions explicites : BEGIN IMMEDIATE sérialise les réclamations entre processus
+        self.db = sqlite3.connect(str(path), timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock:
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self.lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.db
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+            self.db.execute('COMMIT')
+
+    def enqueue(self, entries: List[Dict], producer: str = '') -> int:
+        """Ajoute les artefacts préparés par LLMFixSuggester.collect_jobs ; retourne le nombre de jobs ajoutés
+
+        Les artefacts sont identifiés par (producteur, nom du dossier) : deux
+        producteurs peuvent avoir des dossiers de même nom.
+        """
+        added = 0
+        with self._transaction() as db:
+            for entry in entries:
+                cursor = db.execute(
+                    'INSERT OR IGNORE INTO entries (producer, artifact, language, notice) VALUES (?, ?, ?, ?)',
+                    (producer, entry['artifact'], entry['language'], entry['notice'])
+                )
+                # Artefact déjà en file (producteur relancé) : ses jobs ne sont pas refaits
+                if not cursor.rowcount:
+                    continue
+                db.executemany(
+                    """INSERT INTO jobs (producer, artifact, position, language, domain, priority, payload)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    [(producer, entry['artifact'], position, job['language'], job['domain'], job['priority'],
+                      json.dumps({key: job[key] for key in PAYLOAD_KEYS}))
+                     for position, job in enumerate(entry['jobs'])]
+                )
+                added += len(entry['jobs'])
+        return added
+
+    def claim(self, worker: str, limit: int = 1) -> List[Dict]:
+        """Réclame jusqu'à `limit` jobs en attente ou dont le bail a expiré, par priorité"""
+        now = time.time()
+        with self._transaction() as db:
+            abandoned = db.execute(
+                """UPDATE jobs SET status = 'failed', worker = NULL,
+                       error = 'Abandonné après ' || attempts || ' tentative(s) sans réponse du worker'
+                   WHERE status = 'leased' AND lease_until < ? AND attempts >= ?""",
+                (now, self.max_attempts)
+            ).rowcount
+            rows = db.execute(
+                """SELECT * FROM jobs
+                   WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?)
+                   ORDER BY priority, producer, artifact, position LIMIT ?""",
+                (now, limit)
+            ).fetchall()
+            db.executemany(
+                """UPDATE jobs SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1
+                   WHERE id = ?""",
+                [(worker, now + self.lease, row['id']) for row in rows]
+            )
+
+        expired = sum(1 for row in rows if row['status'] == 'leased')
+        if abandoned:
+            pipeline_metrics.add('work_queue.abandoned', abandoned)
+        if expired:
+            pipeline_metrics.add('work_queue.expired', expired)
+        jobs = []
+        for row in rows:
+            job = json.loads(row['payload'])
+            job.update(queue_id=row['id'], artifact=row['artifact'], language=row['language'],
+                       domain=row['domain'], priority=row['priority'])
+            jobs.append(job)
+        return jobs
+
+    def heartbeat(self, worker: str, queue_ids: List[int]) -> int:
+        """Prolonge le bail des jobs encore détenus par ce worker ; retourne leur nombre"""
+        if not queue_ids:
+            return 0
+        with self._transaction() as db:
+            return db.execute(
+                f"""UPDATE jobs SET lease_until = ?
+                    WHERE worker = ? AND status = 'leased' AND id IN ({','.join('?' * len(queue_ids))})""",
+                (time.time() + self.lease, worker, *queue_ids)
+            ).rowcount
+
+    def complete(self, worker: str, job: Dict) -> bool:
+        """Enregistre le résultat d'un job ; False si le bail a été repris par un autre worker entre-temps"""
+        error = job.get('error')
+        with self._transaction() as db:
+            updated = db.execute(
+                """UPDATE jobs SET status = ?, suggestion = ?, error = ?, worker = NULL, lease_until = NULL
+                   WHERE id = ? AND worker = ? AND status = 'leased'""",
+                ('failed' if error is not None else 'done', job.get('suggestion'),
+                 str(error) if error is not None else None, job['queue_id'], worker)
+            ).rowcount
+        return bool(updated)
+
+    def status(self) -> Dict[str, int]:
+        """Nombre de jobs par état"""
+        with self.lock:
+            rows = self.db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        counts.update({row[0]: row[1] for row in rows})
+        return counts
+
+    def entries(self) -> List[Dict]:
+        """Artefacts et jobs terminés, dans l'ordre du rapport (producteur, artefact, puis rang du domaine)"""
+        counts = self.status()
+        unfinished = counts['pending'] + counts['leased']
+        if unfinished:
+            raise ValueError(f"{unfinished} job(s) non terminé(s) dans {self.path}")
+
+        with self.lock:
+            artifacts = self.db.execute('SELECT * FROM entries ORDER BY producer, artifact').fetchall()
+            rows = self.db.execute(
+                'SELECT producer, artifact, domain, suggestion, error FROM jobs ORDER BY producer, artifact, position'
+            ).fetchall()
+
+        jobs: Dict[Tuple[str, str], List[Dict]] = {}
+        for row in rows:
+            job = {'domain': row['domain']}
+            if row['error'] is not None:
+                job['error'] = row['error']
+            else:
+                job['suggestion'] = row['suggestion']
+            jobs.setdefault((row['producer'], row['artifact']), []).append(job)
+
+        return [
+            {'producer': row['producer'], 'artifact': row['artifact'], 'language': row['language'],
+             'notice': row['notice'],
+             'jobs': jobs.get((row['producer'], row['artifact']), [])}
+            for row in artifacts
+        ]
+
+
+def enqueue(queue: WorkQueue, suggester: LLMFixSuggester, artifacts_dir: Path,
+            contexts_dir: Path, src_dir: Path, producer: Optional[str] = None) -> int:
+    """Prépare les jobs des artefacts (sans appel LLM) et les ajoute à la file
+
+    `producer` distingue les artefacts de plusieurs producteurs ; par défaut,
+    l'hôte et le chemin résolu du dossier d'artefacts (les runners d'une
+    matrice CI utilisent souvent le même chemin).
+    """
+    producer = producer if producer is not None else default_producer(artifacts_dir)
+    with pipeline_metrics.span('work_queue.enqueue') as span:
+        contexts = suggester.prepare_contexts(contexts_dir)
+        added = queue.enqueue(suggester.collect_jobs(artifacts_dir, contexts, src_dir), producer)
+        span.set(jobs=added)
+    return added
+
+
+def work(queue: WorkQueue, suggester: LLMFixSuggester, worker: Optional[str] = None, batch: int = 1,
+         idle_timeout: float = 0.0, poll_interval: float = DEFAULT_POLL_INTERVAL) -> int:
+    """Traite des jobs jusqu'à ce que la file soit vide ; retourne le nombre de jobs traités
+
+    Tant que d'autres workers détiennent des jobs, la file est surveillée pour
+    reprendre ceux dont le bail expire. `idle_timeout` prolonge l'attente de
+    nouveaux jobs quand la file est vide (producteurs encore en cours).
+    """
+    worker = worker or default_worker_id()
+    held: Dict[int, Dict] = {}
+    held_lock = threading.Lock()
+    stop = threading.Event()
+
+    def heartbeat():
+        # Une erreur passagère (base verrouillée sur un volume partagé) ne doit
+        # pas arrêter le heartbeat : les baux expireraient pendant l'analyse
+        while not stop.wait(queue.lease / 3):
+            with held_lock:
+                queue_ids = list(held)
+            try:
+                queue.heartbeat(worker, queue_ids)
+            except Exception as e:
+                pipeline_metrics.add('work_queue.heartbeat_errors')
+                print(f"Heartbeat de {worker} en échec : {e}", file=sys.stderr)
+
+    def on_job(job):
+        with held_lock:
+            held.pop(job['queue_id'], None)
+        if not queue.complete(worker, job):
+            pipeline_metrics.add('work_queue.lease_lost')
+
+    beat = threading.Thread(target=heartbeat, daemon=True)
+    beat.start()
+    processed = 0
+    idle_since = None
+    try:
+        while True:
+            with pipeline_metrics.span('work_queue.claim', worker=worker) as span:
+                jobs = queue.claim(worker, batch)
+                span.set(jobs=len(jobs))
+
+            if not jobs:
+                counts = queue.status()
+                if counts['leased']:
+                    idle_since = None
+                else:
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since >= idle_timeout:
+                        return processed
+                time.sleep(poll_interval)
+                continue
+
+            idle_since = None
+            with held_lock:
+                held.update((job['queue_id'], job) for job in jobs)
+            suggester.run_jobs(jobs, on_job=on_job)
+            processed += len(jobs)
+            pipeline_metrics.add('work_queue.processed', len(jobs))
+    finally:
+        stop.set()
+        beat.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='File de travail partagée des analyses LLM')
+    parser.add_argument('command', choices=['enqueue', 'work', 'reduce', 'status'])
+    parser.add_argument('--queue', default=DEFAULT_QUEUE, help=f'Base de la file (défaut: {DEFAULT_QUEUE})')
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                        help=f'Durée du bail d\'un job en secondes (défaut: {DEFAULT_LEASE:g})')
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help=f'Réclamations d\'un job avant abandon (défaut: {DEFAULT_MAX_ATTEMPTS})')
+    parser.add_argument('--batch', type=int, default=1, help='Jobs réclamés à la fois par le worker (défaut: 1)')
+    parser.add_argument('--idle-timeout', type=float, default=0.0,
+                        help='Attente de nouveaux jobs quand la file est vide, en secondes (défaut: 0)')
+    parser.add_argument('--worker-id', help='Identifiant du worker (défaut: <hôte>-<pid>)')
+    parser.add_argument('--artifact-prefix',
+                        help='Identifiant du producteur, préfixe des artefacts en file '
+                             '(défaut: <hôte>:<chemin résolu de --artifacts-dir>)')
+
+    args, remaining = parser.parse_known_args()
+    job_args = build_arg_parser(require_paths=False).parse_args(remaining)
+    for option in REQUIRED_OPTIONS.get(args.command, ()):
+        if getattr(job_args, option.lstrip('-').replace('-', '_')) is None:
+            parser.error(f"{args.command} requiert {option}")
+
+    if job_args.metrics_out:
+        pipeline_metrics.enable()
+
+    try:
+        queue = WorkQueue(Path(args.queue), lease=args.lease, max_attempts=args.max_attempts)
+
+        if args.command == 'enqueue':
+            added = enqueue(queue, build_suggester(job_args), Path(job_args.artifacts_dir),
+                            Path(job_args.contexts_dir), Path(job_args.src_dir), args.artifact_prefix)
+            print(f"{added} job(s) ajouté(s) à {args.queue}")
+        elif args.command == 'work':
+            processed = work(queue, build_suggester(job_args), args.worker_id, args.batch, args.idle_timeout)
+            print(f"{processed} job(s) traité(s)")
+        elif args.command == 'reduce':
+            report = LLMFixSuggester.render_suggestions(queue.entries())
+            Path(job_args.output_file).write_text(report, encoding='utf-8')
+            print(f"Suggestions écrites dans {job_args.output_file}")
+        else:
+            counts = queue.status()
+            print(' '.join(f"{status}={count}" for status, count in counts.items()))
+
+        queue.close()
+    except Exception as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if job_args.metrics_out:
+        pipeline_metrics.registry().write(job_args.metrics_out)
+        print(f"Métriques écrites dans {', '.join(job_args.metrics_out)}")
+
+
+if __name__ == '__main__':
+    main()
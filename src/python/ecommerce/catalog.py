@@ -0,0 +1,260 @@
+"""
+Catalogue produits compact pour les imports de prix en masse
+Contexte client : Plateforme e-commerce où les prix ne doivent JAMAIS être négatifs (EC-001)
+
+Les produits sont stockés en colonnes plutôt qu'en un dict par produit :
+- un index SKU → ligne ;
+- les prix en centimes entiers (array 'q', 8 octets par produit) ;
+- des drapeaux sur un octet par produit (actif, remisable).
+
+Le catalogue peut être enregistré dans un fichier et rouvert en mémoire
+partagée (mmap) : les colonnes ne sont alors pas copiées en mémoire et les
+mises à jour de prix sont écrites directement dans le fichier. Le fichier est
+petit-boutiste ; l'ouverture sans copie requiert un hôte petit-boutiste.
+"""
+
+import sys
+import mmap
+import struct
+import operator
+from array import array
+from collections import deque
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import compress, repeat
+
+
+FLAG_ACTIVE = 0x01
+FLAG_DISCOUNTABLE = 0x02
+
+DEFAULT_FLAGS = FLAG_ACTIVE | FLAG_DISCOUNTABLE
+
+# Séparateur de la liste des SKU dans le fichier : interdit dans un SKU
+SKU_SEPARATOR = '\n'
+
+# En-tête du fichier : signature, nombre de produits, taille de la liste des SKU
+MAGIC = b'SPCAT001'
+HEADER = struct.Struct('<8sQQ')
+
+# Tables de traduction octet → 0/1 : les masques sont calculés en C par bytes.translate
+_ACTIVE_MASK = bytes(1 if flags & FLAG_ACTIVE else 0 for flags in range(256))
+_DISCOUNTABLE_MASK = bytes(
+    1 if flags & FLAG_ACTIVE and flags & FLAG_DISCOUNTABLE else 0 for flags in range(256)
+)
+
+
+def to_cents(price):
+    """Convertit un prix en euros (str, float, Decimal) en centimes entiers, arrondi commercial"""
+    return int((Decimal(str(price)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+class ProductCatalog:
+    """Catalogue produits stocké en colonnes"""
+
+    def __init__(self):
+        self.skus = []
+        self.index = {}
+        self.prices = array('q')
+        self.flags = bytearray()
+        self._mmap = None
+        self._view = None
+
+    def __len__(self):
+        return len(self.skus)
+
+    def __contains__(self, sku):
+        return sku in self.index
+
+    def add(self, sku, price_cents, flags=DEFAULT_FLAGS):
+        """
+        Ajoute un produit et retourne sa ligne.
+
+        Règle métier EC-001 : un prix négatif est refusé.
+        """
+        if price_cents < 0:
+            raise ValueError(f"[EC-001] Le prix de {sku} ne peut pas être négatif")
+        if SKU_SEPARATOR in sku:
+            raise ValueError(f"SKU invalide (retour à la ligne) : {sku!r}")
+        if sku in self.index:
+            raise ValueError(f"SKU déjà présent : {sku}")
+        self._check_growable()
+        row = len(self.skus)
+        self.index[sku] = row
+        self.skus.append(sku)
+        self.prices.append(price_cents)
+        self.flags.append(flags)
+        return row
+
+    def add_many(self, skus, prices_cents, flags=DEFAULT_FLAGS):
+        """Ajoute des produits en masse ; retourne les lignes rejetées (voir bulk_set_prices)
+
+        Un SKU contenant un retour à la ligne est rejeté (règle 'invalid-sku').
+        """
+        self._check_growable()
+        prices = array('q', prices_cents)
+        if len(prices) != len(skus):
+            raise ValueError("skus et prices_cents doivent avoir la même longueur")
+        rejected = []
+        start = len(self.skus)
+        for position, sku in enumerate(skus):
+            price = prices[position]
+            if price < 0 or sku in self.index or SKU_SEPARATOR in sku:
+                rule = 'EC-001' if price < 0 else 'duplicate' if sku in self.index else 'invalid-sku'
+                rejected.append(_rejection(position, sku, price, rule))
+                continue
+            self.index[sku] = len(self.skus)
+            self.skus.append(sku)
+            self.prices.append(price)
+        self.flags.extend(repeat(flags, len(self.skus) - start))
+        return rejected
+
+    def price(self, sku):
+        """Prix d'un produit en centimes"""
+        return self.prices[self.index[sku]]
+
+    def get(self, sku):
+        """Vue dict d'un seul produit (les agrégats n'en construisent jamais)"""
+        row = self.index[sku]
+        flags = self.flags[row]
+        return {
+            'sku': sku,
+            'price': self.prices[row],
+            'active': bool(flags & FLAG_ACTIVE),
+            'discountable': bool(flags & FLAG_DISCOUNTABLE),
+        }
+
+    def set_flags(self, sku, flags):
+        self.flags[self.index[sku]] = flags
+
+    def bulk_set_prices(self, skus, prices_cents):
+        """
+        Met à jour les prix de plusieurs produits.
+
+        Règle métier EC-001 : les prix négatifs sont refusés. Les lignes
+        refusées (prix négatif ou SKU inconnu) ne modifient pas le catalogue
+        et sont retournées : [{'row', 'sku', 'price', 'rule'}], où `row` est la
+        position dans les données fournies.
+        """
+        prices = array('q', prices_cents)
+        if len(prices) != len(skus):
+            raise ValueError("skus et prices_cents doivent avoir la même longueur")
+
+        rows = list(map(self.index.get, skus))
+
+        # Cas courant : aucun rejet, la validation se limite à min() et à une recherche de None
+        if (not prices or min(prices) >= 0) and None not in rows:
+            _assign(self.prices, rows, prices)
+            return []
+
+        # Masques calculés par map/compress, sans boucle Python par ligne
+        known = list(map(operator.is_not, rows, repeat(None)))
+        valid = list(map(operator.and_, known, map(operator.ge, prices, repeat(0))))
+        _assign(self.prices, compress(rows, valid), compress(prices, valid))
+
+        return [
+            _rejection(position, skus[position], prices[position], 'EC-001' if known[position] else 'unknown-sku')
+            for position in compress(range(len(prices)), map(operator.not_, valid))
+        ]
+
+    def total(self, active_only=True):
+        """Somme des prix en centimes"""
+        if not active_only:
+            return sum(self.prices)
+        return sum(compress(self.prices, self._mask(_ACTIVE_MASK)))
+
+    def bulk_discount_total(self, threshold=10, discount_percent=15):
+        """
+        Total des produits actifs avec remise de volume, en centimes.
+
+        La remise s'applique aux produits remisables dès que le nombre de
+        produits actifs atteint le seuil (seuil inclus).
+        """
+        active = self._mask(_ACTIVE_MASK)
+        total = sum(compress(self.prices, active))
+        if active.count(1) < threshold:
+            return total
+        discountable = sum(compress(self.prices, self._mask(_DISCOUNTABLE_MASK)))
+        discount = (Decimal(discountable) * discount_percent / 100).quantize(
+            Decimal('1'), rounding=ROUND_HALF_UP
+        )
+        return total - int(discount)
+
+    def _mask(self, table):
+        # Une vue mmap n'a pas de translate() : copie d'un octet par produit
+        flags = self.flags if isinstance(self.flags, bytearray) else bytes(self.flags)
+        return flags.translate(table)
+
+    def _check_growable(self):
+        if self._mmap is not None:
+            raise ValueError("Un catalogue ouvert en mémoire partagée ne peut pas recevoir de nouveaux produits")
+
+    def save(self, path):
+        """Enregistre le catalogue : en-tête, prix, drapeaux, puis la liste des SKU (petit-boutiste)"""
+        sku_blob = SKU_SEPARATOR.join(self.skus).encode('utf-8')
+        prices = self.prices
+        if sys.byteorder != 'little':
+            prices = array('q', prices)
+            prices.byteswap()
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(self.skus), len(sku_blob)))
+            f.write(memoryview(prices).cast('B'))
+            f.write(self.flags)
+            f.write(sku_blob)
+
+    @classmethod
+    def open(cls, path, writable=True):
+        """Ouvre un catalogue enregistré en mémoire partagée ; les prix modifiés sont écrits dans le fichier
+
+        Les prix sont lus sans copie : l'hôte doit être petit-boutiste, comme le fichier.
+        """
+        if sys.byteorder != 'little':
+            raise ValueError("Ouverture en mémoire partagée impossible sur un hôte gros-boutiste")
+        with open(path, 'r+b' if writable else 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+
+        magic, count, sku_size = HEADER.unpack_from(mapped)
+        if magic != MAGIC:
+            mapped.close()
+            raise ValueError(f"{path} n'est pas un catalogue Secpilot")
+
+        view = memoryview(mapped)
+        prices_end = HEADER.size + count * 8
+        flags_end = prices_end + count
+
+        catalog = cls()
+        catalog._mmap = mapped
+        catalog._view = view
+        catalog.prices = view[HEADER.size:prices_end].cast('q')
+        catalog.flags = view[prices_end:flags_end]
+        catalog.skus = bytes(view[flags_end:flags_end + sku_size]).decode('utf-8').split(SKU_SEPARATOR) if count else []
+        catalog.index = {sku: row for row, sku in enumerate(catalog.skus)}
+        return catalog
+
+    def flush(self):
+        if self._mmap is not None:
+            self._mmap.flush()
+
+    def close(self):
+        """Libère la projection mémoire d'un catalogue ouvert avec open()"""
+        if self._mmap is None:
+            return
+        self.prices.release()
+        self.flags.release()
+        self._view.release()
+        self._mmap.close()
+        self._mmap = None
+        self._view = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _assign(column, rows, values):
+    """column[row] = value pour chaque paire, la boucle étant exécutée en C"""
+    deque(map(column.__setitem__, rows, values), maxlen=0)
+
+
+def _rejection(position, sku, price, rule):
+    return {'row': position, 'sku': sku, 'price': price, 'rule': rule}
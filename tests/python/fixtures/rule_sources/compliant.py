@@ -0,0 +1,28 @@
+"""
+Versions conformes des règles métier Python de .semgrep.yml (EC-001, BK-001, HC-001)
+Fixture de parité entre fast_rule_checker.py et Semgrep : aucune violation attendue
+"""
+
+MAX_DOSES = {'paracetamol': 4000}
+
+
+def set_product_price(product, new_price):
+    if new_price < 0:
+        raise ValueError("Price cannot be negative")
+    product['price'] = new_price
+    return product
+
+
+def calculate_discount(original_price, discount_percent):
+    return max(0, original_price - original_price * discount_percent / 100)
+
+
+def transfer_funds(from_account, to_account, amount):
+    if from_account['balance'] < amount:
+        raise ValueError("Insufficient balance")
+    from_account['balance'] -= amount
+    to_account['balance'] += amount
+
+
+def calculate_dosage(weight_kg, dose_per_kg, medication):
+    return min(weight_kg * dose_per_kg, MAX_DOSES.get(medication, weight_kg * dose_per_kg))
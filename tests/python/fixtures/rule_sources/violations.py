@@ -0,0 +1,22 @@
+"""
+Violations des règles métier Python de .semgrep.yml (EC-001, BK-001, HC-001)
+Fixture de parité entre fast_rule_checker.py et Semgrep : ne pas corriger
+"""
+
+
+def set_product_price(product, new_price):
+    product['price'] = new_price
+    return product
+
+
+def calculate_discount(original_price, discount_percent):
+    return original_price - original_price * discount_percent / 100
+
+
+def transfer_funds(from_account, to_account, amount):
+    from_account['balance'] -= amount
+    to_account['balance'] += amount
+
+
+def calculate_dosage(weight_kg, dose_per_kg, medication):
+    return weight_kg * dose_per_kg
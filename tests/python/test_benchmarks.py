@@ -0,0 +1,222 @@
+"""
+Benchmarks des modules métier et des scripts de la pipeline
+Exclus par défaut ; lancer avec : pytest -c config/pytest.ini -m benchmark tests/python/
+Les résultats sont écrits dans BENCHMARK_OUTPUT (défaut: benchmark-results.json)
+et comparés à une baseline avec scripts/compare_benchmarks.py
+"""
+import os
+import json
+import time
+import tracemalloc
+import platform
+import pytest
+import sys
+from pathlib import Path
+sys.path.insert(0, 'src/python')
+sys.path.insert(0, 'scripts')
+
+from ecommerce.pricing import calculate_discount, apply_bulk_discount, set_product_price
+from ecommerce.catalog import ProductCatalog
+from banking.transfer import transfer_funds
+from healthcare.dosage import calculate_dosage
+from bench_data import generate_test_log, generate_sarif, generate_price_list, generate_price_updates
+from cluster_findings import cluster_findings
+from domain_classifier import DomainClassifier, DEFAULT_ALIASES
+from compare_benchmarks import compare
+from fast_rule_checker import check_paths
+from llm_fix_suggester import LLMFixSuggester, MockProvider
+from parse_semgrep_findings import parse_sarif
+
+
+BENCHMARK_OUTPUT = os.environ.get('BENCHMARK_OUTPUT', 'benchmark-results.json')
+SCALE = float(os.environ.get('BENCHMARK_SCALE', '1'))
+
+LOG_BYTES = int(5_000_000 * SCALE)
+SARIF_FINDINGS = int(100_000 * SCALE)
+PRICE_ITEMS = int(1_000_000 * SCALE)
+
+RESULTS = {}
+
+
+@pytest.fixture(scope='module')
+def benchmark_report():
+    """Écrit les résultats de tous les benchmarks du module à la fin"""
+    yield RESULTS
+    if RESULTS:
+        with open(BENCHMARK_OUTPUT, 'w', encoding='utf-8') as f:
+            json.dump({
+                "python": platform.python_version(),
+                "scale": SCALE,
+                "benchmarks": RESULTS,
+            }, f, indent=2)
+
+
+@pytest.fixture
+def bench(request, benchmark_report):
+    """Mesure une fonction (meilleur temps sur plusieurs tours) et enregistre le résultat"""
+    def run(func, *args, rounds=3, **params):
+        timings = []
+        result = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            result = func(*args)
+            timings.append(time.perf_counter() - start)
+        benchmark_report[request.node.name] = {
+            "seconds": min(timings),
+            "mean": sum(timings) / len(timings),
+            "rounds": rounds,
+            "params": params,
+        }
+        return result
+    return run
+
+
+def _measure_memory(build):
+    """Construit une structure et retourne (structure, octets alloués)"""
+    tracemalloc.start()
+    try:
+        result = build()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+@pytest.mark.benchmark
+class TestScriptBenchmarks:
+    """Benchmarks des scripts de la pipeline"""
+
+    def test_parse_sarif_100k(self, bench, tmp_path):
+        """parse_sarif sur un rapport de 100k violations"""
+        sarif_path = tmp_path / 'report.sarif'
+        sarif_path.write_text(json.dumps(generate_sarif(SARIF_FINDINGS)))
+        data = bench(parse_sarif, str(sarif_path), findings=SARIF_FINDINGS)
+        assert data['total_findings'] == SARIF_FINDINGS
+
+    def test_cluster_findings_100k(self, bench):
+        """cluster_findings sur 100k violations"""
+        findings = [{
+            'rule_id': r['ruleId'],
+            'severity': 'CRITIQUE',
+            'file': r['locations'][0]['physicalLocation']['artifactLocation']['uri'],
+            'line': r['locations'][0]['physicalLocation']['region']['startLine'],
+            'snippet': r['locations'][0]['physicalLocation']['region']['snippet']['text'],
+        } for r in generate_sarif(SARIF_FINDINGS)['runs'][0]['results']]
+        result = bench(cluster_findings, findings, findings=SARIF_FINDINGS)
+        assert result['total_findings'] == SARIF_FINDINGS
+
+    def test_parse_test_output_large_log(self, bench):
+        """parse_test_output sur un log de plusieurs Mo"""
+        log = generate_test_log(LOG_BYTES)
+        suggester = LLMFixSuggester(MockProvider())
+        result = bench(suggester.parse_test_output, log, bytes=LOG_BYTES)
+        assert result['failed_tests']
+
+    def test_classify_domains_large_log(self, bench):
+        """Classification par domaine d'un log de plusieurs Mo avec une cinquantaine de domaines"""
+        log = generate_test_log(LOG_BYTES)
+        aliases = dict(DEFAULT_ALIASES, **{f'domain{i:02d}': [f'alias{i:02d}', f'D{i:02d}-'] for i in range(50)})
+        classifier = DomainClassifier([], aliases)
+        ranked = bench(classifier.rank, log, bytes=LOG_BYTES, domains=len(classifier.domains))
+        assert set(ranked) == {'ecommerce', 'banking', 'healthcare'}
+
+    def test_process_artifacts_mock_provider(self, bench, tmp_path):
+        """process_artifacts de bout en bout avec le provider mock"""
+        for language in ('python', 'javascript', 'java'):
+            folder = tmp_path / 'artifacts' / f'test-results-{language}'
+            folder.mkdir(parents=True)
+            (folder / 'test-output.txt').write_text(generate_test_log(LOG_BYTES // 10))
+        suggester = LLMFixSuggester(MockProvider())
+        report = bench(
+            suggester.process_artifacts,
+            tmp_path / 'artifacts', Path('contexts'), Path('src'),
+            bytes=LOG_BYTES // 10
+        )
+        assert '### Domaine' in report
+
+    def test_fast_rule_checker(self, bench):
+        """Vérificateur rapide des règles métier sur src/python"""
+        bench(check_paths, ['src/python'], 1, rounds=5)
+
+
+@pytest.mark.benchmark
+class TestDomainBenchmarks:
+    """Benchmarks des fonctions métier sur de gros volumes"""
+
+    def test_apply_bulk_discount_1m(self, bench):
+        """apply_bulk_discount sur un million d'articles"""
+        items = generate_price_list(PRICE_ITEMS)
+        total = bench(apply_bulk_discount, items, items=PRICE_ITEMS)
+        assert total > 0
+
+    def test_calculate_discount_1m(self, bench):
+        """calculate_discount appelé sur un million de prix"""
+        prices = [item['price'] for item in generate_price_list(PRICE_ITEMS)]
+        bench(lambda: [calculate_discount(p, 15) for p in prices], items=PRICE_ITEMS)
+
+    def test_catalog_dict_of_dicts_1m(self, bench):
+        """Référence : un dict par produit, set_product_price appelé par mise à jour"""
+        skus = [item['sku'] for item in generate_price_list(PRICE_ITEMS)]
+        update_skus, update_prices = generate_price_updates(PRICE_ITEMS)
+        products, memory = _measure_memory(lambda: {sku: {'sku': sku, 'price': 1000, 'active': True} for sku in skus})
+
+        def run():
+            for sku, price in zip(update_skus, update_prices):
+                if price >= 0:
+                    set_product_price(products[sku], price)
+            return sum(p['price'] for p in products.values() if p['active'])
+
+        assert bench(run, items=PRICE_ITEMS, memory_bytes=memory) > 0
+
+    def test_catalog_columns_1m(self, bench):
+        """Catalogue en colonnes : bulk_set_prices validé (EC-001) puis total"""
+        skus = [item['sku'] for item in generate_price_list(PRICE_ITEMS)]
+        update_skus, update_prices = generate_price_updates(PRICE_ITEMS)
+
+        def build():
+            catalog = ProductCatalog()
+            catalog.add_many(skus, [1000] * len(skus))
+            return catalog
+
+        catalog, memory = _measure_memory(build)
+
+        def run():
+            rejected = catalog.bulk_set_prices(update_skus, update_prices)
+            return catalog.total(), rejected
+
+        total, rejected = bench(run, items=PRICE_ITEMS, memory_bytes=memory)
+        assert total > 0
+        assert all(r['rule'] == 'EC-001' for r in rejected)
+
+    def test_transfer_funds_100k(self, bench):
+        """100k virements successifs"""
+        count = PRICE_ITEMS // 10
+
+        def run():
+            source, target = {'balance': 10 ** 9}, {'balance': 0}
+            for _ in range(count):
+                transfer_funds(source, target, 1)
+            return target
+
+        assert bench(run, transfers=count)['balance'] == count
+
+    def test_calculate_dosage_1m(self, bench):
+        """calculate_dosage appelé un million de fois"""
+        bench(lambda: [calculate_dosage(70, 15, 'paracetamol') for _ in range(PRICE_ITEMS)], calls=PRICE_ITEMS)
+
+
+class TestCompareBenchmarks:
+    """Tests pour la comparaison avec la baseline"""
+
+    def test_regression_detected(self):
+        """Un benchmark plus lent que le seuil est signalé"""
+        baseline = {"benchmarks": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}}}
+        current = {"benchmarks": {"a": {"seconds": 1.5}, "b": {"seconds": 1.1}}}
+        regressions, _ = compare(baseline, current, threshold=0.2)
+        assert regressions == ["a"]
+
+    def test_new_benchmark_not_a_regression(self):
+        """Un nouveau benchmark n'est pas une régression"""
+        regressions, report = compare({"benchmarks": {}}, {"benchmarks": {"a": {"seconds": 2.0}}}, 0.2)
+        assert regressions == []
+        assert "nouveau" in report[0]
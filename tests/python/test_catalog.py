@@ -0,0 +1,134 @@
+"""
+Tests unitaires pour le catalogue produits en colonnes
+"""
+import pytest
+import struct
+import sys
+sys.path.insert(0, 'src/python')
+
+from ecommerce.catalog import (
+    ProductCatalog,
+    FLAG_ACTIVE,
+    to_cents
+)
+
+
+def _catalog(count=5, price=1000):
+    catalog = ProductCatalog()
+    assert catalog.add_many([f'SKU-{i}' for i in range(count)], [price] * count) == []
+    return catalog
+
+
+class TestBulkSetPrices:
+    """Tests pour la méthode bulk_set_prices"""
+
+    def test_valid_update(self):
+        """Toutes les lignes valides sont appliquées"""
+        catalog = _catalog()
+        assert catalog.bulk_set_prices(['SKU-0', 'SKU-3'], [1, 2500]) == []
+        assert catalog.price('SKU-0') == 1
+        assert catalog.price('SKU-3') == 2500
+
+    # TEST CONTEXTUEL : Règle métier - les prix ne peuvent pas être négatifs
+    @pytest.mark.business_rule
+    def test_negative_prices_rejected(self):
+        """
+        RÈGLE MÉTIER EC-001 : Le prix ne peut pas être négatif
+        Les lignes refusées sont retournées, les autres appliquées
+        """
+        catalog = _catalog()
+        rejected = catalog.bulk_set_prices(['SKU-0', 'SKU-1', 'SKU-9'], [-500, 700, 100])
+        assert rejected == [
+            {'row': 0, 'sku': 'SKU-0', 'price': -500, 'rule': 'EC-001'},
+            {'row': 2, 'sku': 'SKU-9', 'price': 100, 'rule': 'unknown-sku'},
+        ]
+        assert catalog.price('SKU-0') == 1000
+        assert catalog.price('SKU-1') == 700
+
+    @pytest.mark.business_rule
+    def test_add_negative_price(self):
+        """RÈGLE MÉTIER EC-001 : un produit ne peut pas être créé avec un prix négatif"""
+        with pytest.raises(ValueError, match="EC-001"):
+            ProductCatalog().add('SKU-X', -1)
+
+    def test_sku_with_newline_rejected(self):
+        """Un SKU contenant un retour à la ligne corromprait le fichier : il est refusé"""
+        catalog = ProductCatalog()
+        with pytest.raises(ValueError, match='SKU invalide'):
+            catalog.add('A\nB', 100)
+        rejected = catalog.add_many(['A\nB', 'C'], [100, 200])
+        assert [(r['sku'], r['rule']) for r in rejected] == [('A\nB', 'invalid-sku')]
+        assert catalog.skus == ['C']
+
+    def test_length_mismatch(self):
+        """Des colonnes de longueurs différentes sont refusées"""
+        with pytest.raises(ValueError):
+            _catalog().bulk_set_prices(['SKU-0'], [1, 2])
+
+
+class TestAggregates:
+    """Tests pour les totaux du catalogue"""
+
+    def test_total_ignores_inactive(self):
+        """Les produits inactifs ne comptent pas dans le total"""
+        catalog = _catalog()
+        catalog.set_flags('SKU-4', 0)
+        assert catalog.total() == 4000
+        assert catalog.total(active_only=False) == 5000
+
+    def test_bulk_discount_threshold_inclusive(self):
+        """La remise de 15% s'applique dès que le seuil est atteint"""
+        assert _catalog(count=10).bulk_discount_total(threshold=10) == 8500
+        assert _catalog(count=9).bulk_discount_total(threshold=10) == 9000
+
+    def test_bulk_discount_only_discountable(self):
+        """Seuls les produits remisables bénéficient de la remise"""
+        catalog = _catalog(count=10)
+        catalog.set_flags('SKU-0', FLAG_ACTIVE)
+        assert catalog.bulk_discount_total(threshold=10) == 1000 + 9 * 850
+
+    def test_to_cents(self):
+        """Les prix en euros sont convertis sans erreur de virgule flottante"""
+        assert to_cents(19.99) == 1999
+        assert to_cents('0.005') == 1
+
+
+class TestPersistence:
+    """Tests pour l'enregistrement et l'ouverture en mémoire partagée"""
+
+    def test_round_trip(self, tmp_path):
+        """Un catalogue rouvert contient les mêmes produits"""
+        catalog = _catalog()
+        catalog.set_flags('SKU-2', 0)
+        catalog.save(tmp_path / 'catalog.bin')
+
+        with ProductCatalog.open(tmp_path / 'catalog.bin', writable=False) as opened:
+            assert len(opened) == 5
+            assert opened.get('SKU-2') == {'sku': 'SKU-2', 'price': 1000, 'active': False, 'discountable': False}
+            assert opened.total() == 4000
+
+    def test_updates_written_in_place(self, tmp_path):
+        """Les prix mis à jour via la projection mémoire sont persistés"""
+        _catalog().save(tmp_path / 'catalog.bin')
+
+        with ProductCatalog.open(tmp_path / 'catalog.bin') as opened:
+            assert opened.bulk_set_prices(['SKU-1'], [4242]) == []
+            with pytest.raises(ValueError):
+                opened.add('SKU-NEW', 1)
+
+        with ProductCatalog.open(tmp_path / 'catalog.bin', writable=False) as reopened:
+            assert reopened.price('SKU-1') == 4242
+
+    def test_prices_little_endian(self, tmp_path):
+        """Les prix sont enregistrés en petit-boutiste, comme l'en-tête"""
+        catalog = _catalog(count=2, price=1234)
+        catalog.save(tmp_path / 'catalog.bin')
+        data = (tmp_path / 'catalog.bin').read_bytes()
+        assert struct.unpack_from('<2q', data, 24) == (1234, 1234)
+
+    def test_open_requires_little_endian_host(self, tmp_path, monkeypatch):
+        """Sur un hôte gros-boutiste, l'ouverture sans copie est refusée"""
+        _catalog().save(tmp_path / 'catalog.bin')
+        monkeypatch.setattr(sys, 'byteorder', 'big')
+        with pytest.raises(ValueError, match='gros-boutiste'):
+            ProductCatalog.open(tmp_path / 'catalog.bin')
@@ -0,0 +1,79 @@
+"""
+Tests unitaires pour le regroupement des violations Semgrep
+"""
+import sys
+sys.path.insert(0, 'scripts')
+
+from cluster_findings import (
+    normalize_snippet,
+    cluster_findings,
+    fan_out,
+    generate_synthetic_findings
+)
+
+
+def _finding(rule_id, snippet, file='src/python/a.py', line=1, severity='CRITIQUE'):
+    return {
+        'rule_id': rule_id,
+        'severity': severity,
+        'message': 'msg',
+        'file': file,
+        'line': line,
+        'snippet': snippet,
+        'metadata': {},
+    }
+
+
+class TestNormalizeSnippet:
+    """Tests pour la fonction normalize_snippet"""
+
+    def test_identifiers_and_literals_abstracted(self):
+        """Deux snippets de même forme ont la même normalisation"""
+        assert normalize_snippet("product['price'] = new_price") == \
+            normalize_snippet("item['cost'] = value")
+
+    def test_structure_preserved(self):
+        """Un plafonnement max(0, ...) change la forme"""
+        assert normalize_snippet("return a - b") != normalize_snippet("return max(0, a - b)")
+
+
+class TestClusterFindings:
+    """Tests pour la fonction cluster_findings"""
+
+    def test_same_rule_same_shape_grouped(self):
+        """Les violations de même règle et même forme sont regroupées"""
+        findings = [
+            _finding('EC', "p['price'] = x", file='a.py', line=1),
+            _finding('EC', "q['cost'] = y", file='b.py', line=7),
+            _finding('BK', "p['price'] = x", file='c.py', line=3),
+        ]
+        result = cluster_findings(findings)
+        assert result['total_findings'] == 3
+        assert result['total_clusters'] == 2
+        ec = next(c for c in result['clusters'] if c['rule_id'] == 'EC')
+        assert ec['size'] == 2
+        assert {m['file'] for m in ec['members']} == {'a.py', 'b.py'}
+
+    def test_exemplars_prefer_distinct_files(self):
+        """Les exemplaires couvrent des fichiers distincts en priorité"""
+        findings = [_finding('EC', 'x = 1', file='a.py', line=i) for i in range(5)]
+        findings.append(_finding('EC', 'y = 2', file='b.py', line=1))
+        cluster = cluster_findings(findings, exemplars=2)['clusters'][0]
+        assert [e['file'] for e in cluster['exemplars']] == ['a.py', 'b.py']
+
+    def test_synthetic_report_collapses(self):
+        """Un large rapport synthétique se réduit à quelques groupes"""
+        result = cluster_findings(generate_synthetic_findings(5000))
+        assert result['total_clusters'] < 20
+
+
+class TestFanOut:
+    """Tests pour la fonction fan_out"""
+
+    def test_suggestion_reaches_every_member(self):
+        """Une suggestion de groupe est redistribuée à chaque membre"""
+        findings = [_finding('EC', 'x = 1', line=i) for i in range(4)]
+        clusters = cluster_findings(findings)['clusters']
+        results = fan_out(clusters, {clusters[0]['cluster_id']: 'corriger'})
+        assert len(results) == 4
+        assert all(r['suggestion'] == 'corriger' for r in results)
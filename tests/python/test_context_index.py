@@ -0,0 +1,125 @@
+"""
+Tests unitaires pour l'index de recherche des contextes métier
+"""
+import os
+import sys
+sys.path.insert(0, 'scripts')
+
+from context_index import ContextIndex, split_sections, tokenize, build_query
+from llm_fix_suggester import LLMFixSuggester, MockProvider
+
+
+BANKING = """# Contexte Client : Banque
+
+## Règles métier critiques
+
+### Règle BK-001 : Prévention du découvert
+Un virement doit être refusé si le solde est insuffisant.
+
+### Règle BK-002 : Format de compte
+Le numéro de compte comporte exactement 10 chiffres.
+"""
+
+HEALTHCARE = """# Contexte Client : Santé
+
+### Règle HC-001 : Dose maximale
+La dose calculée ne doit jamais dépasser la dose maximale.
+"""
+
+
+def _contexts(tmp_path):
+    contexts = tmp_path / 'contexts'
+    contexts.mkdir()
+    (contexts / 'banking.md').write_text(BANKING)
+    (contexts / 'healthcare.md').write_text(HEALTHCARE)
+    return contexts
+
+
+class TestTokenize:
+    """Tests pour la fonction tokenize"""
+
+    def test_rule_ids_and_accents(self):
+        """Les identifiants de règles restent entiers, les accents sont retirés"""
+        assert tokenize("Règle BK-001 : Prévention") == ['regle', 'bk-001', 'prevention']
+
+    def test_test_names_split(self):
+        """Les noms de tests sont découpés en mots"""
+        assert tokenize("test_reject_insufficient_balance") == ['reject', 'insufficient', 'balance']
+
+
+class TestSplitSections:
+    """Tests pour la fonction split_sections"""
+
+    def test_hierarchical_titles(self):
+        """Chaque section porte le chemin de ses titres"""
+        sections = split_sections(BANKING)
+        assert [s['title'] for s in sections] == [
+            'Contexte Client : Banque > Règles métier critiques > Règle BK-001 : Prévention du découvert',
+            'Contexte Client : Banque > Règles métier critiques > Règle BK-002 : Format de compte',
+        ]
+
+
+class TestContextIndex:
+    """Tests pour la classe ContextIndex"""
+
+    def test_search_by_rule_id(self, tmp_path):
+        """Un identifiant de règle retrouve la bonne section"""
+        index = ContextIndex(tmp_path / 'index.json')
+        index.update(_contexts(tmp_path))
+        assert 'BK-001' in index.search('BK-001')[0]['title']
+        assert 'BK-002' in index.search('numéro de compte chiffres')[0]['title']
+
+    def test_domain_filter(self, tmp_path):
+        """La recherche peut être restreinte à un domaine"""
+        index = ContextIndex()
+        index.update(_contexts(tmp_path))
+        results = index.search('dose solde', domain='healthcare')
+        assert {r['domain'] for r in results} == {'healthcare'}
+
+    def test_incremental_update(self, tmp_path):
+        """Seuls les fichiers modifiés sont réindexés, l'index est persisté"""
+        contexts = _contexts(tmp_path)
+        index_path = tmp_path / 'index.json'
+        assert ContextIndex(index_path).update(contexts) == 2
+
+        reloaded = ContextIndex(index_path)
+        assert reloaded.update(contexts) == 0
+
+        (contexts / 'healthcare.md').write_text(HEALTHCARE + "\n### Interactions\nWarfarine et aspirine.\n")
+        os.utime(contexts / 'healthcare.md', ns=(1, 1))
+        assert reloaded.update(contexts) == 1
+        assert 'Interactions' in reloaded.search('warfarine')[0]['title']
+
+    def test_context_budget(self, tmp_path):
+        """Le contexte assemblé respecte le budget de caractères"""
+        index = ContextIndex()
+        index.update(_contexts(tmp_path))
+        context = index.context_for('banking', 'compte solde virement', k=5, budget=150)
+        assert context.startswith('### ')
+        assert context.count('### ') == 1
+
+
+class TestSuggesterIntegration:
+    """Le suggester utilise les sections pertinentes"""
+
+    def test_prompt_uses_retrieved_sections(self, tmp_path):
+        """Le contexte du prompt provient de la section correspondant à l'échec"""
+        contexts = _contexts(tmp_path)
+        suggester = LLMFixSuggester(MockProvider(), context_index=ContextIndex())
+        loaded = suggester.prepare_contexts(contexts)
+        failure = suggester.parse_test_output(
+            "FAILED test_transfer.py::test_reject_insufficient_balance - BK-001 solde insuffisant\n"
+        )
+        context = suggester.domain_context('banking', loaded, failure)
+        assert context.startswith('### Contexte Client : Banque > Règles métier critiques > Règle BK-001')
+        assert 'BK-001' in build_query(failure)
+
+    def test_fallback_to_domain_document(self, tmp_path):
+        """Sans section pertinente, le prompt reçoit le début du document du domaine"""
+        contexts = _contexts(tmp_path)
+        suggester = LLMFixSuggester(MockProvider(), context_index=ContextIndex())
+        loaded = suggester.prepare_contexts(contexts)
+        failure = suggester.parse_test_output("FAILED test_unrelated.py::test_xyz - zzz\n")
+        context = suggester.domain_context('banking', loaded, failure)
+        assert context.startswith('### Contexte Client : Banque')
+        assert 'BK-001' in context and 'HC-001' not in context
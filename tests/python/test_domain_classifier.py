@@ -0,0 +1,106 @@
+"""
+Tests unitaires pour la classification des sorties de tests par domaine
+"""
+import json
+import sys
+sys.path.insert(0, 'scripts')
+
+from domain_classifier import DomainClassifier, discover_domains, load_aliases
+from llm_fix_suggester import LLMFixSuggester, MockProvider
+from llm_scheduler import PRIORITY_CRITICAL, PRIORITY_NORMAL
+
+
+LOG = """tests/python/test_transfer.py::TestTransferFunds::test_reject FAILED
+E   Failed: Devrait refuser le virement (BK-001)
+tests/python/test_transfer.py:45: Failed
+tests/python/test_pricing.py::TestCalculateDiscount::test_negative FAILED
+"""
+
+
+class TestDomainClassifier:
+    """Tests pour la classe DomainClassifier"""
+
+    def test_aliases_and_rule_prefixes(self):
+        """Les alias et préfixes de règles comptent pour leur domaine"""
+        classifier = DomainClassifier(['banking', 'ecommerce', 'healthcare'])
+        assert classifier.count(LOG) == {'banking': 4, 'ecommerce': 2}
+        assert classifier.rank(LOG) == ['banking', 'ecommerce']
+
+    def test_case_insensitive(self):
+        """La casse est ignorée (noms de classes Java)"""
+        classifier = DomainClassifier(['ecommerce'], aliases={'ecommerce': ['pricing']})
+        assert classifier.count("at com.secpilot.ecommerce.PricingTest") == {'ecommerce': 2}
+
+    def test_rule_prefix_needs_number(self):
+        """Un préfixe de règle n'est reconnu que suivi d'un numéro"""
+        classifier = DomainClassifier([], aliases={'ecommerce': ['EC-']})
+        assert classifier.count("spec-file EC-001 ec-2") == {'ecommerce': 2}
+
+    def test_cites_rule_only_known_prefixes(self):
+        """Seuls les identifiants de règles des domaines connus sont des règles métier"""
+        classifier = DomainClassifier(['banking'], aliases={'banking': ['BK-'], 'billing': ['bl-']})
+        assert classifier.cites_rule("Failed: Devrait refuser le virement (BK-001)")
+        assert classifier.cites_rule("BL-042 violée")
+        assert not classifier.cites_rule("JIRA XX-123, encodage UT-800, niveau CRITIQUE")
+        assert not classifier.cites_rule("SBK-001 BK-0012")
+
+    def test_longest_term_wins(self):
+        """Un terme plus long l'emporte sur son préfixe"""
+        classifier = DomainClassifier([], aliases={'billing': ['pay'], 'hr': ['payroll']})
+        assert classifier.count("payroll pay") == {'hr': 1, 'billing': 1}
+
+    def test_many_domains(self):
+        """Des dizaines de domaines sont classés en un seul motif"""
+        domains = [f'domain{i:02d}' for i in range(50)]
+        classifier = DomainClassifier(domains, aliases={})
+        assert classifier.rank("domain07 domain42 domain42") == ['domain42', 'domain07']
+
+
+class TestRegistry:
+    """Tests pour le registre des domaines"""
+
+    def test_discover_domains(self, tmp_path):
+        """Les domaines proviennent des documents et sous-répertoires de contexts/"""
+        (tmp_path / 'banking.md').write_text("# Banque\n")
+        (tmp_path / 'insurance').mkdir()
+        (tmp_path / 'notes.txt').write_text("")
+        assert discover_domains(tmp_path) == ['banking', 'insurance']
+
+    def test_load_aliases(self, tmp_path):
+        """Les alias configurés complètent les alias par défaut"""
+        path = tmp_path / 'aliases.json'
+        path.write_text(json.dumps({'banking': ['virement'], 'insurance': ['IN-']}))
+        aliases = load_aliases(path)
+        assert 'virement' in aliases['banking'] and 'transfer' in aliases['banking']
+        assert aliases['insurance'] == ['IN-']
+
+
+class TestSuggesterIntegration:
+    """collect_jobs s'appuie sur le registre des domaines"""
+
+    def test_jobs_ranked_by_hits(self, tmp_path):
+        """Un job par domaine détecté, le plus cité en premier"""
+        folder = tmp_path / 'artifacts' / 'test-results-python'
+        folder.mkdir(parents=True)
+        (folder / 'test-output.txt').write_text(LOG)
+        contexts = tmp_path / 'contexts'
+        contexts.mkdir()
+        (contexts / 'banking.md').write_text("# Banque\n")
+
+        suggester = LLMFixSuggester(MockProvider())
+        loaded = suggester.prepare_contexts(contexts)
+        entries = suggester.collect_jobs(tmp_path / 'artifacts', loaded, tmp_path / 'src')
+        assert [job['domain'] for job in entries[0]['jobs']] == ['banking', 'ecommerce']
+
+    def test_priority_from_known_rules(self, tmp_path):
+        """Seule une règle d'un domaine connu rend un échec prioritaire"""
+        for name, output in (('test-results-python', LOG),
+                             ('test-results-java', "FAILED testTransfer - XX-123 CRITIQUE transfer\n")):
+            folder = tmp_path / 'artifacts' / name
+            folder.mkdir(parents=True)
+            (folder / 'test-output.txt').write_text(output)
+
+        suggester = LLMFixSuggester(MockProvider())
+        entries = suggester.collect_jobs(tmp_path / 'artifacts', suggester.prepare_contexts(tmp_path), tmp_path / 'src')
+        priorities = {entry['language']: entry['jobs'][0]['priority'] for entry in entries}
+        assert priorities == {'python': PRIORITY_CRITICAL, 'java': PRIORITY_NORMAL}
@@ -0,0 +1,232 @@
+"""
+Tests unitaires pour l'historique des signatures d'échecs
+"""
+import sys
+import shutil
+from pathlib import Path
+sys.path.insert(0, 'scripts')
+
+from failure_history import FailureHistory, extract_failures, job_key, normalize_frames
+from llm_fix_suggester import LLMProvider, LLMFixSuggester
+
+
+PYTHON_TRACEBACK = """Traceback (most recent call last):
+  File "/build/src/python/banking/transfer.py", line {line}, in transfer_funds
+    raise ValueError("Solde insuffisant")
+  File "/build/src/python/banking/transfer.py", line {line}, in transfer_funds
+ValueError: Solde insuffisant <Account object at 0x{address}>"""
+
+NODE_TRACEBACK = """TypeError: Cannot read properties of undefined
+    at applyDiscount (/build/src/javascript/ecommerce/pricing.js:{line}:13)
+    at Object.<anonymous> (/build/tests/javascript/pricing.test.js:12:5)"""
+
+JAVA_TRACEBACK = """java.lang.IllegalStateException: dosage
+    at com.secpilot.healthcare.Dosage.compute(Dosage.java:{line})
+    at com.secpilot.healthcare.DosageTest.testMax(DosageTest.java:30)"""
+
+REPORT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuite name="pytest" tests="1"><testcase classname="tests.test_transfer" name="test_balance">{result}</testcase>
+</testsuite>
+"""
+
+FAILURE = '<failure message="AssertionError: BK-001 violée">tests/test_transfer.py:{line}: AssertionError</failure>'
+
+
+class CountingProvider(LLMProvider):
+    """Provider factice qui compte les appels"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt):
+        self.calls += 1
+        return f"suggestion {self.calls}"
+
+
+def _failure(test_id, traceback):
+    return {'failures': [{'test_id': test_id, 'message': '', 'traceback': traceback}]}
+
+
+def _signature(test_id, traceback):
+    return extract_failures(_failure(test_id, traceback))[0]
+
+
+class TestSignatures:
+    """Tests pour la normalisation des signatures"""
+
+    def test_line_numbers_and_addresses_ignored(self):
+        """Une modification du numéro de ligne ou de l'adresse ne change pas la signature"""
+        first = _signature('test_balance', PYTHON_TRACEBACK.format(line=12, address='7f3a'))
+        second = _signature('test_balance', PYTHON_TRACEBACK.format(line=48, address='55e0'))
+        assert first['signature'] == second['signature']
+        assert first['exception'] == 'ValueError'
+        assert first['frames'] == ['/build/src/python/banking/transfer.py:transfer_funds']
+
+    def test_node_and_java_frames(self):
+        """Les frames Node.js et Java sont reconnues"""
+        assert normalize_frames(NODE_TRACEBACK.format(line=7)) == [
+            'applyDiscount:/build/src/javascript/ecommerce/pricing.js',
+            'Object.<anonymous>:/build/tests/javascript/pricing.test.js',
+        ]
+        java = _signature('DosageTest::testMax', JAVA_TRACEBACK.format(line=3))
+        assert java['exception'] == 'IllegalStateException'
+        assert java['frames'][0] == 'com.secpilot.healthcare.Dosage.compute:Dosage.java'
+        assert java['signature'] == _signature('DosageTest::testMax', JAVA_TRACEBACK.format(line=99))['signature']
+
+    def test_different_test_different_signature(self):
+        """Le même échec dans deux tests donne deux signatures"""
+        traceback = PYTHON_TRACEBACK.format(line=1, address='1')
+        assert _signature('test_a', traceback)['signature'] != _signature('test_b', traceback)['signature']
+
+    def test_text_output_fallback(self):
+        """Sans rapport JUnit, les signatures sont extraites des lignes FAILED"""
+        failures = extract_failures({'failed_tests': ['FAILED tests/test_transfer.py::test_balance - AssertionError']})
+        assert failures[0]['test_id'] == 'tests/test_transfer.py::test_balance'
+        assert failures[0]['exception'] == 'AssertionError'
+
+    def test_job_key_order_independent(self):
+        """La clé d'un job ne dépend pas de l'ordre des échecs"""
+        failures = [_signature('a', ''), _signature('b', '')]
+        assert job_key('python', 'banking', failures) == job_key('python', 'banking', failures[::-1])
+        assert job_key('python', 'banking', failures) != job_key('java', 'banking', failures)
+
+
+class TestFailureHistory:
+    """Tests pour la classe FailureHistory"""
+
+    def test_occurrences_counted(self, tmp_path):
+        """Une signature revue incrémente son nombre d'occurrences"""
+        history = FailureHistory(tmp_path / 'history.db')
+        failures = extract_failures(_failure('test_balance', PYTHON_TRACEBACK.format(line=1, address='1')))
+        history.record_failures(failures, 'python', 'banking', 'hash')
+        history.record_failures(failures, 'python', 'banking', 'hash')
+        history.record_suggestion('key', 'suggestion', 'hash')
+        assert history.stats() == {'signatures': 1, 'occurrences': 2, 'flaky': 0, 'suggestions': 1, 'reused': 0}
+        history.close()
+
+    def test_batched_lookup(self, tmp_path):
+        """La recherche par test accepte plus d'identifiants que la limite de paramètres SQLite"""
+        history = FailureHistory(tmp_path / 'history.db')
+        history.record_failures([_signature('test_1999', '')], 'python', 'banking', 'hash')
+        rows = history.failing_signatures(f'test_{i}' for i in range(2000))
+        assert [row['test_id'] for row in rows] == ['test_1999']
+        history.close()
+
+
+class TestSuggesterHistory:
+    """Intégration de l'historique dans LLMFixSuggester"""
+
+    def _run(self, tmp_path, provider, history, result, line=45):
+        artifacts = tmp_path / 'artifacts'
+        folder = artifacts / 'test-results-python'
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / 'junit.xml').write_text(REPORT.format(result=result.format(line=line)))
+        return LLMFixSuggester(provider, history=history).process_artifacts(
+            artifacts, tmp_path / 'contexts', tmp_path / 'src'
+        )
+
+    def _setup(self, tmp_path):
+        (tmp_path / 'contexts').mkdir()
+        (tmp_path / 'contexts' / 'banking.md').write_text("# Banque\n")
+        (tmp_path / 'src').mkdir()
+        (tmp_path / 'src' / 'banking.py').write_text("def transfer_funds(): pass\n")
+        return FailureHistory(tmp_path / 'history.db')
+
+    def test_known_signature_reused(self, tmp_path):
+        """Un échec déjà analysé reprend la suggestion sans appeler le LLM"""
+        history = self._setup(tmp_path)
+        provider = CountingProvider()
+        self._run(tmp_path, provider, history, FAILURE, line=45)
+        report = self._run(tmp_path, provider, history, FAILURE, line=52)
+
+        assert provider.calls == 1
+        assert 'suggestion reprise de l\'historique' in report
+        assert 'suggestion 1' in report
+        assert history.stats()['reused'] == 1
+        history.close()
+
+    def test_flaky_failure_skipped(self, tmp_path):
+        """Un échec disparu sans modification du code est marqué instable et n'est plus analysé"""
+        history = self._setup(tmp_path)
+        provider = CountingProvider()
+        self._run(tmp_path, provider, history, FAILURE)
+        self._run(tmp_path, provider, history, '')
+        assert history.stats()['flaky'] == 1
+
+        report = self._run(tmp_path, provider, history, FAILURE)
+        assert provider.calls == 1
+        assert 'Échec instable' in report
+        history.close()
+
+    def test_fixed_failure_not_flaky(self, tmp_path):
+        """Un échec corrigé par une modification du code n'est pas marqué instable"""
+        history = self._setup(tmp_path)
+        provider = CountingProvider()
+        self._run(tmp_path, provider, history, FAILURE)
+        (tmp_path / 'src' / 'banking.py').write_text("def transfer_funds(): check_balance()\n")
+        self._run(tmp_path, provider, history, '')
+        assert history.stats()['flaky'] == 0
+        history.close()
+
+    def test_flaky_cleared_after_code_change(self, tmp_path):
+        """Un échec instable qui réapparaît sur un code modifié est de nouveau analysé"""
+        history = self._setup(tmp_path)
+        provider = CountingProvider()
+        self._run(tmp_path, provider, history, FAILURE)
+        self._run(tmp_path, provider, history, '')
+        assert history.stats()['flaky'] == 1
+
+        (tmp_path / 'src' / 'banking.py').write_text("def transfer_funds(): debit()\n")
+        report = self._run(tmp_path, provider, history, FAILURE)
+        assert provider.calls == 2
+        assert 'Échec instable' not in report
+        assert history.stats()['flaky'] == 0
+        history.close()
+
+    def test_suggestion_not_reused_after_code_change(self, tmp_path):
+        """La suggestion enregistrée n'est pas reprise quand le code source a changé"""
+        history = self._setup(tmp_path)
+        provider = CountingProvider()
+        self._run(tmp_path, provider, history, FAILURE)
+        (tmp_path / 'src' / 'banking.py').write_text("def transfer_funds(): debit()\n")
+        report = self._run(tmp_path, provider, history, FAILURE)
+
+        assert provider.calls == 2
+        assert 'suggestion 2' in report
+        assert history.stats()['reused'] == 0
+        history.close()
+
+    def test_real_source_layout(self, tmp_path):
+        """Arborescence src/<langage>/<domaine>/ : correction, puis régression sur un code encore modifié"""
+        history = self._setup(tmp_path)
+        (tmp_path / 'src' / 'banking.py').unlink()
+        shutil.copytree('src/python', tmp_path / 'src' / 'python')
+        transfer = tmp_path / 'src' / 'python' / 'banking' / 'transfer.py'
+        provider = CountingProvider()
+
+        self._run(tmp_path, provider, history, FAILURE)
+        transfer.write_text(transfer.read_text() + "\n# v2 : correction\n")
+        self._run(tmp_path, provider, history, '')
+        assert history.stats()['flaky'] == 0
+
+        transfer.write_text(transfer.read_text() + "\n# v3 : régression\n")
+        report = self._run(tmp_path, provider, history, FAILURE)
+        assert provider.calls == 2
+        assert 'suggestion 2' in report
+        assert history.stats()['reused'] == 0
+        history.close()
+
+
+class TestDomainSources:
+    """Code source d'un domaine dans l'arborescence du dépôt"""
+
+    def test_domain_directory(self):
+        """Les fichiers sous src/<langage>/.../<domaine>/ sont chargés, quel que soit leur nom"""
+        suggester = LLMFixSuggester(CountingProvider())
+        src = Path('src')
+        assert 'def transfer_funds' in suggester.load_source_code(src, 'python', 'banking')
+        assert [p.name for p in suggester.source_files(src, 'python', 'ecommerce')] == [
+            '__init__.py', 'catalog.py', 'pricing.py'
+        ]
+        assert 'class Transfer' in suggester.load_source_code(src, 'java', 'banking')
+        assert 'transfer' in suggester.load_source_code(src, 'javascript', 'banking').lower()
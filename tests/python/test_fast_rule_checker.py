@@ -0,0 +1,119 @@
+"""
+Tests unitaires pour le vérificateur rapide des règles métier
+Parité avec la sortie Semgrep enregistrée dans tests/python/fixtures, générée par :
+
+    semgrep --config .semgrep.yml --sarif src/python -o tests/python/fixtures/semgrep_src_python.sarif
+    semgrep --config .semgrep.yml --sarif tests/python/fixtures/rule_sources \
+        -o tests/python/fixtures/semgrep_rule_sources.sarif
+
+(la seconde commande avec un .semgrepignore vide, tests/ étant exclu par défaut)
+"""
+import pytest
+import sys
+sys.path.insert(0, 'scripts')
+
+import fast_rule_checker
+from fast_rule_checker import RULES, check_file, check_paths
+from parse_semgrep_findings import parse_sarif
+
+
+SEMGREP_FIXTURE = 'tests/python/fixtures/semgrep_src_python.sarif'
+
+# Sources de chaque règle en version fautive et conforme, avec la sortie Semgrep correspondante
+RULE_SOURCES = 'tests/python/fixtures/rule_sources'
+RULE_SOURCES_FIXTURE = 'tests/python/fixtures/semgrep_rule_sources.sarif'
+
+
+def _keys(findings):
+    return {(f['rule_id'], f['file'], f['line']) for f in findings if f['rule_id'] in RULES}
+
+
+def _check_source(tmp_path, source):
+    path = tmp_path / 'module.py'
+    path.write_text(source)
+    return [f['rule_id'] for f in check_file(str(path))]
+
+
+class TestSemgrepParity:
+    """Parité avec les résultats Semgrep sur src/python"""
+
+    @pytest.mark.parametrize('path, fixture', [
+        ('src/python', SEMGREP_FIXTURE),
+        (RULE_SOURCES, RULE_SOURCES_FIXTURE),
+    ])
+    def test_same_findings_as_semgrep(self, path, fixture):
+        """Les violations des règles couvertes sont identiques à celles de Semgrep"""
+        expected = parse_sarif(fixture)
+        actual = check_paths([path], workers=1)
+        assert _keys(actual['findings']) == _keys(expected['findings'])
+
+    def test_same_business_metadata(self):
+        """Règle métier et domaine lus dans la sortie Semgrep concordent avec ceux du vérificateur"""
+        expected = {f['rule_id']: f['metadata'] for f in parse_sarif(RULE_SOURCES_FIXTURE)['findings']}
+        actual = {f['rule_id']: f['metadata'] for f in check_paths([RULE_SOURCES], workers=1)['findings']}
+        for rule_id, metadata in actual.items():
+            assert expected[rule_id]['business_rule'] == metadata['business_rule']
+            assert expected[rule_id]['domain'] == metadata['domain']
+
+    def test_every_rule_covered(self):
+        """Chaque règle couverte est déclenchée au moins une fois par la sortie Semgrep de référence"""
+        expected = parse_sarif(RULE_SOURCES_FIXTURE)
+        assert {f['rule_id'] for f in expected['findings']} == set(RULES)
+
+    def test_same_record_format(self):
+        """Le rapport a le même format que parse_sarif"""
+        expected = parse_sarif(SEMGREP_FIXTURE)
+        actual = check_paths(['src/python'], workers=1)
+        assert set(actual) == set(expected)
+        assert set(actual['findings'][0]) == set(expected['findings'][0])
+
+    def test_parallel_matches_serial(self, monkeypatch):
+        """Le pool de processus donne le même résultat que l'exécution séquentielle"""
+        serial = check_paths(['src/python'], workers=1)
+        monkeypatch.setattr(fast_rule_checker, 'PARALLEL_THRESHOLD', 0)
+        parallel = check_paths(['src/python'], workers=2)
+        assert serial == parallel
+
+
+class TestRules:
+    """Les versions corrigées ne déclenchent pas les règles"""
+
+    def test_price_guard_silences_ec001(self, tmp_path):
+        """EC-001 : un contrôle `if new_price < 0` supprime la violation"""
+        assert _check_source(tmp_path, (
+            "def set_product_price(product, new_price):\n"
+            "    if new_price < 0:\n"
+            "        raise ValueError('Price cannot be negative')\n"
+            "    product['price'] = new_price\n"
+        )) == []
+
+    def test_capped_discount_silences_ec001(self, tmp_path):
+        """EC-001 : return max(0, ...) supprime la violation"""
+        assert _check_source(tmp_path, (
+            "def calculate_discount(price, discount):\n"
+            "    return max(0, price - price * discount / 100)\n"
+        )) == []
+        assert _check_source(tmp_path, (
+            "def calculate_discount(price, discount):\n"
+            "    return price - price * discount / 100\n"
+        )) == ['ecommerce-discount-can-return-negative']
+
+    def test_balance_check_silences_bk001(self, tmp_path):
+        """BK-001 : un contrôle du solde supprime la violation"""
+        assert _check_source(tmp_path, (
+            "def transfer_funds(src, dst, amount):\n"
+            "    if src['balance'] < amount:\n"
+            "        raise ValueError('Insufficient balance')\n"
+            "    src['balance'] -= amount\n"
+        )) == []
+
+    def test_uncapped_dose_triggers_hc001(self, tmp_path):
+        """HC-001 : une dose non plafonnée est détectée, min(...) la corrige"""
+        assert _check_source(tmp_path, (
+            "def calculate_dosage(weight, dose_per_kg, medication):\n"
+            "    return weight * dose_per_kg\n"
+        )) == ['healthcare-missing-dosage-cap-python']
+        assert _check_source(tmp_path, (
+            "def calculate_dosage(weight, dose_per_kg, medication):\n"
+            "    return min(weight * dose_per_kg, 4000)\n"
+        )) == []
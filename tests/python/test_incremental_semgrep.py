@@ -0,0 +1,110 @@
+"""
+Tests unitaires pour le scan Semgrep incrémental
+"""
+import json
+import subprocess
+import sys
+sys.path.insert(0, 'scripts')
+
+from incremental_semgrep import incremental_scan, build_sarif, changed_files, target_files
+from parse_semgrep_findings import parse_sarif
+
+
+RULE = {"id": "ecommerce-no-negative-price-python",
+        "properties": {"business_rule": "EC-001", "domain": "ecommerce"}}
+
+
+class FakeScanner:
+    """Scanner de test : une violation à la ligne 1 de chaque fichier"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, files, rules_path):
+        self.calls.append(list(files))
+        results = [{
+            "ruleId": RULE["id"],
+            "level": "error",
+            "message": {"text": "prix négatif"},
+            "locations": [{"physicalLocation": {
+                "artifactLocation": {"uri": f},
+                "region": {"startLine": 1},
+            }}],
+        } for f in files]
+        return build_sarif([RULE], results)
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'rules.yml').write_text('rules: []\n')
+    for name in ('a.py', 'b.py', 'c.py'):
+        (tmp_path / name).write_text(f'# {name}\n')
+    return ['a.py', 'b.py', 'c.py']
+
+
+class TestIncrementalScan:
+    """Tests pour la fonction incremental_scan"""
+
+    def test_only_changed_files_rescanned(self, tmp_path, monkeypatch):
+        """Au second passage, seuls les fichiers modifiés sont scannés"""
+        files = _setup(tmp_path, monkeypatch)
+        scanner = FakeScanner()
+        incremental_scan(files, set(files), 'rules.yml', tmp_path / 'cache', scanner)
+
+        (tmp_path / 'b.py').write_text('# modifié\n')
+        sarif = incremental_scan(files, {'b.py'}, 'rules.yml', tmp_path / 'cache', scanner)
+
+        assert scanner.calls[-1] == ['b.py']
+        assert sarif["runs"][0]["properties"] == {"scanned_files": 1, "cached_files": 2}
+
+    def test_cache_miss_is_scanned(self, tmp_path, monkeypatch):
+        """Un fichier non modifié mais absent du cache est scanné"""
+        files = _setup(tmp_path, monkeypatch)
+        scanner = FakeScanner()
+        incremental_scan(files, set(), 'rules.yml', tmp_path / 'cache', scanner)
+        assert scanner.calls == [files]
+
+    def test_rules_change_invalidates_cache(self, tmp_path, monkeypatch):
+        """Modifier le fichier de règles invalide le cache"""
+        files = _setup(tmp_path, monkeypatch)
+        scanner = FakeScanner()
+        incremental_scan(files, set(files), 'rules.yml', tmp_path / 'cache', scanner)
+        (tmp_path / 'rules.yml').write_text('rules: [x]\n')
+        incremental_scan(files, set(), 'rules.yml', tmp_path / 'cache', scanner)
+        assert scanner.calls[-1] == files
+
+    def test_merged_sarif_parses(self, tmp_path, monkeypatch):
+        """Le SARIF fusionné est consommé tel quel par parse_sarif"""
+        files = _setup(tmp_path, monkeypatch)
+        scanner = FakeScanner()
+        incremental_scan(files, set(files), 'rules.yml', tmp_path / 'cache', scanner)
+        sarif = incremental_scan(files, set(), 'rules.yml', tmp_path / 'cache', scanner)
+
+        (tmp_path / 'merged.sarif').write_text(json.dumps(sarif))
+        data = parse_sarif(str(tmp_path / 'merged.sarif'))
+        assert data["total_findings"] == 3
+        assert sorted(f["file"] for f in data["findings"]) == files
+        assert data["by_domain"] == {"ecommerce": 3}
+
+
+class TestGitFiles:
+    """Fichiers modifiés et fichiers suivis, lus depuis git"""
+
+    def test_changed_files_from_subdirectory(self, tmp_path, monkeypatch):
+        """Depuis un sous-répertoire, les fichiers modifiés correspondent aux fichiers suivis"""
+        def git(*args):
+            subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args],
+                           cwd=tmp_path, check=True, capture_output=True)
+
+        (tmp_path / 'src' / 'banking').mkdir(parents=True)
+        (tmp_path / 'src' / 'banking' / 'transfer.py').write_text('# v1\n')
+        (tmp_path / 'src' / 'pricing.py').write_text('# v1\n')
+        git('init', '-q')
+        git('add', '.')
+        git('commit', '-q', '-m', 'v1')
+        (tmp_path / 'src' / 'banking' / 'transfer.py').write_text('# v2\n')
+
+        monkeypatch.chdir(tmp_path / 'src')
+        files = target_files(['.'])
+        assert files == ['banking/transfer.py', 'pricing.py']
+        assert changed_files('HEAD') & set(files) == {'banking/transfer.py'}
@@ -0,0 +1,160 @@
+"""
+Tests unitaires pour la lecture des rapports JUnit XML
+"""
+import gc
+import os
+import sys
+import pytest
+sys.path.insert(0, 'scripts')
+
+import junit_reports
+from junit_reports import find_junit_reports, iter_testcases, parse_junit_reports
+from llm_fix_suggester import LLMFixSuggester, MockProvider
+
+
+PYTEST_REPORT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites name="pytest tests"><testsuite name="pytest" failures="1" tests="3">
+<testcase classname="tests.python.test_transfer.TestTransferFunds" name="test_successful_transfer" />
+<testcase classname="tests.python.test_transfer.TestTransferFunds" name="test_reject_insufficient_balance">
+<failure message="Failed: Devrait refuser le virement (BK-001)">def test_reject_insufficient_balance(self):
+E   Failed: Devrait refuser le virement (BK-001)
+
+tests/python/test_transfer.py:45: Failed</failure></testcase>
+<testcase classname="tests.python.test_transfer.TestTransferFunds" name="test_skipped"><skipped /></testcase>
+</testsuite></testsuites>
+"""
+
+SUREFIRE_REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuite name="com.secpilot.PricingTest" tests="2" failures="0" errors="1">
+<testcase name="testNegativePrice" classname="com.secpilot.PricingTest">
+<error message="Expected exception" type="org.opentest4j.AssertionFailedError">at com.secpilot.PricingTest.testNegativePrice(PricingTest.java:42)</error>
+</testcase>
+<testcase name="testDiscount" classname="com.secpilot.PricingTest" />
+</testsuite>
+"""
+
+
+def _write(folder, name, content):
+    path = folder / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+class TestIterTestcases:
+    """Tests pour la fonction iter_testcases"""
+
+    def test_statuses_and_ids(self, tmp_path):
+        """Chaque testcase est lu avec son identifiant et son statut"""
+        report = _write(tmp_path, 'junit.xml', PYTEST_REPORT)
+        cases = [(test_id, status) for test_id, status, _, _ in iter_testcases(report)]
+        assert cases == [
+            ('tests.python.test_transfer.TestTransferFunds::test_successful_transfer', 'passed'),
+            ('tests.python.test_transfer.TestTransferFunds::test_reject_insufficient_balance', 'failed'),
+            ('tests.python.test_transfer.TestTransferFunds::test_skipped', 'skipped'),
+        ]
+
+    def test_surefire_error(self, tmp_path):
+        """Les rapports Surefire (<testsuite> racine, <error>) sont lus"""
+        report = _write(tmp_path, 'TEST-com.secpilot.PricingTest.xml', SUREFIRE_REPORT)
+        failures = [c for c in iter_testcases(report) if c[1] != 'passed']
+        assert failures[0][:3] == ('com.secpilot.PricingTest::testNegativePrice', 'error', 'Expected exception')
+        assert 'PricingTest.java:42' in failures[0][3]
+
+    def test_processed_testcases_released(self, tmp_path):
+        """Les testcases traités sont retirés de l'arbre (mémoire constante)"""
+        body = ''.join(f'<testcase classname="c" name="t{i}" />' for i in range(1000))
+        report = _write(tmp_path, 'big.xml', f'<testsuites><testsuite name="s">{body}</testsuite></testsuites>')
+        import xml.etree.ElementTree as ET
+        parents = []
+        original = ET.iterparse
+
+        def spy(*args, **kwargs):
+            for event, elem in original(*args, **kwargs):
+                if event == 'start' and elem.tag == 'testsuite':
+                    parents.append(elem)
+                yield event, elem
+
+        import junit_reports
+        junit_reports.ET.iterparse = spy
+        try:
+            assert sum(1 for _ in iter_testcases(report)) == 1000
+        finally:
+            junit_reports.ET.iterparse = original
+        assert len(parents[0]) == 0
+
+
+class TestParseJunitReports:
+    """Tests pour la fonction parse_junit_reports"""
+
+    def test_failure_structure(self, tmp_path):
+        """La structure produite est celle de parse_test_output"""
+        report = _write(tmp_path, 'junit.xml', PYTEST_REPORT)
+        result = parse_junit_reports([report])
+        assert result['failed_tests'] == [
+            'FAILED tests.python.test_transfer.TestTransferFunds::test_reject_insufficient_balance'
+            ' - Failed: Devrait refuser le virement (BK-001)'
+        ]
+        assert 'test_transfer.py:45' in result['error_messages'][0]
+        assert len(result['passed_tests']) == 1
+
+    def test_passed_tests_capped(self, tmp_path, monkeypatch):
+        """Au-delà de MAX_PASSED_TESTS, les tests réussis sont comptés sans être conservés"""
+        monkeypatch.setattr(junit_reports, 'MAX_PASSED_TESTS', 2)
+        cases = ''.join(f'<testcase classname="t" name="test_{i}" />' for i in range(5))
+        path = _write(tmp_path, 'junit.xml', f'<testsuite name="s">{cases}</testsuite>')
+        result = parse_junit_reports([path])
+        assert result['passed_tests'] == ['t::test_0', 't::test_1']
+        assert result['total_passed'] == 5
+
+    @pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='/proc/self/fd requis')
+    def test_detection_closes_files(self, tmp_path):
+        """La détection des rapports ne laisse aucun descripteur ouvert, même sans ramasse-miettes"""
+        for i in range(20):
+            _write(tmp_path, f'report-{i}.xml', PYTEST_REPORT)
+        gc.disable()
+        try:
+            before = len(os.listdir('/proc/self/fd'))
+            assert len(find_junit_reports(tmp_path)) == 20
+            assert len(os.listdir('/proc/self/fd')) == before
+        finally:
+            gc.enable()
+
+    def test_non_junit_xml_ignored(self, tmp_path):
+        """Les autres fichiers XML ne sont pas pris pour des rapports"""
+        _write(tmp_path, 'pom.xml', '<project></project>')
+        _write(tmp_path, 'reports/junit.xml', PYTEST_REPORT)
+        assert [p.name for p in find_junit_reports(tmp_path)] == ['junit.xml']
+
+
+class TestSuggesterIngestion:
+    """process_artifacts préfère les rapports structurés"""
+
+    def test_junit_preferred_over_text(self, tmp_path):
+        """Avec un rapport JUnit, le texte brut n'est pas analysé"""
+        folder = tmp_path / 'test-results-python'
+        _write(folder, 'junit.xml', PYTEST_REPORT)
+        _write(folder, 'test-output.txt', "Error: ligne sans rapport avec un échec\n")
+        failure = LLMFixSuggester(MockProvider()).load_test_failure(folder, 'python')
+        assert failure['source'] == 'junit'
+        assert len(failure['failed_tests']) == 1
+
+    def test_text_fallback(self, tmp_path):
+        """Sans rapport structuré, test-output.txt est analysé"""
+        folder = tmp_path / 'test-results-python'
+        _write(folder, 'test-output.txt', "FAILED test_x\n")
+        failure = LLMFixSuggester(MockProvider()).load_test_failure(folder, 'python')
+        assert failure['failed_tests'] == ['FAILED test_x']
+
+    def test_truncated_report_falls_back_to_text(self, tmp_path):
+        """Un rapport tronqué est ignoré au profit de test-output.txt"""
+        _write(tmp_path, 'junit.xml', PYTEST_REPORT[:PYTEST_REPORT.index('<failure')])
+        _write(tmp_path, 'test-output.txt', "FAILED tests/test_transfer.py::test_balance - BK-001\n")
+        result = LLMFixSuggester(MockProvider()).load_test_failure(tmp_path, 'python')
+        assert result['failed_tests'] == ['FAILED tests/test_transfer.py::test_balance - BK-001']
+
+    def test_truncated_report_without_text(self, tmp_path):
+        """Sans test-output.txt, l'erreur de lecture du rapport est signalée"""
+        _write(tmp_path, 'junit.xml', PYTEST_REPORT[:PYTEST_REPORT.index('<failure')])
+        with pytest.raises(junit_reports.ET.ParseError):
+            LLMFixSuggester(MockProvider()).load_test_failure(tmp_path, 'python')
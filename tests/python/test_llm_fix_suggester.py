@@ -0,0 +1,270 @@
+"""
+Tests unitaires pour le script LLM Fix Suggester
+"""
+import json
+import time
+import threading
+import subprocess
+import pytest
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+sys.path.insert(0, 'scripts')
+
+import pipeline_metrics
+from llm_fix_suggester import (
+    LLMProvider,
+    LLMFixSuggester,
+    MockProvider,
+    AnthropicProvider,
+    OllamaProvider,
+    HedgedProvider,
+    LatencyHistogram,
+    CacheablePrompt,
+    estimate_tokens,
+    get_provider,
+    ANTHROPIC_MIN_CACHEABLE_TOKENS
+)
+
+
+class SlowProvider(LLMProvider):
+    """Provider factice avec latence et résultat configurables"""
+
+    def __init__(self, delay, response='ok', error=None):
+        self.delay = delay
+        self.response = response
+        self.error = error
+        self.calls = 0
+
+    def generate(self, prompt):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.response
+
+
+class TestLatencyHistogram:
+    """Tests pour la classe LatencyHistogram"""
+
+    def test_no_estimate_before_min_samples(self):
+        """Sans assez d'échantillons, aucun percentile n'est estimé"""
+        histogram = LatencyHistogram(min_samples=3)
+        histogram.record(1.0)
+        assert histogram.percentile(0.95) is None
+
+    def test_p95(self):
+        """Le p95 est calculé sur la fenêtre glissante"""
+        histogram = LatencyHistogram(min_samples=1)
+        for i in range(1, 101):
+            histogram.record(float(i))
+        assert histogram.percentile(0.95) == 96.0
+
+
+class TestHedgedProvider:
+    """Tests pour la classe HedgedProvider"""
+
+    def test_fast_primary_does_not_hedge(self):
+        """Un provider principal rapide n'entraîne pas d'appel secondaire"""
+        primary, secondary = SlowProvider(0, 'primary'), SlowProvider(0, 'secondary')
+        provider = HedgedProvider([primary, secondary], initial_deadline=1.0)
+        assert provider.generate('p') == 'primary'
+        assert secondary.calls == 0
+
+    def test_slow_primary_is_hedged(self):
+        """Au-delà du délai, le secondaire est lancé et sa réponse retenue"""
+        primary, secondary = SlowProvider(1.0, 'primary'), SlowProvider(0, 'secondary')
+        provider = HedgedProvider([primary, secondary], initial_deadline=0.05)
+        start = time.monotonic()
+        assert provider.generate('p') == 'secondary'
+        assert time.monotonic() - start < 0.5
+
+    def test_error_falls_back(self):
+        """Une erreur du principal déclenche immédiatement le repli"""
+        primary = SlowProvider(0, error=RuntimeError('down'))
+        provider = HedgedProvider([primary, SlowProvider(0, 'secondary')], initial_deadline=10)
+        assert provider.generate('p') == 'secondary'
+
+    def test_all_fail(self):
+        """Si tous les providers échouent, les erreurs sont remontées"""
+        provider = HedgedProvider([
+            SlowProvider(0, error=RuntimeError('a')),
+            SlowProvider(0, response=''),
+        ])
+        with pytest.raises(RuntimeError, match='Aucun provider'):
+            provider.generate('p')
+
+    def test_losing_call_does_not_delay_exit(self):
+        """Le processus se termine sans attendre l'appel perdant encore en cours"""
+        script = (
+            "import sys, time\n"
+            "sys.path.insert(0, 'scripts')\n"
+            "from llm_fix_suggester import HedgedProvider, LLMProvider\n"
+            "class Slow(LLMProvider):\n"
+            "    def __init__(self, delay, response):\n"
+            "        self.delay, self.response = delay, response\n"
+            "    def generate(self, prompt):\n"
+            "        time.sleep(self.delay)\n"
+            "        return self.response\n"
+            "chain = HedgedProvider([Slow(5, 'slow'), Slow(0, 'fast')], initial_deadline=0.05)\n"
+            "print(chain.generate('p'))\n"
+        )
+        start = time.monotonic()
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=30)
+        assert result.stdout.strip() == 'fast'
+        assert time.monotonic() - start < 3
+
+    def test_deadline_adapts_to_latency(self):
+        """Le délai suit le p95 observé du provider"""
+        provider = HedgedProvider([SlowProvider(0)], initial_deadline=30, min_deadline=0.5)
+        for _ in range(20):
+            provider.histograms[provider.names[0]].record(2.0)
+        assert provider.deadline(0) == 2.0
+
+
+class TestGetProvider:
+    """Tests pour la factory get_provider"""
+
+    def test_chain(self):
+        """Une liste de providers crée une chaîne de repli"""
+        provider = get_provider('mock,mock')
+        assert isinstance(provider, HedgedProvider)
+        assert provider.names == ['mock', 'mock']
+        assert isinstance(provider.providers[0].provider, MockProvider)
+
+    def test_unknown(self):
+        """Un provider inconnu est refusé"""
+        with pytest.raises(ValueError):
+            get_provider('mock,unknown')
+
+
+FAILURE_A = {'raw_output': 'FAILED test_a - BK-001', 'failed_tests': ['FAILED test_a'], 'error_messages': []}
+FAILURE_B = {'raw_output': 'FAILED test_b - BK-002', 'failed_tests': ['FAILED test_b'], 'error_messages': []}
+
+
+@pytest.fixture
+def metrics():
+    registry = pipeline_metrics.enable()
+    yield registry
+    pipeline_metrics.disable()
+
+
+class TestPromptPrefix:
+    """Tests pour le découpage du prompt en préfixe stable et suffixe variable"""
+
+    def test_prefix_identical_across_jobs(self):
+        """Deux échecs du même domaine partagent un préfixe identique octet pour octet"""
+        suggester = LLMFixSuggester(MockProvider())
+        first = suggester.build_prompt(FAILURE_A, 'def a(): pass', '# Banque', 'python')
+        second = suggester.build_prompt(FAILURE_B, 'function b() {}', '# Banque', 'javascript')
+        assert first.prefix.encode('utf-8') == second.prefix.encode('utf-8')
+        assert '# Banque' in first.prefix
+        assert 'test_a' in first.suffix and 'test_a' not in first.prefix
+        assert str(first) == first.prefix + first.suffix
+
+    def test_retrieved_context_in_suffix(self):
+        """Un contexte extrait de l'index varie par échec et reste dans le suffixe"""
+        prompt = LLMFixSuggester(MockProvider()).build_prompt(
+            FAILURE_A, '', '### Règle BK-001', 'python', stable_context=False
+        )
+        assert 'BK-001' not in prompt.prefix
+        assert '### Règle BK-001' in prompt.suffix
+
+    def test_prefix_carries_only_domain_document(self):
+        """Le préfixe contient le document du domaine analysé, tronqué, et aucun autre domaine"""
+        suggester = LLMFixSuggester(MockProvider())
+        contexts = {'banking': 'B' * 5000, 'healthcare': '# Santé\nHC-001'}
+        prompt = suggester.build_prompt(
+            FAILURE_A, '', suggester.domain_context('banking', contexts, FAILURE_A), 'python'
+        )
+        assert prompt.prefix.count('B') == 2000
+        assert 'HC-001' not in str(prompt)
+        # Documents du dépôt : préfixe trop court pour le cache Anthropic, signalé par le provider
+        banking = suggester.load_context(Path('contexts'))['banking']
+        prefix = suggester.build_prompt(FAILURE_A, '', banking, 'python').prefix
+        assert estimate_tokens(prefix) < ANTHROPIC_MIN_CACHEABLE_TOKENS
+
+    def test_mock_reports_cache_hits(self, metrics, tmp_path):
+        """Avec le provider mock, les jobs suivants d'un domaine lisent le préfixe en cache"""
+        for language in ('python', 'javascript'):
+            folder = tmp_path / 'artifacts' / f'test-results-{language}'
+            folder.mkdir(parents=True)
+            (folder / 'test-output.txt').write_text(f"FAILED tests/{language}/test_transfer - BK-001\n")
+        (tmp_path / 'contexts').mkdir()
+        (tmp_path / 'contexts' / 'banking.md').write_text("# Banque\n" * 50)
+
+        LLMFixSuggester(MockProvider()).process_artifacts(
+            tmp_path / 'artifacts', tmp_path / 'contexts', tmp_path / 'src'
+        )
+        counters = metrics.to_json()['counters']
+        assert counters['provider.cache_write_tokens'] > 0
+        assert counters['provider.cached_tokens'] == counters['provider.cache_write_tokens']
+
+
+class TestProviderCaching:
+    """Les providers transmettent le préfixe de façon à être mis en cache"""
+
+    def test_anthropic_cache_control(self, metrics):
+        """Le préfixe est envoyé en prompt système marqué cache_control"""
+        calls = []
+
+        def create(**kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(
+                content=[SimpleNamespace(text='ok')],
+                usage=SimpleNamespace(input_tokens=12, cache_read_input_tokens=900, cache_creation_input_tokens=0)
+            )
+
+        provider = AnthropicProvider.__new__(AnthropicProvider)
+        provider.model = 'test'
+        provider.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+
+        assert provider.generate(CacheablePrompt('PREFIXE', 'SUFFIXE')) == 'ok'
+        assert calls[0]['system'] == [{'type': 'text', 'text': 'PREFIXE', 'cache_control': {'type': 'ephemeral'}}]
+        assert calls[0]['messages'] == [{'role': 'user', 'content': 'SUFFIXE'}]
+        assert metrics.to_json()['counters']['provider.cached_tokens'] == 900
+        # Préfixe trop court pour le cache : signalé dans les métriques
+        assert metrics.to_json()['counters']['provider.prefix_below_cache_minimum'] == 1
+        provider.model = 'claude-3-5-haiku-20241022'
+        assert provider.min_cacheable_tokens == 2048
+
+    def test_ollama_stub_server(self, metrics):
+        """Serveur Ollama local : keep_alive envoyé et préfixe identique d'un job à l'autre"""
+        pytest.importorskip('requests')
+        received = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                received.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+                body = json.dumps({'response': 'ok', 'prompt_eval_count': 7}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            provider = OllamaProvider(base_url=f'http://127.0.0.1:{server.server_port}', keep_alive='10m')
+            suggester = LLMFixSuggester(provider)
+            prompts = [
+                suggester.build_prompt(failure, source, '# Banque', 'python')
+                for failure, source in ((FAILURE_A, 'def a(): pass'), (FAILURE_B, 'def b(): pass'))
+            ]
+            for prompt in prompts:
+                assert provider.generate(prompt) == 'ok'
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert [r['keep_alive'] for r in received] == ['10m', '10m']
+        prefix = prompts[0].prefix
+        assert all(r['prompt'].startswith(prefix) for r in received)
+        assert received[0]['prompt'] != received[1]['prompt']
+        assert metrics.to_json()['counters']['provider.input_tokens'] == 14
+
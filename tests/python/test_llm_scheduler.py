@@ -0,0 +1,207 @@
+"""
+Tests unitaires pour l'ordonnanceur des appels LLM
+Utilise un provider factice qui simule des erreurs 429
+"""
+import pytest
+import sys
+sys.path.insert(0, 'scripts')
+
+import llm_scheduler
+from llm_scheduler import (
+    LLMScheduler,
+    RateLimiter,
+    RateLimitError,
+    TokenBucket,
+    rate_limit_retry_after,
+    PRIORITY_CRITICAL,
+    PRIORITY_NORMAL
+)
+from llm_fix_suggester import HedgedProvider
+
+
+class FakeClock:
+    """Horloge simulée : sleep() fait avancer le temps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FlakyProvider:
+    """Provider factice qui renvoie `failures` erreurs 429 avant de répondre"""
+
+    model = 'fake'
+
+    def __init__(self, failures=0, retry_after=None):
+        self.failures = failures
+        self.retry_after = retry_after
+        self.prompts = []
+
+    def generate(self, prompt):
+        self.prompts.append(prompt)
+        if self.failures:
+            self.failures -= 1
+            raise RateLimitError(retry_after=self.retry_after)
+        return f"ok:{prompt}"
+
+
+@pytest.fixture(autouse=True)
+def isolated_buckets(monkeypatch):
+    """Chaque test a ses propres seaux partagés"""
+    monkeypatch.setattr(llm_scheduler, '_BUCKETS', {})
+
+
+class TestTokenBucket:
+    """Tests pour la classe TokenBucket"""
+
+    def test_waits_when_empty(self):
+        """Au-delà de la capacité, acquire() attend la recharge"""
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)
+        for _ in range(60):
+            bucket.acquire(1)
+        assert clock.now == 0.0
+        bucket.acquire(1)
+        assert clock.now == pytest.approx(1.0)
+
+    def test_oversized_request_does_not_deadlock(self):
+        """Une demande supérieure à la capacité est plafonnée"""
+        clock = FakeClock()
+        bucket = TokenBucket(10, clock=clock, sleep=clock.sleep)
+        bucket.acquire(1000)
+        assert bucket.tokens == 0
+
+
+class TestRetries:
+    """Tests des réessais sur erreur 429"""
+
+    def test_retries_until_success(self):
+        """Les 429 sont réessayées puis la réponse est retournée"""
+        clock = FakeClock()
+        provider = FlakyProvider(failures=3)
+        scheduler = LLMScheduler(provider, base_delay=1.0, clock=clock, sleep=clock.sleep)
+        assert scheduler.generate('p') == 'ok:p'
+        assert scheduler.retries == 3
+        assert len(clock.sleeps) == 3
+        # Backoff exponentiel : chaque délai est dans [plafond/2, plafond]
+        for attempt, delay in enumerate(clock.sleeps):
+            assert 2 ** attempt / 2 <= delay <= 2 ** attempt
+
+    def test_retry_after_is_honored(self):
+        """Le délai Retry-After est respecté"""
+        clock = FakeClock()
+        scheduler = LLMScheduler(FlakyProvider(failures=1, retry_after=30), clock=clock, sleep=clock.sleep)
+        scheduler.generate('p')
+        assert clock.sleeps[0] >= 30
+
+    def test_gives_up_after_max_retries(self):
+        """Après max_retries, l'erreur est propagée"""
+        clock = FakeClock()
+        scheduler = LLMScheduler(FlakyProvider(failures=10), max_retries=2, clock=clock, sleep=clock.sleep)
+        with pytest.raises(RateLimitError):
+            scheduler.generate('p')
+
+    def test_other_errors_not_retried(self):
+        """Les erreurs autres que 429 ne sont pas réessayées"""
+        class Broken:
+            def generate(self, prompt):
+                raise ValueError('boom')
+
+        scheduler = LLMScheduler(Broken(), sleep=lambda s: None)
+        with pytest.raises(ValueError):
+            scheduler.generate('p')
+        assert scheduler.retries == 0
+
+    def test_http_status_detection(self):
+        """Les erreurs SDK/HTTP avec status_code 429 sont reconnues"""
+        class Response:
+            status_code = 429
+            headers = {'retry-after': '12'}
+
+        class HTTPError(Exception):
+            response = Response()
+
+        assert rate_limit_retry_after(HTTPError()) == (True, 12.0)
+        assert rate_limit_retry_after(ValueError()) == (False, None)
+
+
+class TestPriority:
+    """Tests de l'ordre de traitement"""
+
+    def test_critical_jobs_first(self):
+        """Les jobs critiques sont traités avant les autres"""
+        provider = FlakyProvider()
+        scheduler = LLMScheduler(provider, concurrency=1)
+        results = scheduler.run([
+            (PRIORITY_NORMAL, 'a'),
+            (PRIORITY_CRITICAL, 'b'),
+            (PRIORITY_NORMAL, 'c'),
+        ])
+        assert provider.prompts == ['b', 'a', 'c']
+        assert results == ['ok:a', 'ok:b', 'ok:c']
+
+    def test_errors_returned_in_place(self):
+        """Une erreur définitive est retournée à la place de la réponse"""
+        scheduler = LLMScheduler(FlakyProvider(failures=5), max_retries=1, sleep=lambda s: None)
+        results = scheduler.run([(PRIORITY_NORMAL, 'a'), (PRIORITY_NORMAL, 'b')])
+        assert isinstance(results[0], RateLimitError)
+
+    def test_request_rate_limited(self):
+        """Le débit de requêtes est limité par provider et modèle"""
+        clock = FakeClock()
+        scheduler = LLMScheduler(FlakyProvider(), requests_per_minute=2, clock=clock, sleep=clock.sleep)
+        scheduler.run([(PRIORITY_NORMAL, str(i)) for i in range(4)])
+        assert clock.now == pytest.approx(60.0)
+
+
+class TestFallbackChain:
+    """Limites et réessais appliqués à chaque provider d'une chaîne de repli"""
+
+    def test_buckets_per_child_provider(self):
+        """Chaque provider de la chaîne garde ses propres seaux (provider, modèle)"""
+        class Primary(FlakyProvider):
+            model = 'primary-model'
+
+        clock = FakeClock()
+        chain = HedgedProvider(
+            [RateLimiter(child, requests_per_minute=2, clock=clock, sleep=clock.sleep)
+             for child in (Primary(), FlakyProvider())],
+            names=['primary', 'secondary']
+        )
+        LLMScheduler(chain, requests_per_minute=2, clock=clock, sleep=clock.sleep)
+        assert set(llm_scheduler._BUCKETS) == {
+            ('Primary', 'primary-model', 'requests'),
+            ('FlakyProvider', 'fake', 'requests'),
+        }
+
+    def test_rate_limit_retried_before_fallback(self):
+        """Un 429 du provider principal est réessayé avec backoff au lieu de passer au suivant"""
+        primary, secondary = FlakyProvider(failures=2), FlakyProvider()
+        chain = HedgedProvider([RateLimiter(p, sleep=lambda s: None) for p in (primary, secondary)],
+                               initial_deadline=10)
+        scheduler = LLMScheduler(chain, sleep=lambda s: None)
+        assert scheduler.generate('p') == 'ok:p'
+        assert len(primary.prompts) == 3
+        assert secondary.prompts == []
+        assert scheduler.retries == 2
+
+    def test_provider_not_modified(self):
+        """L'ordonnanceur ne modifie pas le provider reçu ; deux ordonnanceurs n'empilent pas les limiteurs"""
+        chain = HedgedProvider([RateLimiter(FlakyProvider()), RateLimiter(FlakyProvider())])
+        children = list(chain.providers)
+        first, second = LLMScheduler(chain), LLMScheduler(chain)
+        assert chain.providers == children
+        assert first.target is chain and second.target is chain
+        assert first.limiters == children
+
+        plain = HedgedProvider([FlakyProvider(), FlakyProvider()])
+        plain_children = list(plain.providers)
+        LLMScheduler(plain)
+        assert plain.providers == plain_children
@@ -0,0 +1,79 @@
+"""
+Tests unitaires pour l'instrumentation de la pipeline
+"""
+import json
+import pytest
+import sys
+sys.path.insert(0, 'scripts')
+
+import pipeline_metrics
+from llm_fix_suggester import LLMFixSuggester, MockProvider
+from llm_scheduler import LLMScheduler
+
+
+@pytest.fixture
+def metrics():
+    registry = pipeline_metrics.enable()
+    yield registry
+    pipeline_metrics.disable()
+
+
+class TestMetricsRegistry:
+    """Tests pour le registre de métriques"""
+
+    def test_disabled_records_nothing(self):
+        """Désactivée, l'instrumentation ne collecte rien"""
+        pipeline_metrics.disable()
+        with pipeline_metrics.span('phase') as span:
+            span.set(size=1)
+        pipeline_metrics.add('counter')
+        assert pipeline_metrics.registry().to_json() == {"summary": {}, "counters": {}, "spans": []}
+
+    def test_span_records_duration_and_attributes(self, metrics):
+        """Un span enregistre sa durée et ses attributs"""
+        with pipeline_metrics.span('phase', language='python') as span:
+            span.set(bytes=42)
+        data = metrics.to_json()
+        assert data["summary"]["phase"]["count"] == 1
+        assert data["spans"][0]["language"] == 'python'
+        assert data["spans"][0]["bytes"] == 42
+
+    def test_span_records_errors(self, metrics):
+        """Un span interrompu par une exception est marqué en erreur"""
+        with pytest.raises(ValueError):
+            with pipeline_metrics.span('phase'):
+                raise ValueError()
+        assert metrics.to_json()["spans"][0]["error"] == 'ValueError'
+
+    def test_export_formats(self, metrics, tmp_path):
+        """Export JSON ou Prometheus selon l'extension"""
+        with pipeline_metrics.span('load_context'):
+            pass
+        pipeline_metrics.add('provider.retries', 2)
+        metrics.write([str(tmp_path / 'm.json'), str(tmp_path / 'm.prom')])
+
+        assert json.loads((tmp_path / 'm.json').read_text())["counters"] == {'provider.retries': 2}
+        prom = (tmp_path / 'm.prom').read_text()
+        assert 'secpilot_phase_seconds_count{phase="load_context"} 1' in prom
+        assert 'secpilot_provider_retries_total 2' in prom
+
+
+class TestPipelineInstrumentation:
+    """Les phases du suggester sont instrumentées"""
+
+    def test_process_artifacts_phases(self, metrics, tmp_path):
+        """Chaque phase et chaque appel provider produit un span"""
+        folder = tmp_path / 'artifacts' / 'test-results-python'
+        folder.mkdir(parents=True)
+        (folder / 'test-output.txt').write_text("FAILED tests/python/test_pricing.py::ecommerce\n")
+
+        provider = MockProvider()
+        suggester = LLMFixSuggester(provider, scheduler=LLMScheduler(provider))
+        suggester.process_artifacts(tmp_path / 'artifacts', tmp_path / 'contexts', tmp_path / 'src')
+
+        summary = metrics.to_json()["summary"]
+        for phase in ('load_context', 'parse_test_output', 'load_source_code', 'provider.generate'):
+            assert phase in summary
+        call = next(s for s in metrics.to_json()["spans"] if s["name"] == 'provider.generate')
+        assert call["retries"] == 0
+        assert call["prompt_chars"] > 0 and call["response_chars"] > 0
@@ -0,0 +1,186 @@
+"""
+Tests unitaires pour l'orchestrateur de la pipeline
+"""
+import json
+import time
+import threading
+import pytest
+import sys
+from pathlib import Path
+sys.path.insert(0, 'scripts')
+
+from context_index import ContextIndex
+from llm_fix_suggester import LLMFixSuggester, LLMProvider, MockProvider
+from llm_scheduler import LLMScheduler, PRIORITY_CRITICAL
+from pipeline_runner import PipelineRunner, SecpilotPipeline
+
+
+SARIF = Path('tests/python/fixtures/semgrep_src_python.sarif')
+
+
+class RecordingProvider(LLMProvider):
+    """Provider factice qui enregistre les prompts dans l'ordre des appels"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt):
+        self.prompts.append(str(prompt))
+        return 'ok'
+
+
+class TestPipelineRunner:
+    """Tests pour la classe PipelineRunner"""
+
+    def test_streaming_edges(self):
+        """Un élément est traité en aval avant la fin de l'étape qui l'a produit"""
+        events = []
+
+        def source(_):
+            yield 'a'
+            time.sleep(0.2)
+            events.append('source-end')
+            yield 'b'
+
+        def consumer(item):
+            events.append(f'consume-{item}')
+            return [item.upper()]
+
+        runner = PipelineRunner()
+        runner.add_stage('source', source)
+        runner.add_stage('consumer', consumer, inputs=['source'])
+        result = runner.run()
+
+        assert events.index('consume-a') < events.index('source-end')
+        assert sorted(result['outputs']['consumer']) == ['A', 'B']
+
+    def test_bounded_parallelism(self):
+        """Une étape n'exécute jamais plus de tâches simultanées que son nombre de workers"""
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def work(item):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.02)
+            with lock:
+                state['running'] -= 1
+            return [item]
+
+        runner = PipelineRunner()
+        runner.add_stage('items', lambda item: [item], items=range(8))
+        runner.add_stage('work', work, inputs=['items'], workers=2)
+        runner.run()
+        assert state['peak'] == 2
+
+    def test_longest_path_not_sum(self):
+        """La durée totale suit le plus long chemin, pas la somme des étapes"""
+        def suite(duration):
+            time.sleep(duration)
+            yield duration
+
+        runner = PipelineRunner()
+        runner.add_stage('tests', suite, items=[0.3, 0.1, 0.1], workers=3)
+        runner.add_stage('analyze', lambda d: [time.sleep(0.2)], inputs=['tests'], workers=3)
+        result = runner.run()
+        # Somme séquentielle : 0.5s de tests + 0.6s d'analyses ; plus long chemin : 0.5s
+        assert result['seconds'] < 0.8
+        assert result['timings']['analyze']['first_start'] < result['timings']['tests']['last_end']
+
+    def test_errors_collected(self):
+        """L'échec d'une tâche est consigné sans interrompre les autres"""
+        def work(item):
+            if item == 2:
+                raise RuntimeError('boom')
+            return [item]
+
+        runner = PipelineRunner()
+        runner.add_stage('work', work, items=[1, 2, 3], workers=3)
+        result = runner.run()
+        assert sorted(result['outputs']['work']) == [1, 3]
+        assert result['errors']['work'][0]['item'] == 2
+
+    def test_invalid_graph(self):
+        """Les entrées inconnues et les cycles sont refusés"""
+        runner = PipelineRunner()
+        runner.add_stage('a', lambda x: [x], inputs=['b'])
+        runner.add_stage('b', lambda x: [x], inputs=['a'])
+        with pytest.raises(ValueError, match='Cycle'):
+            runner.run()
+
+
+class TestSecpilotPipeline:
+    """Graphe par défaut avec le provider mock"""
+
+    def test_combined_report(self, tmp_path):
+        """Échecs de tests et violations Semgrep sont réunis dans un rapport ordonné"""
+        for language in ('python', 'javascript'):
+            folder = tmp_path / 'artifacts' / f'test-results-{language}'
+            folder.mkdir(parents=True)
+            (folder / 'test-output.txt').write_text(f"FAILED tests/{language}/test_transfer - BK-001\n")
+
+        pipeline = SecpilotPipeline(
+            LLMFixSuggester(MockProvider()),
+            tmp_path / 'artifacts', Path('contexts'), Path('src'),
+            languages=[], run_tests=False, sarif=SARIF
+        )
+        result = pipeline.run()
+        report = result['report']
+
+        assert report.index('Échecs de tests Javascript') < report.index('Échecs de tests Python')
+        assert '## Violations Semgrep' in report
+        assert '### Domaine Banking (' in report and '### Domaine Ecommerce (' in report
+        assert 'Erreurs de la pipeline' not in report
+
+    def test_semgrep_context_from_index(self, tmp_path):
+        """Avec l'index, le contexte d'une analyse Semgrep est cherché à partir des règles violées"""
+        contexts = tmp_path / 'contexts'
+        contexts.mkdir()
+        (contexts / 'banking.md').write_text(
+            "# Banque\n\n## Présentation\nClients particuliers et entreprises.\n\n"
+            "## Règle BK-001 : Prévention du découvert\nRefuser le virement si le solde est insuffisant.\n"
+        )
+        (tmp_path / 'artifacts').mkdir()
+
+        pipeline = SecpilotPipeline(
+            LLMFixSuggester(MockProvider(), context_index=ContextIndex()),
+            tmp_path / 'artifacts', contexts, Path('src'),
+            languages=[], run_tests=False, sarif=SARIF
+        )
+        groups = pipeline.run()['outputs']['analyze-semgrep']
+        banking = next(g for g in groups if g['domain'] == 'banking')
+        assert banking['job']['context'].startswith('### Banque > Règle BK-001')
+
+    def test_semgrep_jobs_per_language(self, tmp_path):
+        """Un job par paire (domaine, langage), soumis en un seul lot : les règles critiques d'abord"""
+        sarif = json.loads(SARIF.read_text(encoding='utf-8'))
+        results = sarif['runs'][0]['results']
+        banking = [r for r in results if 'banking' in r['locations'][0]['physicalLocation']['artifactLocation']['uri']]
+        for extension, folder in (('.js', 'javascript'), ('.java', 'java')):
+            for result in banking:
+                copy = json.loads(json.dumps(result))
+                copy['locations'][0]['physicalLocation']['artifactLocation']['uri'] = \
+                    f'src/{folder}/banking/transfer{extension}'
+                results.append(copy)
+        sarif_path = tmp_path / 'semgrep.sarif'
+        sarif_path.write_text(json.dumps(sarif), encoding='utf-8')
+        (tmp_path / 'artifacts').mkdir()
+
+        provider = RecordingProvider()
+        pipeline = SecpilotPipeline(
+            LLMFixSuggester(provider, scheduler=LLMScheduler(provider)),
+            tmp_path / 'artifacts', Path('contexts'), Path('src'),
+            languages=[], run_tests=False, sarif=sarif_path
+        )
+        result = pipeline.run()
+        groups = result['outputs']['analyze-semgrep']
+        assert sorted(g['language'] for g in groups if g['domain'] == 'banking') == ['java', 'javascript', 'python']
+        java = next(g for g in groups if g['domain'] == 'banking' and g['language'] == 'java')
+        assert 'public class Transfer' in java['job']['source_code']
+        assert '### Domaine Banking (Java, ' in result['report']
+
+        critical = [g['job']['test_failure']['raw_output'] for g in groups
+                    if g['job']['priority'] == PRIORITY_CRITICAL]
+        assert critical and len(critical) < len(groups)
+        assert all(any(raw in prompt for raw in critical) for prompt in provider.prompts[:len(critical)])
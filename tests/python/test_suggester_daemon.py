@@ -0,0 +1,175 @@
+"""
+Tests unitaires pour le mode démon du LLM Fix Suggester
+"""
+import io
+import os
+import stat
+import time
+import socket
+import subprocess
+import threading
+import pytest
+import sys
+sys.path.insert(0, 'scripts')
+
+from suggester_daemon import (
+    FileCache,
+    SourceIndex,
+    SuggesterDaemon,
+    _RequestHandler,
+    _UnixServer,
+    private_runtime_dir,
+    remove_stale_socket,
+    submit
+)
+from llm_fix_suggester import LLMFixSuggester, MockProvider, build_arg_parser
+
+
+def _workspace(tmp_path):
+    artifacts = tmp_path / 'artifacts' / 'test-results-python'
+    artifacts.mkdir(parents=True)
+    (artifacts / 'test-output.txt').write_text("FAILED tests/python/test_pricing.py ecommerce\n")
+    (tmp_path / 'contexts').mkdir()
+    (tmp_path / 'contexts' / 'ecommerce.md').write_text("# EC-001\n")
+    (tmp_path / 'src' / 'ecommerce').mkdir(parents=True)
+    (tmp_path / 'src' / 'ecommerce' / 'ecommerce_pricing.py').write_text("def f(): pass\n")
+
+
+@pytest.fixture
+def daemon_socket(tmp_path):
+    path = str(tmp_path / 'd.sock')
+    server = _UnixServer(path, _RequestHandler)
+    server.daemon_state = SuggesterDaemon()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+
+
+class TestFileCache:
+    """Tests pour la classe FileCache"""
+
+    def test_reloads_modified_file(self, tmp_path):
+        """Un fichier modifié est relu"""
+        path = tmp_path / 'ctx.md'
+        path.write_text('v1')
+        cache = FileCache()
+        assert cache.read(path) == 'v1'
+        path.write_text('version 2')
+        os.utime(path, ns=(1, 1))
+        assert cache.read(path) == 'version 2'
+
+
+class TestSourceIndex:
+    """Tests pour la classe SourceIndex"""
+
+    def test_new_file_detected(self, tmp_path):
+        """Un fichier ajouté est pris en compte"""
+        (tmp_path / 'banking').mkdir()
+        index = SourceIndex(tmp_path)
+        assert index.match('*banking*.py') == []
+        (tmp_path / 'banking' / 'banking_transfer.py').write_text('')
+        assert [f.name for f in index.match('*banking*.py')] == ['banking_transfer.py']
+
+
+class TestDaemon:
+    """Tests de bout en bout via le socket Unix"""
+
+    def test_submit_matches_local_run(self, tmp_path, daemon_socket):
+        """Le rapport du démon est identique à une exécution locale"""
+        _workspace(tmp_path)
+        args = build_arg_parser().parse_args([
+            '--artifacts-dir', str(tmp_path / 'artifacts'),
+            '--contexts-dir', str(tmp_path / 'contexts'),
+            '--src-dir', str(tmp_path / 'src'),
+            '--output-file', str(tmp_path / 'out.md'),
+            '--provider', 'mock',
+        ])
+        stream = io.StringIO()
+        report = submit(daemon_socket, args, stream=stream)
+
+        expected = LLMFixSuggester(MockProvider()).process_artifacts(
+            tmp_path / 'artifacts', tmp_path / 'contexts', tmp_path / 'src'
+        )
+        assert report == expected
+        assert '[python/ecommerce] ok' in stream.getvalue()
+
+        # Le second job réutilise le provider déjà construit
+        assert submit(daemon_socket, args, stream=io.StringIO()) == expected
+
+    def test_daemon_uses_process_artifacts(self, tmp_path, monkeypatch):
+        """Le démon délègue à process_artifacts, dont chaque job terminé est notifié"""
+        _workspace(tmp_path)
+        calls = []
+        process_artifacts = LLMFixSuggester.process_artifacts
+
+        def spy(self, *args, **kwargs):
+            calls.append(kwargs.get('on_job'))
+            return process_artifacts(self, *args, **kwargs)
+
+        monkeypatch.setattr(LLMFixSuggester, 'process_artifacts', spy)
+        events = []
+        SuggesterDaemon().handle({
+            'provider': 'mock', 'artifacts_dir': str(tmp_path / 'artifacts'),
+            'contexts_dir': str(tmp_path / 'contexts'), 'src_dir': str(tmp_path / 'src'),
+        }, events.append)
+        assert len(calls) == 1 and calls[0] is not None
+        assert [e['event'] for e in events] == ['job', 'done']
+
+    def test_errors_reported_to_client(self, tmp_path, daemon_socket):
+        """Une erreur côté démon est remontée au client"""
+        _workspace(tmp_path)
+        args = build_arg_parser().parse_args([
+            '--artifacts-dir', str(tmp_path / 'artifacts'),
+            '--contexts-dir', str(tmp_path / 'contexts'),
+            '--src-dir', str(tmp_path / 'src'),
+            '--output-file', str(tmp_path / 'out.md'),
+            '--provider', 'unknown',
+        ])
+        with pytest.raises(RuntimeError, match='Provider inconnu'):
+            submit(daemon_socket, args, stream=io.StringIO())
+
+
+class TestSocketPermissions:
+    """Le socket du démon n'est accessible qu'à son propriétaire"""
+
+    def test_socket_private_from_creation(self, tmp_path):
+        """Le socket est créé sans droits pour le groupe ni les autres"""
+        path = tmp_path / 'd.sock'
+        process = subprocess.Popen([sys.executable, 'scripts/suggester_daemon.py', 'serve', '--socket', str(path)],
+                                   stdout=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 10
+            while not path.exists() and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert stat.S_IMODE(os.lstat(path).st_mode) & 0o077 == 0
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    def test_stale_socket_only_removed(self, tmp_path):
+        """Seul un ancien socket est supprimé, jamais un autre fichier"""
+        regular = tmp_path / 'd.sock'
+        regular.write_text('données')
+        with pytest.raises(RuntimeError, match='suppression refusée'):
+            remove_stale_socket(str(regular))
+        assert regular.exists()
+
+        stale = tmp_path / 'stale.sock'
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(str(stale))
+        remove_stale_socket(str(stale))
+        assert not stale.exists()
+
+    def test_private_runtime_dir(self, tmp_path, monkeypatch):
+        """Sans XDG_RUNTIME_DIR, le socket va dans un répertoire 0700 propre à l'utilisateur"""
+        monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+        monkeypatch.setattr('tempfile.gettempdir', lambda: str(tmp_path))
+        directory = private_runtime_dir()
+        assert directory == tmp_path / f'secpilot-{os.getuid()}'
+        assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+
+        directory.chmod(0o777)
+        with pytest.raises(RuntimeError, match='privé'):
+            private_runtime_dir()
@@ -0,0 +1,226 @@
+"""
+Tests unitaires pour la file de travail partagée
+"""
+import time
+import shutil
+import socket
+import sqlite3
+import hashlib
+import threading
+import subprocess
+import pytest
+import sys
+from pathlib import Path
+sys.path.insert(0, 'scripts')
+
+from llm_fix_suggester import LLMProvider, LLMFixSuggester, MockProvider
+from work_queue import WorkQueue, enqueue, work
+
+
+class EchoProvider(LLMProvider):
+    """Provider factice : réponse dérivée du prompt, latence configurable"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def generate(self, prompt):
+        time.sleep(self.delay)
+        return hashlib.sha256(str(prompt).encode('utf-8')).hexdigest()
+
+
+def _artifacts(tmp_path, count=2):
+    """Artefacts de plusieurs services, chacun citant deux domaines"""
+    artifacts = tmp_path / 'artifacts'
+    for service in range(count):
+        for language in ('python', 'javascript'):
+            folder = artifacts / f'service{service}-test-results-{language}'
+            folder.mkdir(parents=True)
+            (folder / 'test-output.txt').write_text(
+                f"FAILED tests/test_transfer - BK-001\nFAILED tests/test_pricing - EC-00{service}\n"
+            )
+    clean = artifacts / 'test-results-java'
+    clean.mkdir()
+    (clean / 'test-output.txt').write_text("Tests run: 3, Failures: 0\n")
+    return artifacts
+
+
+def _queue(tmp_path, provider, **kwargs):
+    queue = WorkQueue(tmp_path / 'queue.db', **kwargs)
+    enqueue(queue, LLMFixSuggester(provider), _artifacts(tmp_path), Path('contexts'), Path('src'))
+    return queue
+
+
+class TestWorkQueue:
+    """Tests pour la classe WorkQueue"""
+
+    def test_enqueue_idempotent(self, tmp_path):
+        """Un producteur relancé n'ajoute pas deux fois les mêmes artefacts"""
+        queue = _queue(tmp_path, MockProvider())
+        assert queue.status()['pending'] == 8
+        assert enqueue(queue, LLMFixSuggester(MockProvider()), tmp_path / 'artifacts',
+                       Path('contexts'), Path('src')) == 0
+        queue.close()
+
+    def test_producers_with_same_folder_names(self, tmp_path):
+        """Deux producteurs aux dossiers d'artefacts de même nom ajoutent chacun leurs jobs"""
+        queue = WorkQueue(tmp_path / 'queue.db')
+        # Producteur par défaut : chemin résolu des artefacts
+        for producer in ('runner-a', 'runner-b'):
+            assert enqueue(queue, LLMFixSuggester(MockProvider()), _artifacts(tmp_path / producer),
+                           Path('contexts'), Path('src')) == 8
+        # Producteurs nommés (--artifact-prefix) : seul le nom compte, pas le chemin
+        for producer, folder in (('runner-c', 'c'), ('runner-c', 'c-bis'), ('runner-d', 'd')):
+            enqueue(queue, LLMFixSuggester(MockProvider()), _artifacts(tmp_path / folder),
+                    Path('contexts'), Path('src'), producer=producer)
+        assert queue.status()['pending'] == 32
+
+        work(queue, LLMFixSuggester(MockProvider()), 'w', batch=32)
+        entries = queue.entries()
+        assert [entry['artifact'] for entry in entries].count('test-results-java') == 4
+        assert sum(len(entry['jobs']) for entry in entries) == 32
+        queue.close()
+
+    def test_runners_with_same_artifacts_path(self, tmp_path, monkeypatch):
+        """Deux runners au même chemin d'artefacts ajoutent chacun leurs jobs, titrés par producteur"""
+        queue = WorkQueue(tmp_path / 'queue.db')
+        for runner in ('runner-a', 'runner-b'):
+            monkeypatch.setattr(socket, 'gethostname', lambda: runner)
+            shutil.rmtree(tmp_path / 'artifacts', ignore_errors=True)
+            assert enqueue(queue, LLMFixSuggester(MockProvider()), _artifacts(tmp_path),
+                           Path('contexts'), Path('src')) == 8
+
+        work(queue, LLMFixSuggester(MockProvider()), 'w', batch=16)
+        report = LLMFixSuggester.render_suggestions(queue.entries())
+        assert report.count('## Échecs de tests Java (runner-a:') == 1
+        assert report.count('## Échecs de tests Java (runner-b:') == 1
+        queue.close()
+
+    def test_claims_are_exclusive(self, tmp_path):
+        """Deux workers ne réclament jamais le même job"""
+        queue = _queue(tmp_path, MockProvider())
+        first = queue.claim('a', limit=5)
+        second = queue.claim('b', limit=5)
+        assert len(first) == 5 and len(second) == 3
+        assert not {job['queue_id'] for job in first} & {job['queue_id'] for job in second}
+        assert queue.claim('c') == []
+        queue.close()
+
+    def test_expired_lease_reclaimed(self, tmp_path):
+        """Le job d'un worker arrêté est repris ; le résultat tardif de l'ancien worker est ignoré"""
+        queue = _queue(tmp_path, MockProvider(), lease=0.05)
+        job = queue.claim('crashed')[0]
+        time.sleep(0.1)
+        taken = queue.claim('b', limit=8)
+        assert job['queue_id'] in {j['queue_id'] for j in taken}
+        assert queue.complete('crashed', dict(job, suggestion='tardive')) is False
+        assert queue.complete('b', dict(job, suggestion='ok')) is True
+
+    def test_heartbeat_keeps_lease(self, tmp_path):
+        """Un bail prolongé par heartbeat n'est pas repris"""
+        queue = _queue(tmp_path, MockProvider(), lease=0.1)
+        job = queue.claim('a')[0]
+        for _ in range(3):
+            time.sleep(0.05)
+            assert queue.heartbeat('a', [job['queue_id']]) == 1
+        assert job['queue_id'] not in {j['queue_id'] for j in queue.claim('b', limit=8)}
+
+    def test_abandoned_after_max_attempts(self, tmp_path):
+        """Un job dont le bail expire trop souvent est abandonné avec une erreur"""
+        queue = _queue(tmp_path, MockProvider(), lease=0.01, max_attempts=2)
+        for _ in range(3):
+            queue.claim('crashing', limit=8)
+            time.sleep(0.02)
+        assert queue.status() == {'pending': 0, 'leased': 0, 'done': 0, 'failed': 8}
+        entries = queue.entries()
+        assert entries[0]['jobs'][0]['error'].startswith('Abandonné après 2 tentative(s)')
+
+    def test_reduce_requires_finished_jobs(self, tmp_path):
+        """Le rapport n'est pas assemblé tant que des jobs restent à traiter"""
+        queue = _queue(tmp_path, MockProvider())
+        with pytest.raises(ValueError, match='8 job'):
+            queue.entries()
+
+
+class TestWorkers:
+    """Traitement de la file par plusieurs workers"""
+
+    def test_report_matches_single_process(self, tmp_path):
+        """Le rapport assemblé est identique à celui d'une exécution en un seul processus"""
+        provider = EchoProvider()
+        expected = LLMFixSuggester(provider).process_artifacts(
+            _artifacts(tmp_path / 'local'), Path('contexts'), Path('src')
+        )
+
+        queue = _queue(tmp_path, provider)
+        workers = [threading.Thread(target=work, args=(WorkQueue(queue.path), LLMFixSuggester(provider), f'w{i}'))
+                   for i in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        report = LLMFixSuggester.render_suggestions(queue.entries())
+        assert report == expected
+        assert 'Aucun échec détecté' in report
+
+    def test_heartbeat_survives_errors(self, tmp_path):
+        """Une erreur de heartbeat est journalisée et les baux restent prolongés ensuite"""
+        queue = _queue(tmp_path, MockProvider(), lease=0.15)
+        beats = []
+        heartbeat = queue.heartbeat
+
+        def flaky_heartbeat(worker, queue_ids):
+            beats.append(len(queue_ids))
+            if len(beats) == 1:
+                raise sqlite3.OperationalError('database is locked')
+            return heartbeat(worker, queue_ids)
+
+        queue.heartbeat = flaky_heartbeat
+        work(queue, LLMFixSuggester(EchoProvider(0.2)), 'w', batch=8)
+        assert len(beats) >= 2
+        assert queue.status()['done'] == 8
+
+    def test_throughput_scales_with_workers(self, tmp_path):
+        """Quatre workers traitent la file nettement plus vite qu'un seul"""
+        def drain(folder, count):
+            artifacts = _artifacts(folder)
+            queue = WorkQueue(folder / 'queue.db')
+            enqueue(queue, LLMFixSuggester(MockProvider()), artifacts, Path('contexts'), Path('src'))
+            start = time.perf_counter()
+            workers = [threading.Thread(target=work, args=(WorkQueue(queue.path), LLMFixSuggester(EchoProvider(0.1)),
+                                                           f'w{i}'), kwargs={'poll_interval': 0.02})
+                       for i in range(count)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            assert queue.status()['done'] == 8
+            return time.perf_counter() - start
+
+        single = drain(tmp_path / 'single', 1)
+        parallel = drain(tmp_path / 'parallel', 4)
+        assert parallel < single / 2
+
+    def test_local_processes(self, tmp_path):
+        """Plusieurs processus workers et le provider mock produisent le rapport complet"""
+        queue_path = tmp_path / 'queue.db'
+        common = ['--queue', str(queue_path), '--provider', 'mock', '--contexts-dir', 'contexts', '--src-dir', 'src']
+        subprocess.run(
+            [sys.executable, 'scripts/work_queue.py', 'enqueue', '--artifacts-dir', str(_artifacts(tmp_path)), *common],
+            check=True, capture_output=True
+        )
+        workers = [subprocess.Popen([sys.executable, 'scripts/work_queue.py', 'work', '--worker-id', f'p{i}', *common],
+                                    stdout=subprocess.PIPE, text=True)
+                   for i in range(3)]
+        processed = [int(worker.communicate(timeout=60)[0].split()[0]) for worker in workers]
+        assert sum(processed) == 8
+
+        output = tmp_path / 'llm-suggestions.md'
+        subprocess.run(
+            [sys.executable, 'scripts/work_queue.py', 'reduce', '--output-file', str(output), *common],
+            check=True, capture_output=True
+        )
+        report = output.read_text(encoding='utf-8')
+        assert report.count('### Domaine') == 8
+        # Ordre des artefacts : service0-..., service1-..., puis test-results-java
+        assert report.rindex('## Échecs de tests Python') < report.index('## Échecs de tests Java\n')